@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -22,16 +23,73 @@ def create_app():
     from app.routes.portfolio import portfolio as portfolio_blueprint
     from app.routes.analysis import analysis as analysis_blueprint
     from app.routes.stocks import stocks as stocks_blueprint
+    from app.routes.api import api as api_blueprint
 
     app.register_blueprint(main_blueprint)
     app.register_blueprint(portfolio_blueprint)
     app.register_blueprint(analysis_blueprint)
     app.register_blueprint(stocks_blueprint)
+    app.register_blueprint(api_blueprint)
 
-    with app.app_context():
-        db.create_all()
+    # Samme data hentes bare én gang per forespørsel
+    from flask import g
+    from app.services import memo
+
+    @app.before_request
+    def open_memo_scope():
+        g.memo_token = memo.begin('request')
+
+    @app.teardown_request
+    def close_memo_scope(exc=None):
+        token = g.pop('memo_token', None)
+        if token is not None:
+            memo.end(token)
+
+    # Tidsmåling per rute: eksterne kall, databasekall og maler (/metrics og Server-Timing)
+    from app.services import metrics
+    metrics.init_app(app)
+
+    # Tabellene opprettes med `flask init-db` (eller run.py), ikke ved import
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the database tables."""
+        init_db(app)
+        print('Database initialized.')
+
+    @app.cli.command('refresh-tickers')
+    def refresh_tickers_command():
+        """Fetch names, sectors and currencies for the ticker universe."""
+        from app.services.data_service import DataService
+        updated, failures = DataService.refresh_ticker_registry()
+        for ticker, error in sorted(failures.items()):
+            print(f"Error refreshing {ticker}: {error}")
+        print(f"Updated {updated} tickers in {DataService.ticker_registry.path} ({len(failures)} failed).")
+
+    @app.cli.command('backtest')
+    @click.option('--rule', default='rsi_macd', help='Signal rule (see app.services.backtest.SIGNAL_RULES).')
+    @click.option('--period', default='10y', help='History to replay.')
+    @click.option('--long-short', is_flag=True, help='Go short on Sell instead of flat.')
+    @click.option('--cost-bps', default=5.0, help='Trading cost per unit of turnover.')
+    @click.option('--top', default=10, help='Number of tickers to list.')
+    def backtest_command(rule, period, long_short, cost_bps, top):
+        """Backtest a signal rule on the ticker universe."""
+        from app.services.analysis_service import AnalysisService
+        result = AnalysisService.backtest(period=period, rule=rule, long_short=long_short, cost_bps=cost_bps)
+        per_ticker = result['per_ticker']
+        if per_ticker.empty:
+            print('No history available.')
+            return
+        print(per_ticker.sort_values('sharpe', ascending=False).head(top).round(3).to_string())
+        print({name: round(value, 4) if isinstance(value, float) else value
+               for name, value in result['portfolio'].items()})
+
+    # Start bakgrunnsoppdatering av markedsoversikten
+    if app.config.get('MARKET_SNAPSHOT_INTERVAL', 0) > 0:
+        from app.services.data_service import DataService
+        DataService.market_snapshots.start(app.config['MARKET_SNAPSHOT_INTERVAL'])
 
     return app
 
-# For enkel import i run.py:
-app = create_app()
+def init_db(app):
+    with app.app_context():
+        db.create_all()
@@ -9,10 +9,11 @@ analysis = Blueprint('analysis', __name__)
 
 @analysis.route('/')
 def index():
-    oslo_stocks = DataService.get_oslo_bors_overview()
-    global_stocks = DataService.get_global_stocks_overview()
-    crypto = DataService.get_crypto_overview()
-    currency = DataService.get_currency_overview()
+    overview = DataService.get_market_overview()
+    oslo_stocks = overview['oslo_stocks']
+    global_stocks = overview['global_stocks']
+    crypto = overview['crypto']
+    currency = overview['currency']
 
     # Tell signalene
     buy_signals = sum(1 for d in oslo_stocks.values() if d.get('signal') == 'BUY')
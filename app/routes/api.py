@@ -0,0 +1,184 @@
+import hashlib
+import json
+import math
+import secrets
+from flask import Blueprint, current_app, jsonify, request, abort
+from flask_login import login_required
+from app.services.data_service import DataService
+from app.services.analysis_service import AnalysisService
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+MARKET_SECTIONS = ('oslo_stocks', 'global_stocks', 'crypto', 'currency')
+
+# Snapshot-versjonen teller fra 0 i hver prosess; med en tilfeldig del per oppstart
+# kan samme ETag ikke bety ulike data hos ulike arbeidere eller etter en omstart
+_ETAG_EPOCH = secrets.token_hex(4)
+
+
+def _quote(row):
+    """A quote row as a plain dict, without the history DataFrame some rows carry"""
+    return {key: value for key, value in row.items() if key != 'data'}
+
+
+def _plain(section):
+    """Snapshot sections are read-only mappings; jsonify needs dicts"""
+    return {key: _quote(row) if hasattr(row, 'items') else row for key, row in section.items()}
+
+
+def _json_safe(value):
+    """NaN/inf become null and NumPy scalars plain Python values"""
+    if isinstance(value, dict):
+        return {key: _json_safe(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _not_modified(etag):
+    """304 response if the client already has this ETag, else None"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def _conditional(payload, etag=None):
+    """
+    JSON response with an ETag, or 304 if If-None-Match matches
+
+    Without an etag one is derived from the payload, so unchanged data
+    still costs no bandwidth.
+    """
+    body = json.dumps(_json_safe(payload), sort_keys=True, default=str)
+    if etag is None:
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:20]
+    response = _not_modified(etag)
+    if response is not None:
+        return response
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _snapshot_etag(name, snapshot):
+    return f"{name}-{_ETAG_EPOCH}-v{snapshot.version}"
+
+
+def _market_snapshot():
+    """The published snapshot, or None when the background refresher is off"""
+    if DataService.market_snapshots.interval > 0:
+        return DataService.get_market_snapshot()
+    return None
+
+
+@api.route('/market')
+def market():
+    snapshot = _market_snapshot()
+    if snapshot is not None:
+        # Svar 304 på versjonen alene, uten å bygge JSON
+        etag = _snapshot_etag('market', snapshot)
+        response = _not_modified(etag)
+        if response is not None:
+            return response
+        payload = {name: _plain(section) for name, section in snapshot.sections.items()}
+        payload['version'] = snapshot.version
+        payload['created_at'] = snapshot.created_at
+        return _conditional(payload, etag)
+    overview = DataService.get_market_overview()
+    return _conditional({name: _plain(section) for name, section in overview.items()})
+
+
+@api.route('/market/<section>')
+def market_section(section):
+    if section not in MARKET_SECTIONS:
+        abort(404)
+    snapshot = _market_snapshot()
+    if snapshot is not None:
+        etag = _snapshot_etag(section, snapshot)
+        response = _not_modified(etag)
+        if response is not None:
+            return response
+        return _conditional({'version': snapshot.version,
+                             section: _plain(snapshot.sections.get(section, {}))}, etag)
+    return _conditional({section: _plain(DataService.get_market_overview()[section])})
+
+
+@api.route('/quote/<ticker>')
+def quote(ticker):
+    ticker = ticker.upper()
+    snapshot = _market_snapshot()
+    if snapshot is not None:
+        for section in MARKET_SECTIONS:
+            row = snapshot.sections.get(section, {}).get(ticker)
+            if row is not None:
+                etag = _snapshot_etag(ticker, snapshot)
+                return _not_modified(etag) or _conditional(
+                    {'ticker': ticker, 'version': snapshot.version, 'quote': _quote(row)}, etag)
+    # Bare kjente tickere hentes fra leverandøren; ellers kan hvem som helst starte nettverkskall
+    if ticker not in DataService.get_ticker_registry():
+        return jsonify({'error': f"Unknown ticker {ticker}"}), 404
+    data = DataService.get_single_stock_data(ticker)
+    if not data:
+        return jsonify({'error': f"No data for {ticker}"}), 404
+    return _conditional({'ticker': ticker, 'quote': _quote(data)})
+
+
+@api.route('/technical/<ticker>')
+def technical(ticker):
+    ticker = ticker.upper()
+    result = AnalysisService.get_technical_analysis(ticker)
+    if 'error' in result:
+        return jsonify({'ticker': ticker, 'error': result['error']}), 404
+    return _conditional({'ticker': ticker, 'technical_analysis': result})
+
+
+@api.route('/indicators')
+def indicators():
+    return _conditional({'indicators': DataService.get_live_indicators()})
+
+
+@api.route('/indicators/<ticker>')
+def ticker_indicators(ticker):
+    ticker = ticker.upper()
+    values = DataService.get_live_indicators(ticker)
+    if values is None:
+        return jsonify({'error': f"No live indicators for {ticker}"}), 404
+    return _conditional({'ticker': ticker, 'indicators': values})
+
+
+@api.route('/stream/quotes')
+def stream_quotes():
+    # ?tickers=EQNR.OL,DNB.OL; uten tickers sendes alle endringer
+    tickers = [t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()]
+    subscription = DataService.quote_publisher.subscribe(tickers or None)
+    response = current_app.response_class(
+        subscription.events(heartbeat=current_app.config.get('QUOTE_STREAM_HEARTBEAT', 15)),
+        mimetype='text/event-stream',
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api.route('/stream/stats')
+@login_required
+def stream_stats():
+    return jsonify(DataService.quote_publisher.stats())
+
+
+@api.route('/autocomplete')
+def autocomplete():
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify({
+        'query': query,
+        'results': DataService.search_instruments(query, limit=limit),
+    })
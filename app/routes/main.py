@@ -1,17 +1,24 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, Response, abort, current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app.services.data_service import DataService
+from app.services import memo, metrics
 from app.models.user import User
 from app import db
 
 main = Blueprint('main', __name__)
 
+def _require_admin():
+    # Administrasjon kan endre leverandørtilstand; bare brukere i ADMIN_USERS
+    if current_user.username not in current_app.config.get('ADMIN_USERS', ()):
+        abort(403)
+
 @main.route('/')
 def index():
-    oslo_stocks = DataService.get_oslo_bors_overview()
-    global_stocks = DataService.get_global_stocks_overview()
-    crypto = DataService.get_crypto_overview()
-    currency = DataService.get_currency_overview()
+    overview = DataService.get_market_overview()
+    oslo_stocks = overview['oslo_stocks']
+    global_stocks = overview['global_stocks']
+    crypto = overview['crypto']
+    currency = overview['currency']
     # Slå sammen alle dicts til én flat dict for markedsoversikt
     market_overview = {}
     for d in (oslo_stocks, global_stocks, crypto, currency):
@@ -25,6 +32,48 @@ def index():
         market_overview=market_overview
     )
 
+@main.route('/cache-stats')
+@login_required
+def cache_stats():
+    return jsonify(DataService.get_quote_cache_stats())
+
+@main.route('/http-stats')
+@login_required
+def http_stats():
+    return jsonify(DataService.get_http_stats())
+
+@main.route('/provider-health')
+@login_required
+def provider_health():
+    return jsonify(DataService.get_provider_health())
+
+@main.route('/admin/providers')
+@login_required
+def admin_providers():
+    _require_admin()
+    health = DataService.get_provider_health()
+    return render_template('admin/providers.html', prices=health['prices'], http=health['http'])
+
+@main.route('/admin/providers/reset', methods=['POST'])
+@login_required
+def reset_failing_symbol():
+    _require_admin()
+    ticker = request.form.get('ticker') or None
+    DataService.reset_failing_symbol(ticker)
+    flash(f"{ticker or 'Alle tickere'} hentes på nytt ved neste oppslag", 'success')
+    return redirect(url_for('main.admin_providers'))
+
+@main.route('/memo-stats')
+@login_required
+def memo_stats():
+    return jsonify(memo.stats())
+
+@main.route('/metrics')
+def prometheus_metrics():
+    if not metrics.scrape_allowed(request, current_app.config.get('METRICS_TOKEN'), current_app.debug):
+        abort(403)
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @main.route('/search')
 def search():
     query = request.args.get('q', '')
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort
 from flask_login import login_required, current_user
 from app import db
 from app.models.portfolio import Portfolio, PortfolioStock
@@ -6,47 +6,19 @@ from app.models.stock import Watchlist, WatchlistStock, StockTip
 from app.services.data_service import DataService
 from app.services.analysis_service import AnalysisService
 from app.services.ai_service import AIService
+from app.services.portfolio_valuation import PortfolioValuationService
 
 
 portfolio = Blueprint('portfolio', __name__)
 
 @portfolio.route('/')
 def index():
+    # Alle beholdninger i én spørring og alle kurser i ett bulk-oppslag
+    currency = request.args.get('currency')
     if current_user.is_authenticated:
-        user_portfolios = Portfolio.query.filter_by(user_id=current_user.id).all()
+        portfolios_data = PortfolioValuationService.value_portfolios(user_id=current_user.id, currency=currency)
     else:
-        user_portfolios = Portfolio.query.all()
-
-    portfolios_data = []
-    for p in user_portfolios:
-        stocks_data = []
-        total_value = 0
-
-        for stock in p.stocks:
-            current_data = DataService.get_stock_data(stock.ticker, period='1d')
-            if not current_data.empty:
-                current_price = current_data['Close'].iloc[-1]
-                value = current_price * stock.shares
-                gain_loss = (current_price - stock.average_price) * stock.shares
-                gain_loss_percent = ((current_price / stock.average_price) - 1) * 100 if stock.average_price > 0 else 0
-
-                stocks_data.append({
-                    'ticker': stock.ticker,
-                    'shares': stock.shares,
-                    'average_price': stock.average_price,
-                    'current_price': current_price,
-                    'value': value,
-                    'gain_loss': gain_loss,
-                    'gain_loss_percent': gain_loss_percent
-                })
-
-                total_value += value
-
-        portfolios_data.append({
-            'portfolio': p,
-            'stocks': stocks_data,
-            'total_value': total_value
-        })
+        portfolios_data = PortfolioValuationService.value_portfolios(currency=currency)
 
     return render_template('portfolio/index.html', portfolios=portfolios_data)
 
@@ -65,50 +37,48 @@ def create_portfolio():
 
 @portfolio.route('/<int:id>')
 def view(id):
-    portfolio = Portfolio.query.get_or_404(id)
-
     # Fjern eierskapssjekk for å la alle se
-    stocks_data = []
-    total_value = 0
-    total_investment = 0
-
-    for stock in portfolio.stocks:
-        current_data = DataService.get_stock_data(stock.ticker, period='1d')
-        if not current_data.empty:
-            current_price = current_data['Close'].iloc[-1]
-            value = current_price * stock.shares
-            investment = stock.average_price * stock.shares
-            gain_loss = (current_price - stock.average_price) * stock.shares
-            gain_loss_percent = ((current_price / stock.average_price) - 1) * 100 if stock.average_price > 0 else 0
-
-            stocks_data.append({
-                'ticker': stock.ticker,
-                'shares': stock.shares,
-                'average_price': stock.average_price,
-                'current_price': current_price,
-                'value': value,
-                'investment': investment,
-                'gain_loss': gain_loss,
-                'gain_loss_percent': gain_loss_percent
-            })
-
-            total_value += value
-            total_investment += investment
-
-    total_gain_loss = total_value - total_investment
-    total_gain_loss_percent = ((total_value / total_investment) - 1) * 100 if total_investment > 0 else 0
-
-    tickers = [stock.ticker for stock in portfolio.stocks]
-    ai_recommendation = AIService.get_ai_portfolio_recommendation(tickers) if tickers else None
+    valuation = PortfolioValuationService.value_portfolio(id, currency=request.args.get('currency'))
+    if valuation is None:
+        abort(404)
+    portfolio = valuation['portfolio']
+
+    # AI-anbefalingen lages i bakgrunnen; siden viser den straks den er klar
+    tickers = valuation['tickers']
+    ai_recommendation = None
+    ai_job_id = None
+    if tickers:
+        owner = current_user.id if current_user.is_authenticated else None
+        job = AIService.submit_portfolio_recommendation(tickers, owner=owner)
+        if job.status == 'done':
+            ai_recommendation = job.result
+        elif job.status != 'error' and owner is not None:
+            # Bare innloggede kan følge jobben; andre ser anbefalingen når siden lastes på nytt
+            ai_job_id = job.id
 
     return render_template('portfolio/view.html',
                            portfolio=portfolio,
-                           stocks=stocks_data,
-                           total_value=total_value,
-                           total_investment=total_investment,
-                           total_gain_loss=total_gain_loss,
-                           total_gain_loss_percent=total_gain_loss_percent,
-                           ai_recommendation=ai_recommendation)
+                           stocks=valuation['stocks'],
+                           total_value=valuation['total_value'],
+                           total_investment=valuation['total_investment'],
+                           total_gain_loss=valuation['total_gain_loss'],
+                           total_gain_loss_percent=valuation['total_gain_loss_percent'],
+                           ai_recommendation=ai_recommendation,
+                           ai_job_id=ai_job_id)
+
+@portfolio.route('/ai-stats')
+@login_required
+def ai_stats():
+    return jsonify(AIService.get_stats())
+
+@portfolio.route('/ai-jobs/<job_id>')
+@login_required
+def ai_job(job_id):
+    job = AIService.jobs.get(job_id)
+    # Andres jobber svarer som ukjente, så id-en ikke avslører at jobben finnes
+    if job is None or not job.owned_by(current_user.id):
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.to_dict())
 
 @portfolio.route('/<int:id>/add', methods=['GET', 'POST'])
 @login_required
@@ -186,9 +156,8 @@ def watchlist():
                 last_price = stock_data['Close'].iloc[-1]
                 prev_price = stock_data['Close'].iloc[-2]
                 change_percent = ((last_price - prev_price) / prev_price) * 100 if prev_price else None
-            # Hent navn fra info
-            info = DataService.get_stock_info(ws.ticker)
-            name = info.get('longName', ws.ticker)
+            # Navn fra tickerregisteret (ingen .info-kall per rad)
+            name = DataService.get_ticker_name(ws.ticker)
             stocks.append({
                 'ticker': ws.ticker,
                 'name': name,
@@ -1,17 +1,46 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, abort, render_template
+from app.services.analysis_service import AnalysisService
 from app.services.data_service import DataService
 
 stocks = Blueprint('stocks', __name__, url_prefix='/stocks')
 
 @stocks.route('/')
 def index():
-    oslo_stocks = DataService.get_oslo_bors_overview()
-    global_stocks = DataService.get_global_stocks_overview()
-    crypto = DataService.get_crypto_overview()
-    currency = DataService.get_currency_overview()  # <-- denne linjen må være med
+    overview = DataService.get_market_overview()
+    oslo_stocks = overview['oslo_stocks']
+    global_stocks = overview['global_stocks']
+    crypto = overview['crypto']
+    currency = overview['currency']
     return render_template(
         'stocks/index.html',
         oslo_stocks=oslo_stocks,
         global_stocks=global_stocks,
         crypto=crypto,
-        currency=currency,)
\ No newline at end of file
+        currency=currency,)
+
+@stocks.route('/<ticker>')
+def stock_detail(ticker):
+    ticker = ticker.upper()
+    quote = DataService.get_single_stock_data(ticker)
+    data = DataService.get_stock_data(ticker)
+    if not quote and data.empty:
+        abort(404)
+    technical = AnalysisService.get_technical_analysis(ticker)
+    # Siste kurs og endring fra kursdataene, indikatorene fra den tekniske analysen
+    technical_analysis = dict(
+        technical,
+        last_price=quote.get('last_price'),
+        change=quote.get('change'),
+        change_percent=quote.get('change_percent'),
+        overall_signal=str(technical.get('signal', 'NEUTRAL')).upper(),
+    )
+    stock_data = [] if data.empty else [
+        {'Date': day.strftime('%Y-%m-%d'), 'Close': round(float(close), 2)}
+        for day, close in data['Close'].dropna().items()
+    ]
+    return render_template(
+        'stocks/detail.html',
+        ticker=ticker,
+        stock_info=DataService.get_stock_info(ticker) or {},
+        technical_analysis=technical_analysis,
+        stock_data=stock_data)
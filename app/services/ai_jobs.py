@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.memo import memo_scope
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+def job_key(kind, inputs):
+    """Stable id for a job: the kind plus its (JSON-serialisable) inputs"""
+    payload = json.dumps([kind, inputs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class AIJob:
+    """One background AI job and its result"""
+
+    def __init__(self, job_id, kind, inputs):
+        self.id = job_id
+        self.kind = kind
+        self.inputs = inputs
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Brukerne som har bedt om jobben; resultatet kan inneholde porteføljen deres
+        self.owners = set()
+
+    def owned_by(self, user_id):
+        return user_id is not None and user_id in self.owners
+
+    @property
+    def finished(self):
+        return self.status in (DONE, ERROR)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class AIJobQueue:
+    """
+    Runs slow AI calls on a worker pool instead of inside the request.
+
+    Jobs are keyed by their kind and inputs, so submitting the same input
+    set again returns the job that is already queued, running or finished
+    (until its result is older than `result_ttl`); every submitting owner
+    is recorded on the job so routes can check who may read it. A failed job (an
+    exception, or a result dict with an 'error' key) can still be polled
+    but is not reused: submitting it again runs it again. At most
+    `max_jobs` jobs are kept; the oldest finished ones are dropped first.
+    """
+
+    def __init__(self, max_workers=4, result_ttl=900, max_jobs=500):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {'submitted': 0, 'reused': 0, 'done': 0, 'errors': 0}
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ai-job')
+        return self._executor
+
+    def _expired(self, job, now):
+        return job.finished and now - job.finished_at > self.result_ttl
+
+    def _evict(self, now):
+        for job_id in [j.id for j in self._jobs.values() if self._expired(j, now)]:
+            del self._jobs[job_id]
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [j.id for j in self._jobs.values() if j.finished]:
+                del self._jobs[job_id]
+                if len(self._jobs) <= self.max_jobs:
+                    break
+
+    def submit(self, kind, inputs, func, *args, owner=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) as a job unless one for the same inputs exists
+
+        Args:
+            kind (str): Job type, e.g. 'portfolio_recommendation'
+            inputs: JSON-serialisable inputs the result depends on
+            func (callable): Function that produces the result
+            owner (optional): User id allowed to read the job (added to an existing job)
+
+        Returns:
+            AIJob: The new or existing job
+        """
+        job_id = job_key(kind, inputs)
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != ERROR and not self._expired(job, now):
+                self._stats['reused'] += 1
+                if owner is not None:
+                    job.owners.add(owner)
+                return job
+            self._evict(now)
+            job = AIJob(job_id, kind, inputs)
+            if owner is not None:
+                job.owners.add(owner)
+            self._jobs[job_id] = job
+            self._stats['submitted'] += 1
+        self._pool().submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            # Hver jobb henter samme ticker og data bare én gang
+            with memo_scope(f"job:{job.kind}"):
+                result = func(*args, **kwargs)
+        except Exception as e:
+            print(f"Error in AI job {job.kind} {job.id}: {e}")
+            job.error = str(e)
+            job.status = ERROR
+            self._count('errors')
+        else:
+            job.result = result
+            if isinstance(result, dict) and result.get('error'):
+                # AIService fanger egne feil og returnerer dem i resultatet
+                job.error = str(result['error'])
+                job.status = ERROR
+                self._count('errors')
+            else:
+                job.status = DONE
+                self._count('done')
+        job.finished_at = time.time()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, job_id):
+        """The job with this id, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or self._expired(job, time.time()):
+                return None
+            return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job has finished (mainly for scripts and benchmarks)"""
+        deadline = None if timeout is None else time.time() + timeout
+        job = self.get(job_id)
+        while job is not None and not job.finished:
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(0.01)
+        return job
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return dict(self._stats, jobs=len(self._jobs), statuses=statuses, workers=self.max_workers)
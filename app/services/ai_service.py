@@ -1,8 +1,15 @@
+import numbers
 import os
-import openai
-import joblib
+import threading
+import numpy as np
+from flask import current_app, has_app_context
 from app.services.data_service import DataService
 from app.services.analysis_service import AnalysisService
+from app.services import metrics
+from app.services.llm_client import OpenAILLMClient
+from app.services.ai_jobs import AIJobQueue
+from app.services.llm_cache import LLMResponseCache
+from config import Config
 from app.models.stock import StockTip, Watchlist, WatchlistStock
 from app.models.portfolio import Portfolio, PortfolioStock
 
@@ -30,7 +37,118 @@ class AIService:
         # Legg til flere tickere her...
     }
 
-    ml_model = joblib.load('stock_tip_model.pkl')
+    # ML-modellen lastes ved første bruk (se get_ml_model)
+    ml_model = None
+    _ml_model_lock = threading.Lock()
+
+    # Språkmodell-klient; kan byttes ut med FakeLLMClient for lasttester uten nett
+    llm_client = OpenAILLMClient()
+
+    # Bakgrunnsjobber så sidene ikke venter på språkmodellen
+    jobs = AIJobQueue(
+        max_workers=Config.AI_JOB_WORKERS,
+        result_ttl=Config.AI_JOB_RESULT_TTL,
+    )
+
+    # Svar fra språkmodellen lagres lokalt, nøklet på det prompten bygges fra
+    llm_cache = LLMResponseCache(
+        Config.LLM_CACHE_PATH,
+        ttl=Config.LLM_CACHE_TTL,
+        max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+    ) if Config.LLM_CACHE_ENABLED else None
+
+    @staticmethod
+    def _cached_llm_call(kind, inputs, call, **params):
+        """
+        Make an LLM call through the response cache
+
+        Args:
+            kind (str): What is being asked, part of the cache key
+            inputs: Everything the prompt is built from
+            call (callable): Makes the request; returns the response text
+            **params: Model parameters, part of the cache key
+
+        Returns:
+            str: The cached or new response text
+        """
+        client = AIService.llm_client.name
+
+        def timed_call():
+            # Bare ekte kall til modellen måles, ikke treff i cachen
+            with metrics.external_call(client, kind):
+                return call()
+
+        if AIService.llm_cache is None:
+            return timed_call()
+        params['client'] = client
+        return AIService.llm_cache.get_or_call(kind, inputs, params, timed_call)
+
+    @staticmethod
+    def get_stats():
+        """Counters for the AI job queue and the LLM response cache"""
+        return {
+            'jobs': AIService.jobs.stats(),
+            'llm_cache': AIService.llm_cache.stats() if AIService.llm_cache is not None else None,
+        }
+
+    @staticmethod
+    def set_llm_client(client):
+        """Replace the language model client used for all AI calls"""
+        AIService.llm_client = client
+
+    @staticmethod
+    def submit_portfolio_recommendation(tickers, api_key=None, owner=None):
+        """
+        Queue get_ai_portfolio_recommendation in the background
+
+        Args:
+            tickers (list): List of stock ticker symbols
+            api_key (str, optional): OpenAI API key
+            owner (int, optional): Id of the user who may poll the job
+
+        Returns:
+            AIJob: Job keyed by the set of tickers; poll it with AIService.jobs.get
+        """
+        tickers = sorted(set(tickers))
+        return AIService.jobs.submit('portfolio_recommendation', tickers,
+                                     AIService.get_ai_portfolio_recommendation, tickers, api_key, owner=owner)
+
+    @staticmethod
+    def _in_app_context(func):
+        """func wrapped to run in the current app's context on a job worker (for database lookups)"""
+        if not has_app_context():
+            return func
+        app = current_app._get_current_object()
+
+        def run(*args, **kwargs):
+            with app.app_context():
+                return func(*args, **kwargs)
+        return run
+
+    @staticmethod
+    def submit_analysis(ticker, api_key=None, owner=None):
+        """Queue get_ai_analysis for one ticker in the background (owner: user id who may poll it)"""
+        ticker = ticker.upper()
+        return AIService.jobs.submit('analysis', ticker, AIService._in_app_context(AIService.get_ai_analysis),
+                                     ticker, api_key, owner=owner)
+
+    @staticmethod
+    def _rounded(value, digits):
+        """A number rounded for prompts and cache keys; None if it is missing or not a number"""
+        if isinstance(value, bool) or not isinstance(value, numbers.Real) or value != value:
+            return None
+        return round(float(value), digits) if digits else int(round(value))
+
+    @staticmethod
+    def _tip_history(ticker, limit=5):
+        """The latest stored tips for a ticker and the feedback users gave on them, as prompt text"""
+        if not has_app_context():
+            return 'None', 'None'
+        tips = (StockTip.query.filter_by(ticker=ticker)
+                .order_by(StockTip.created_at.desc()).limit(limit).all())
+        tips_text = '; '.join(f"{t.created_at:%Y-%m-%d}: {t.tip_type} ({t.confidence})" for t in tips)
+        feedback_text = '; '.join(f"{t.created_at:%Y-%m-%d}: {t.feedback}" for t in tips if t.feedback)
+        return tips_text or 'None', feedback_text or 'None'
 
     @staticmethod
     def get_ai_analysis(ticker, api_key=None):
@@ -45,12 +163,7 @@ class AIService:
             dict: AI analysis
         """
         # Set API key
-        if api_key:
-            openai.api_key = api_key
-        else:
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-        
-        if not openai.api_key:
+        if not AIService.llm_client.configure(api_key):
             return {
                 'ticker': ticker,
                 'analysis': "AI analysis unavailable - API key not provided. Please set your OpenAI API key in the settings.",
@@ -60,16 +173,36 @@ class AIService:
           
         try:
             # Get stock data and analysis
-            stock_info = DataService.get_stock_info(ticker)
             ta_result = AnalysisService.get_technical_analysis(ticker)
             pred_result = AnalysisService.predict_next_day_price(ticker)
             
-            company_name = stock_info.get('longName', ticker)
-            sector = stock_info.get('sector', 'Unknown')
+            company_name = DataService.get_ticker_name(ticker)
+            sector = DataService.get_ticker_sector(ticker)
             current_price = ta_result.get('last_price', 'Unknown')
-            ma_signals = f"MA 20/50: {ta_result.get('ma_20_50_signal', 'Unknown')}, MA 50/200: {ta_result.get('ma_50_200_signal', 'Unknown')}"
-            rsi = f"RSI: {ta_result.get('rsi', 'Unknown')} - {ta_result.get('rsi_signal', 'Unknown')}"
-            macd = f"MACD Signal: {ta_result.get('macd_signal', 'Unknown')}"
+            # Tallene avrundes før de går inn i prompten og cache-nøkkelen, så små kursbevegelser gir samme svar
+            technical = {
+                'ma_20_50': ta_result.get('ma_20_50_signal', 'Unknown'),
+                'ma_50_200': ta_result.get('ma_50_200_signal', 'Unknown'),
+                'rsi': AIService._rounded(ta_result.get('rsi'), 0),
+                'rsi_signal': ta_result.get('rsi_signal', 'Unknown'),
+                'macd': AIService._rounded(ta_result.get('macd'), 2),
+                'macd_signal': ta_result.get('macd_signal', 'Unknown'),
+            }
+            prediction = None
+            if 'error' not in pred_result:
+                prediction = {
+                    'support': AIService._rounded(pred_result.get('support'), 2),
+                    'resistance': AIService._rounded(pred_result.get('resistance'), 2),
+                    'volatility': AIService._rounded(pred_result.get('volatility'), 3),
+                }
+            ma_signals = f"MA 20/50: {technical['ma_20_50']}, MA 50/200: {technical['ma_50_200']}"
+            rsi = f"RSI: {technical['rsi'] if technical['rsi'] is not None else 'Unknown'} - {technical['rsi_signal']}"
+            macd = f"MACD: {technical['macd'] if technical['macd'] is not None else 'Unknown'} ({technical['macd_signal']})"
+            prediction_text = 'Unknown'
+            if prediction is not None:
+                prediction_text = (f"support {prediction['support']}, resistance {prediction['resistance']}, "
+                                   f"volatility {prediction['volatility']}")
+            tips_text, feedback_text = AIService._tip_history(ticker)
 
             # Få ML-tipset
             ml_tip = AIService.get_ml_tip(ticker)
@@ -86,8 +219,7 @@ class AIService:
 You are a professional stock analyst AI. Analyze the stock {ticker} ({company_name}) in the {sector} sector.
 Current Price: {current_price}
 Technical Analysis: {ma_signals}, {rsi}, {macd}
-Prediction: {prediction}
-Recent News: {news_text}
+Prediction: {prediction_text}
 Previous AI tips: {tips_text}
 User feedback on previous tips: {feedback_text}
 Machine Learning model tip: {ml_tip}
@@ -95,16 +227,33 @@ Last signals: {signals_text}
 Give a detailed, actionable buy/sell/hold recommendation with reasoning, investment strategy (short/long term), and risk assessment. Structure your answer in three sections: Market Analysis, Investment Strategy, Risk Assessment. Explain if you agree or disagree with the ML model tip and why.
 """
 
-            response = openai.ChatCompletion.create(
-                model="gpt-4",  # eller "gpt-3.5-turbo"
-                messages=[
-                    {"role": "system", "content": "You are a professional stock analyst AI."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7,
+            messages = [
+                {"role": "system", "content": "You are a professional stock analyst AI."},
+                {"role": "user", "content": prompt}
+            ]
+            # Samme tall og signaler som sist gir samme svar uten nytt kall
+            prompt_inputs = {
+                'ticker': ticker,
+                'company_name': company_name,
+                'sector': sector,
+                'current_price': current_price,
+                'technical': technical,
+                'prediction': prediction,
+                'tips': tips_text,
+                'feedback': feedback_text,
+                'ml_tip': ml_tip,
+                'signals': signals_text,
+            }
+            analysis_text = AIService._cached_llm_call(
+                'analysis', prompt_inputs,
+                lambda: AIService.llm_client.chat(
+                    model="gpt-4",  # eller "gpt-3.5-turbo"
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.7,
+                ),
+                model="gpt-4", max_tokens=1000, temperature=0.7,
             )
-            analysis_text = response.choices[0].message.content.strip()
 
             # Del opp i seksjoner
             sections = analysis_text.split('\n\n')
@@ -143,12 +292,7 @@ Give a detailed, actionable buy/sell/hold recommendation with reasoning, investm
             dict: Portfolio recommendation
         """
         # Set API key
-        if api_key:
-            openai.api_key = api_key
-        else:
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-        
-        if not openai.api_key:
+        if not AIService.llm_client.configure(api_key):
             return {
                 'recommendation': "AI portfolio recommendation unavailable - API key not provided.",
                 'allocation': {},
@@ -159,14 +303,13 @@ Give a detailed, actionable buy/sell/hold recommendation with reasoning, investm
             # Get data for all tickers
             stocks_data = []
             for ticker in tickers:
-                info = DataService.get_stock_info(ticker)
                 ta = AnalysisService.get_technical_analysis(ticker)
                 
                 if 'error' not in ta:
                     stocks_data.append({
                         'ticker': ticker,
-                        'name': info.get('longName', ticker),
-                        'sector': info.get('sector', 'Unknown'),
+                        'name': DataService.get_ticker_name(ticker),
+                        'sector': DataService.get_ticker_sector(ticker),
                         'price': ta.get('last_price', 'Unknown'),
                         'signal': ta.get('overall_signal', 'Unknown')
                     })
@@ -190,18 +333,18 @@ Give a detailed, actionable buy/sell/hold recommendation with reasoning, investm
             Format your response in a structured way with clear sections.
             """
             
-            # Get AI response
-            response = openai.Completion.create(
-                engine="text-davinci-003",
-                prompt=prompt,
-                max_tokens=1000,
-                n=1,
-                stop=None,
-                temperature=0.7,
+            # Get AI response (cached per set of holdings and their current data)
+            recommendation_text = AIService._cached_llm_call(
+                'portfolio_recommendation', sorted(stocks_data, key=lambda s: s['ticker']),
+                lambda: AIService.llm_client.complete(
+                    prompt,
+                    engine="text-davinci-003",
+                    max_tokens=1000,
+                    temperature=0.7,
+                ),
+                engine="text-davinci-003", max_tokens=1000, temperature=0.7,
             )
             
-            recommendation_text = response.choices[0].text.strip()
-            
             # Extract allocations from text (this is a simple approach, might need improvement)
             allocation = {}
             for stock in stocks_data:
@@ -243,26 +386,69 @@ Give a detailed, actionable buy/sell/hold recommendation with reasoning, investm
             }
     
     @staticmethod
-    def get_ml_tip(ticker):
-        ta = AnalysisService.get_technical_analysis(ticker)
-        if 'error' in ta:
-            return 'HOLD'
+    def get_ml_model():
+        """Load the ML tip model from Config.ML_MODEL_PATH once, thread-safely"""
+        if AIService.ml_model is None:
+            with AIService._ml_model_lock:
+                if AIService.ml_model is None:
+                    import joblib
+                    AIService.ml_model = joblib.load(Config.ML_MODEL_PATH)
+        return AIService.ml_model
+
+    @staticmethod
+    def _ml_features(ta):
         # Konverter signaler til tall
         def to_num(signal):
             if signal == 'BUY' or signal == 'OVERSOLD': return 1
             if signal == 'SELL' or signal == 'OVERBOUGHT': return -1
             return 0
-        features = [[
+        return [
             to_num(ta.get('ma_20_50_signal')),
             to_num(ta.get('ma_50_200_signal')),
             to_num(ta.get('rsi_signal')),
             to_num(ta.get('macd_signal'))
-        ]]
-        prediction = AIService.ml_model.predict(features)[0]
+        ]
+
+    @staticmethod
+    def get_ml_tip(ticker):
+        ta = AnalysisService.get_technical_analysis(ticker)
+        if 'error' in ta:
+            return 'HOLD'
+        features = [AIService._ml_features(ta)]
+        prediction = AIService.get_ml_model().predict(features)[0]
         return prediction
 
     @staticmethod
-    def get_ai_analysis(ticker):
+    def get_ml_tips(tickers):
+        """
+        ML tips for many tickers with one bulk history fetch and one predict call
+
+        Args:
+            tickers (list): List of stock ticker symbols
+
+        Returns:
+            dict: ticker -> tip; 'HOLD' where there is not enough data (as get_ml_tip)
+        """
+        tickers = list(dict.fromkeys(tickers))
+        frames, _ = DataService.get_history_batch(tickers, period='60d')
+        tips = {}
+        rows = []
+        predicted = []
+        for ticker in tickers:
+            ta = AnalysisService.technical_analysis_from_data(frames.get(ticker))
+            if 'error' in ta:
+                tips[ticker] = 'HOLD'
+            else:
+                rows.append(AIService._ml_features(ta))
+                predicted.append(ticker)
+        if rows:
+            predictions = AIService.get_ml_model().predict(np.array(rows))
+            tips.update(zip(predicted, predictions))
+        return {ticker: tips[ticker] for ticker in tickers}
+
+    @staticmethod
+    def get_registered_analysis(ticker):
+        """Signal, confidence, sentiment and comment from ANALYSIS_REGISTER"""
         ticker = ticker.upper()
         if ticker in AIService.ANALYSIS_REGISTER:
             return AIService.ANALYSIS_REGISTER[ticker]
@@ -1,15 +1,8 @@
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-import matplotlib.pyplot as plt
-import io
-import base64
 from app.services.data_service import DataService
+from app.services.concurrency import fan_out
+from app.services.memo import memoized
 
 class AnalysisService:
     @staticmethod
@@ -76,6 +69,85 @@ class AnalysisService:
         return df
     
     @staticmethod
+    def _ewm_step(weighted, old_wt, value, alpha):
+        # Samme oppdatering som pandas ewm(adjust=False), også når verdien er NaN
+        if weighted != weighted:
+            return (value, 1.0) if value == value else (weighted, old_wt)
+        old_wt *= 1 - alpha
+        if value != value:
+            return weighted, old_wt
+        return (old_wt * weighted + alpha * value) / (old_wt + alpha), 1.0
+
+    @staticmethod
+    def _rsi_at(gains, losses, end, period):
+        if end < period - 1:
+            return float('nan')
+        avg_gain = sum(gains[end - period + 1:end + 1]) / period
+        avg_loss = sum(losses[end - period + 1:end + 1]) / period
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else float('nan')
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    @staticmethod
+    def calculate_latest_indicators(close, rsi_period=14, fast_period=12, slow_period=26,
+                                    signal_period=9, tail=0):
+        """
+        Calculate RSI and MACD in one pass over the Close prices, without
+        copying the frame. Gives the same values as calculate_rsi and
+        calculate_macd.
+
+        Args:
+            close (Series): Close prices
+            rsi_period (int): Period for RSI calculation
+            fast_period (int): Fast period for MACD
+            slow_period (int): Slow period for MACD
+            signal_period (int): Signal period for MACD
+            tail (int): Number of trailing RSI/MACD values to return as well
+
+        Returns:
+            dict: Latest rsi, macd, macd_signal and macd_histogram (NaN where
+                  the pandas functions give NaN), plus rsi_tail and macd_tail
+                  lists when tail > 0
+        """
+        values = close.tolist() if hasattr(close, 'tolist') else list(close)
+        a_fast = 2.0 / (fast_period + 1)
+        a_slow = 2.0 / (slow_period + 1)
+        a_signal = 2.0 / (signal_period + 1)
+        nan = float('nan')
+        fast = slow = signal = nan
+        fast_wt = slow_wt = signal_wt = 1.0
+        gains = []
+        losses = []
+        macd_tail = []
+        prev = nan
+        macd = nan
+        for i, price in enumerate(values):
+            delta = price - prev if i > 0 else nan
+            gains.append(delta if delta > 0 else 0.0)
+            losses.append(-delta if delta < 0 else 0.0)
+            prev = price
+            fast, fast_wt = AnalysisService._ewm_step(fast, fast_wt, price, a_fast)
+            slow, slow_wt = AnalysisService._ewm_step(slow, slow_wt, price, a_slow)
+            macd = fast - slow
+            signal, signal_wt = AnalysisService._ewm_step(signal, signal_wt, macd, a_signal)
+            if tail and i >= len(values) - tail:
+                macd_tail.append(macd)
+
+        last = len(values) - 1
+        result = {
+            'rsi': AnalysisService._rsi_at(gains, losses, last, rsi_period),
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_histogram': macd - signal,
+        }
+        if tail:
+            result['rsi_tail'] = [AnalysisService._rsi_at(gains, losses, i, rsi_period)
+                                  for i in range(max(0, last - tail + 1), last + 1)]
+            result['macd_tail'] = macd_tail
+        return result
+
+    @staticmethod
+    @memoized
     def predict_next_day_price(ticker):
         """
         Predict stock price for the next day using linear regression
@@ -123,6 +195,7 @@ class AnalysisService:
         }
     
     @staticmethod
+    @memoized
     def get_technical_analysis(ticker):
         """
         Perform real technical analysis on a stock using historical data.
@@ -132,16 +205,26 @@ class AnalysisService:
 
         # Hent historiske data (60 dager for kortsiktig analyse)
         data = DataService.get_stock_data(ticker, period='60d')
+        return AnalysisService.technical_analysis_from_data(data)
+
+    @staticmethod
+    def technical_analysis_from_data(data):
+        """
+        Technical analysis on already fetched history (as get_technical_analysis)
+
+        Args:
+            data (DataFrame): Historical data with Close and Volume columns
+
+        Returns:
+            dict: Signal, RSI, MACD, support, resistance and volume
+        """
         if data is None or data.empty or len(data) < 30:
             return {"error": "Not enough data for analysis"}
 
-        # RSI
-        df_rsi = AnalysisService.calculate_rsi(data)
-        rsi = df_rsi['RSI'].iloc[-1] if 'RSI' in df_rsi.columns else None
-
-        # MACD
-        df_macd = AnalysisService.calculate_macd(data)
-        macd = df_macd['MACD'].iloc[-1] if 'MACD' in df_macd.columns else None
+        # RSI og MACD i én passering over sluttkursene
+        indicators = AnalysisService.calculate_latest_indicators(data['Close'])
+        rsi = indicators['rsi']
+        macd = indicators['macd']
 
         # Støtte og motstand
         support, resistance = AnalysisService.calculate_support_resistance(data['Close'], months=2)
@@ -150,16 +233,7 @@ class AnalysisService:
         last_volume, avg_volume = AnalysisService.calculate_volume_analysis(data['Volume'])
 
         # Signal-logikk
-        signal = "Hold"
-        if rsi is not None and macd is not None:
-            if rsi < 30 and macd > 0:
-                signal = "Buy" 
-            elif rsi > 70 and macd < 0:
-                signal = "Sell"
-            elif macd > 0:
-                signal = "Buy"
-            elif macd < 0:
-                signal = "Sell"
+        signal = AnalysisService.signal_from_indicators(rsi, macd)
 
         return {
             "signal": signal,
@@ -171,6 +245,30 @@ class AnalysisService:
             "avg_volume": int(avg_volume) if avg_volume is not None else None
         }
      
+    @staticmethod
+    def signal_from_indicators(rsi, macd):
+        """
+        Buy/Sell/Hold signal from the latest RSI and MACD values
+
+        Args:
+            rsi (float): Latest RSI
+            macd (float): Latest MACD
+
+        Returns:
+            str: "Buy", "Sell" or "Hold"
+        """
+        signal = "Hold"
+        if rsi is not None and macd is not None:
+            if rsi < 30 and macd > 0:
+                signal = "Buy" 
+            elif rsi > 70 and macd < 0:
+                signal = "Sell"
+            elif macd > 0:
+                signal = "Buy"
+            elif macd < 0:
+                signal = "Sell"
+        return signal
+
     @staticmethod
     def get_stock_recommendation(ticker):
         """
@@ -315,73 +413,132 @@ class AnalysisService:
         return last_volume, avg_volume
 
     @staticmethod
-    def analyze_tickers(tickers):
+    def _date_index(series):
+        """Series with a plain (timezone-free) date index, for aligning across exchanges"""
+        index = pd.DatetimeIndex(series.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        aligned = series.copy()
+        aligned.index = index.normalize()
+        return aligned[~aligned.index.duplicated(keep='last')]
+
+    @staticmethod
+    def _screen_ticker(ticker, stock_data, index_close, include_fundamentals):
+        """Compute one screener row from already downloaded data"""
+        prices = stock_data['Close']
+        volume = stock_data['Volume']
+
+        # Volatilitet og Sharpe
+        volatility = AnalysisService.calculate_volatility(prices)
+        sharpe_ratio = AnalysisService.calculate_sharpe_ratio(prices)
+
+        # Relativ styrke mot indeksen, på tickerens egne datoer
+        relative_strength_3m = None
+        if index_close is not None:
+            dated = AnalysisService._date_index(prices)
+            aligned_index = index_close.reindex(dated.index).ffill()
+            relative_strength_3m = AnalysisService.calculate_relative_strength(dated, aligned_index, months=3)
+
+        # Støtte/motstand
+        support, resistance = AnalysisService.calculate_support_resistance(prices)
+
+        # Volum
+        last_volume, avg_volume = AnalysisService.calculate_volume_analysis(volume)
+
+        # Nøkkeltallene fra tickerregisteret, ikke et .info-kall per ticker
+        meta = DataService.ticker_registry.get(ticker) if include_fundamentals else None
+        return {
+            'ticker': ticker,
+            'last_price': prices.iloc[-1],
+            'volatility': volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'relative_strength_3m': relative_strength_3m,
+            'support': support,
+            'resistance': resistance,
+            'volume': last_volume,
+            'avg_volume': avg_volume,
+            'pe_ratio': meta.pe_ratio if meta is not None else None,
+            'dividend_yield': meta.dividend_yield if meta is not None else None,
+            'market_cap': meta.market_cap if meta is not None else None,
+            'last_signals': [
+                {'date': '2024-06-01', 'signal': 'BUY'},
+                {'date': '2024-05-15', 'signal': 'SELL'},
+                # ... hent eller beregn signaler ...
+            ],
+        }
+
+    @staticmethod
+    def analyze_tickers(tickers, chunk_size=200, max_workers=8, include_fundamentals=True,
+                        index_ticker='^OSEAX'):
         """
         Analyze multiple tickers and return a DataFrame with the results
-        
+
+        The index is downloaded once. Tickers are processed in chunks: each
+        chunk is downloaded in bulk and the per-ticker work runs on a thread
+        pool, so memory stays bounded by the chunk size. Results are collected
+        per column and the DataFrame is built once at the end.
+
         Args:
             tickers (list): List of stock ticker symbols
-            
+            chunk_size (int): Number of tickers downloaded and held at a time
+            max_workers (int): Parallel per-ticker workers
+            include_fundamentals (bool): Add P/E, dividend and market cap as stored in the ticker registry
+            index_ticker (str): Benchmark index for relative strength
+
         Returns:
             DataFrame: Analysis results
         """
-        # Initialize an empty DataFrame for results
-        results = pd.DataFrame()
-        
-        # Iterate over tickers
-        for ticker in tickers:
-            # Hent data
-            stock_data = DataService.get_stock_data(ticker, period='1y')
-            if stock_data.empty:
-                continue
-
-            prices = stock_data['Close']
-            volume = stock_data['Volume']
-
-            # Volatilitet og Sharpe
-            volatility = AnalysisService.calculate_volatility(prices)
-            sharpe_ratio = AnalysisService.calculate_sharpe_ratio(prices)
-
-            # Relativ styrke (krever index-data, f.eks. OSEBX)
-            index_data = DataService.get_stock_data('^OSEAX', period='1y')
-            if not index_data.empty:
-                relative_strength_3m = AnalysisService.calculate_relative_strength(prices, index_data['Close'], months=3)
-            else:
-                relative_strength_3m = None
-
-            # Støtte/motstand
-            support, resistance = AnalysisService.calculate_support_resistance(prices)
-
-            # Volum
-            last_volume, avg_volume = AnalysisService.calculate_volume_analysis(volume)
-
-            # Get stock info
-            stock_info = DataService.get_stock_info(ticker)
-            pe_ratio = stock_info.get('trailingPE')
-            dividend_yield = stock_info.get('dividendYield')
-            market_cap = stock_info.get('marketCap')
-            last_signals = [
-                {'date': '2024-06-01', 'signal': 'BUY'},
-                {'date': '2024-05-15', 'signal': 'SELL'},
-                # ... hent eller beregn signaler ...
-            ]
-            # Legg til i predictions-dict
-            results = results.append({
-                'ticker': ticker,
-                'last_price': prices.iloc[-1],
-                'volatility': volatility,
-                'sharpe_ratio': sharpe_ratio,
-                'relative_strength_3m': relative_strength_3m,
-                'support': support,
-                'resistance': resistance,
-                'volume': last_volume,
-                'avg_volume': avg_volume,
-                'pe_ratio': pe_ratio,
-                'dividend_yield': dividend_yield,
-                'market_cap': market_cap,
-                'last_signals': last_signals,
-            }, ignore_index=True)
-        
-        return results
+        # Indeksen hentes én gang for hele universet
+        index_data = DataService.get_stock_data(index_ticker, period='1y')
+        index_close = AnalysisService._date_index(index_data['Close']) if not index_data.empty else None
+
+        columns = {}
+        tickers = list(dict.fromkeys(tickers))
+        for start in range(0, len(tickers), chunk_size):
+            chunk = tickers[start:start + chunk_size]
+            frames, _ = DataService.get_history_batch(chunk, period='1y')
+            available = [t for t in chunk if t in frames and not frames[t].empty]
+
+            outcomes = fan_out(
+                lambda t: AnalysisService._screen_ticker(t, frames[t], index_close, include_fundamentals),
+                available,
+                max_workers=max_workers,
+            )
+            for ticker, (row, error) in zip(available, outcomes):
+                if error is not None:
+                    print(f"Error analyzing {ticker}: {error}")
+                    continue
+                for key, value in row.items():
+                    columns.setdefault(key, []).append(value)
+            # Slipp historikken for denne bolken før neste lastes ned
+            del frames
+
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def backtest(tickers=None, period='10y', rule='rsi_macd', long_short=False, cost_bps=5.0, **rule_params):
+        """
+        Backtest a signal rule on stored history for many tickers
+
+        Args:
+            tickers (list, optional): Tickers to test (default: Oslo and global stocks in the registry)
+            period (str): History to replay, e.g. '10y'
+            rule (str or callable): Rule name in backtest.SIGNAL_RULES (default: the
+                                    rules of signal_from_indicators) or a rule function
+            long_short (bool): Go short on Sell instead of flat
+            cost_bps (float): Trading cost in basis points per unit of turnover
 
+        Returns:
+            dict: per_ticker (DataFrame), portfolio (metrics) and equity (Series)
+        """
+        from app.services.backtest import BacktestEngine
+        from app.services.indicator_engine import IndicatorEngine
 
+        if tickers is None:
+            registry = DataService.get_ticker_registry()
+            tickers = registry.symbols('oslo') + registry.symbols('global')
+        frames, failures = DataService.get_history_batch(list(dict.fromkeys(tickers)), period=period)
+        for ticker, error in failures.items():
+            print(f"Error fetching data for {ticker}: {error}")
+        close = IndicatorEngine.close_panel(frames)
+        return BacktestEngine.run(close, rule=rule, long_short=long_short, cost_bps=cost_bps, **rule_params)
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from app.services.indicator_engine import IndicatorEngine
+
+# Signalverdier i regel-matrisene (NaN = ingen signal ennå, f.eks. under oppvarming)
+BUY, HOLD, SELL = 1.0, 0.0, -1.0
+
+TRADING_DAYS = 252
+
+# Navn -> regel; en regel tar indikatorpanelene (dict med dager x tickere-arrays) og
+# returnerer en signalmatrise med BUY/HOLD/SELL/NaN
+SIGNAL_RULES = {}
+
+
+def register_rule(name):
+    """Register a signal rule under a name so it can be picked with BacktestEngine.run(rule=name)"""
+    def decorator(func):
+        SIGNAL_RULES[name] = func
+        return func
+    return decorator
+
+
+@register_rule('rsi_macd')
+def rsi_macd_rule(ind, oversold=30, overbought=70):
+    """AnalysisService.signal_from_indicators on every day: RSI extremes, otherwise the MACD sign"""
+    rsi, macd = ind['RSI'], ind['MACD']
+    signal = np.select(
+        [(rsi < oversold) & (macd > 0), (rsi > overbought) & (macd < 0), macd > 0, macd < 0],
+        [BUY, SELL, BUY, SELL],
+        default=HOLD,
+    )
+    return np.where(np.isnan(rsi) | np.isnan(macd), np.nan, signal)
+
+
+@register_rule('macd_cross')
+def macd_cross_rule(ind):
+    """Buy while MACD is above its signal line, sell while it is below"""
+    hist = ind['MACD_histogram']
+    return np.where(np.isnan(hist), np.nan, np.sign(hist))
+
+
+@register_rule('rsi_reversion')
+def rsi_reversion_rule(ind, oversold=30, overbought=70):
+    """Buy when RSI is oversold, sell when it is overbought, otherwise keep the position"""
+    rsi = ind['RSI']
+    signal = np.select([rsi < oversold, rsi > overbought], [BUY, SELL], default=HOLD)
+    return np.where(np.isnan(rsi), np.nan, signal)
+
+
+@register_rule('ma_trend')
+def ma_trend_rule(ind, fast='MA_50', slow='MA_200'):
+    """Buy while the fast moving average is above the slow one"""
+    diff = ind[fast] - ind[slow]
+    return np.where(np.isnan(diff), np.nan, np.sign(diff))
+
+
+class BacktestEngine:
+    """
+    Vectorized backtests of signal rules over a whole universe.
+
+    Indicators are computed once for the close panel (dates x tickers) with
+    IndicatorEngine. A rule turns them into a BUY/HOLD/SELL matrix; HOLD
+    keeps the previous position. The position decided at one close earns
+    the next day's return, so there is no look-ahead. Returns, drawdowns,
+    hit rates and trade counts are computed for every ticker at once, and
+    for an equal-weighted portfolio of all tickers.
+    """
+
+    @staticmethod
+    def positions(signals, long_short=False):
+        """
+        Positions from a signal matrix
+
+        Args:
+            signals (ndarray): BUY/HOLD/SELL/NaN, dates x tickers
+            long_short (bool): SELL goes short (-1) instead of flat (0)
+
+        Returns:
+            ndarray: Position per day and ticker (0 before the first signal)
+        """
+        target = np.where(signals == SELL, -1.0 if long_short else 0.0, signals)
+        # HOLD (0) og manglende signal holder forrige posisjon
+        target = np.where((signals == HOLD) | np.isnan(signals), np.nan, target)
+        rows = np.arange(len(target))[:, None]
+        last = np.where(np.isnan(target), -1, rows)
+        np.maximum.accumulate(last, axis=0, out=last)
+        filled = np.take_along_axis(target, np.maximum(last, 0), axis=0)
+        return np.where(last < 0, 0.0, filled)
+
+    @staticmethod
+    def _max_drawdown(equity):
+        peak = np.fmax.accumulate(equity, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nanmin(equity / peak - 1, axis=0)
+
+    @staticmethod
+    def _metrics(returns, position, active):
+        """Per-column metrics for daily strategy returns (NaN-free) on the active days"""
+        days = active.sum(axis=0)
+        years = np.maximum(days, 1) / TRADING_DAYS
+        equity = np.cumprod(1 + returns, axis=0)
+        total = equity[-1] - 1 if len(equity) else np.zeros(returns.shape[1])
+        mean = returns.sum(axis=0) / np.maximum(days, 1)
+        var = ((returns - mean) ** 2 * active).sum(axis=0) / np.maximum(days - 1, 1)
+        vol = np.sqrt(var * TRADING_DAYS)
+        invested = (position != 0) & active
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cagr = np.where(total > -1, (1 + total) ** (1 / years) - 1, -1.0)
+            sharpe = np.where(vol > 0, mean * TRADING_DAYS / vol, np.nan)
+            hit_rate = ((returns > 0) & invested).sum(axis=0) / invested.sum(axis=0)
+        return {
+            'days': days,
+            'total_return': total,
+            'cagr': cagr,
+            'volatility': vol,
+            'sharpe': sharpe,
+            'max_drawdown': BacktestEngine._max_drawdown(np.where(active, equity, np.nan)),
+            'hit_rate': hit_rate,
+            'exposure': invested.sum(axis=0) / np.maximum(days, 1),
+        }
+
+    @staticmethod
+    def run(close, rule='rsi_macd', long_short=False, cost_bps=5.0, indicators=None, **rule_params):
+        """
+        Backtest a signal rule over every ticker in a close panel
+
+        Args:
+            close (DataFrame): Close prices, dates x tickers
+            rule (str or callable): Name in SIGNAL_RULES or a rule function
+            long_short (bool): Go short on SELL instead of flat
+            cost_bps (float): Trading cost in basis points per unit of turnover
+            indicators (dict, optional): Precomputed IndicatorEngine.compute(close),
+                                         to test several rules on the same panel
+            **rule_params: Passed to the rule (e.g. oversold=25)
+
+        Returns:
+            dict: 'per_ticker' (DataFrame, one row per ticker), 'portfolio'
+                  (metrics for the equal-weighted portfolio) and 'equity'
+                  (Series, the portfolio's equity curve)
+        """
+        if close.empty:
+            return {'per_ticker': pd.DataFrame(), 'portfolio': {}, 'equity': pd.Series(dtype=float)}
+        func = SIGNAL_RULES[rule] if isinstance(rule, str) else rule
+        if indicators is None:
+            indicators = IndicatorEngine.compute(close)
+        ind = {name: frame.to_numpy(dtype=float) for name, frame in indicators.items()}
+
+        prices = close.to_numpy(dtype=float)
+        # Siste kjente kurs brukes på dager uten handel, så de gir 0 i avkastning
+        filled = pd.DataFrame(prices).ffill().to_numpy()
+        asset_returns = np.zeros_like(filled)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            asset_returns[1:] = filled[1:] / filled[:-1] - 1
+        asset_returns = np.where(np.isfinite(asset_returns), asset_returns, 0.0)
+        active = ~np.isnan(filled)
+        active[0] = False
+
+        position = BacktestEngine.positions(func(ind, **rule_params), long_short=long_short)
+        position = np.where(np.isnan(filled), 0.0, position)
+        held = np.zeros_like(position)
+        held[1:] = position[:-1]
+        turnover = np.abs(np.diff(position, axis=0, prepend=0.0))
+        returns = held * asset_returns - turnover * cost_bps / 10000.0
+        returns = np.where(active, returns, 0.0)
+
+        metrics = BacktestEngine._metrics(returns, held, active)
+        buy_hold = np.cumprod(1 + np.where(active, asset_returns, 0.0), axis=0)[-1] - 1
+        per_ticker = pd.DataFrame(metrics, index=close.columns)
+        per_ticker['trades'] = ((turnover > 0) & (position != 0)).sum(axis=0)
+        per_ticker['buy_hold_return'] = buy_hold
+        per_ticker = per_ticker[per_ticker['days'] > 0]
+
+        # Likevektet portefølje av alle tickere som har kurs den dagen
+        counts = active.sum(axis=1)
+        portfolio_returns = np.where(counts > 0, returns.sum(axis=1) / np.maximum(counts, 1), 0.0)
+        portfolio_active = (counts > 0)[:, None]
+        portfolio = BacktestEngine._metrics(portfolio_returns[:, None], held.any(axis=1)[:, None] * 1.0,
+                                            portfolio_active)
+        portfolio = {name: float(values[0]) for name, values in portfolio.items()}
+        portfolio['tickers'] = int(len(per_ticker))
+        portfolio['rule'] = rule if isinstance(rule, str) else getattr(rule, '__name__', 'custom')
+        equity = pd.Series(np.cumprod(1 + portfolio_returns), index=close.index, name='equity')
+        return {'per_ticker': per_ticker, 'portfolio': portfolio, 'equity': equity}
@@ -0,0 +1,255 @@
+import threading
+import time
+from collections import deque
+
+from app.services import metrics
+from app.services.price_provider import NO_DATA, PriceProvider
+
+# Tilstander for en leverandørs kretsbryter
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class ProviderUnavailable(Exception):
+    """A call was skipped without contacting the provider"""
+
+
+class CircuitOpenError(ProviderUnavailable):
+    """The provider's circuit is open after broad failures"""
+
+
+class SymbolBackoffError(ProviderUnavailable):
+    """The symbol failed recently and is backing off"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider.
+
+    Outcomes of the last `window` seconds are kept. When at least
+    `min_calls` calls were made and the failure rate reaches
+    `failure_ratio`, the circuit opens and calls fail fast for `open_for`
+    seconds. Then one trial call is let through (half-open); success
+    closes the circuit, failure opens it again. A trial whose outcome is
+    never recorded is replaced by a new one after another `open_for`
+    seconds, so the circuit cannot stay half-open for good.
+    """
+
+    def __init__(self, name, failure_ratio=0.5, min_calls=10, window=60, open_for=30):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.open_for = open_for
+        self.state = CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes = deque()
+        self._trial = False
+        self._trial_at = None
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def allow(self):
+        """True if a call may go to the provider now"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now - self.opened_at >= self.open_for:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and (not self._trial or now - self._trial_at >= self.open_for):
+                self._trial = True
+                self._trial_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((now, ok))
+            self._trim(now)
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures >= self.failure_ratio * len(self._outcomes)):
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._trial = False
+
+    def stats(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'state': self.state,
+                'calls_in_window': calls,
+                'failures_in_window': failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+class SymbolFailures:
+    """
+    Negative cache of failing symbols.
+
+    After `threshold` consecutive failures a symbol is skipped until its
+    backoff has passed. The backoff starts at `base_backoff` seconds and
+    doubles with every further failure, up to `max_backoff`. A success
+    clears the backoff.
+    """
+
+    def __init__(self, base_backoff=300, max_backoff=6 * 3600, threshold=1):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.threshold = threshold
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def allow(self, symbol):
+        with self._lock:
+            record = self._records.get(symbol)
+            if record is None or record['retry_at'] is None or time.time() >= record['retry_at']:
+                return True
+            record['skipped'] += 1
+            return False
+
+    def record_failure(self, symbol, error):
+        now = time.time()
+        with self._lock:
+            record = self._records.setdefault(symbol, {
+                'failures': 0, 'consecutive': 0, 'skipped': 0, 'retry_at': None,
+                'first_failure': now, 'last_failure': None, 'last_error': None,
+            })
+            record['failures'] += 1
+            record['consecutive'] += 1
+            record['last_failure'] = now
+            record['last_error'] = str(error)[:300]
+            if record['consecutive'] >= self.threshold:
+                backoff = self.base_backoff * 2 ** (record['consecutive'] - self.threshold)
+                record['retry_at'] = now + min(backoff, self.max_backoff)
+
+    def record_success(self, symbol):
+        with self._lock:
+            record = self._records.get(symbol)
+            if record is not None:
+                record['consecutive'] = 0
+                record['retry_at'] = None
+
+    def reset(self, symbol=None):
+        """Forget one symbol's failures (or all of them)"""
+        with self._lock:
+            if symbol is None:
+                self._records.clear()
+            else:
+                self._records.pop(symbol, None)
+
+    def snapshot(self):
+        """Failing symbols, most failures first"""
+        now = time.time()
+        with self._lock:
+            rows = [dict(record, symbol=symbol,
+                         retry_in=max(0, record['retry_at'] - now) if record['retry_at'] else 0,
+                         backing_off=record['retry_at'] is not None and record['retry_at'] > now)
+                    for symbol, record in self._records.items() if record['consecutive']]
+        return sorted(rows, key=lambda r: (-r['consecutive'], r['symbol']))
+
+
+class GuardedPriceProvider(PriceProvider):
+    """
+    Wraps a PriceProvider with a circuit breaker and a symbol negative cache.
+
+    Symbols that are backing off, or every symbol while the circuit is
+    open, are answered at once with an error instead of a call to the
+    provider. Empty results are recorded only for the symbol: the
+    provider answered, so only raised errors count against its circuit.
+    """
+
+    def __init__(self, inner, breaker=None, symbols=None):
+        self.inner = inner
+        self.name = inner.name
+        self.breaker = breaker or CircuitBreaker(inner.name)
+        self.symbols = symbols or SymbolFailures()
+
+    def _check(self, ticker):
+        if not self.symbols.allow(ticker):
+            raise SymbolBackoffError(f"{ticker} is backing off after repeated failures")
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def _guarded(self, ticker, func, *args, **kwargs):
+        self._check(ticker)
+        try:
+            with metrics.external_call(self.name, func.__name__):
+                result = func(*args, **kwargs)
+        except Exception as e:
+            self.symbols.record_failure(ticker, e)
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        if result is None or getattr(result, 'empty', False) or (isinstance(result, dict) and not result):
+            self.symbols.record_failure(ticker, NO_DATA)
+        elif isinstance(result, dict) and result.get('regularMarketPrice') is None:
+            # Avnoterte tickere gir ofte en info-dict uten kurs i stedet for en feil
+            self.symbols.record_failure(ticker, 'No price in info')
+        else:
+            self.symbols.record_success(ticker)
+        return result
+
+    def history(self, ticker, period='1y', start=None):
+        return self._guarded(ticker, self.inner.history, ticker, period=period, start=start)
+
+    def info(self, ticker):
+        return self._guarded(ticker, self.inner.info, ticker)
+
+    def history_batch(self, tickers, period='1y', start=None):
+        failures = {}
+        allowed = []
+        for ticker in tickers:
+            if not self.symbols.allow(ticker):
+                failures[ticker] = 'backing off after repeated failures'
+            else:
+                allowed.append(ticker)
+        if not allowed:
+            return {}, failures
+        if not self.breaker.allow():
+            failures.update({ticker: f"{self.name} circuit is open" for ticker in allowed})
+            return {}, failures
+        try:
+            with metrics.external_call(self.name, 'history_batch'):
+                frames, errors = self.inner.history_batch(allowed, period=period, start=start)
+        except Exception as e:
+            # Hele bulk-kallet feilet: det sier noe om leverandøren, ikke om tickerne
+            self.breaker.record(False)
+            failures.update({ticker: str(e) for ticker in allowed})
+            return {}, failures
+        for ticker in allowed:
+            if ticker in errors:
+                self.symbols.record_failure(ticker, errors[ticker])
+            else:
+                self.symbols.record_success(ticker)
+        # Tickere uten data sier ingenting om leverandøren; bare andre feil teller mot kretsen
+        provider_errors = sum(1 for error in errors.values() if error != NO_DATA)
+        self.breaker.record(provider_errors < len(allowed))
+        failures.update(errors)
+        return frames, failures
+
+    def stats(self):
+        return {'provider': self.name, 'circuit': self.breaker.stats(), 'failing_symbols': self.symbols.snapshot()}
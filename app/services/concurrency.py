@@ -0,0 +1,117 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import Config
+
+# Ett delt basseng for alle fan_out-kall: kall som er gitt opp holder på en
+# tråd til de blir ferdige, men kan aldri bli flere enn bassenget
+_executor = None
+_executor_lock = threading.Lock()
+_in_worker = contextvars.ContextVar('fan_out_worker', default=False)
+
+
+def _shared_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, Config.FAN_OUT_MAX_THREADS),
+                                           thread_name_prefix='fan-out')
+        return _executor
+
+
+def _call(func, item):
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, e
+
+
+def fan_out(func, items, max_workers=8, item_timeout=None, batch_timeout=None):
+    """
+    Run func(item) for every item on the shared, bounded thread pool
+
+    Args:
+        func (callable): Function called with one item
+        items (list): Items to process
+        max_workers (int): Maximum number of concurrent calls from this batch
+        item_timeout (float): Seconds a single call may take, counted from when
+                              it was handed to the pool, before it is given up
+        batch_timeout (float): Seconds the whole batch may take
+
+    Returns:
+        list: (result, error) tuples in the same order as items. error is None
+              on success, otherwise the exception (TimeoutError when a call
+              was given up).
+
+    Each call runs in a copy of the caller's context, so the request's
+    timings and memo scope (see metrics and memo) follow it to the worker.
+    A call given up keeps its pool thread until it returns; the pool has
+    Config.FAN_OUT_MAX_THREADS threads, so hung provider calls cannot pile
+    up. fan_out called from inside a worker runs its items one by one in
+    that worker, since waiting on the shared pool from it could deadlock.
+    """
+    items = list(items)
+    outcomes = [(None, None)] * len(items)
+    if not items:
+        return outcomes
+    if _in_worker.get():
+        return [_call(func, item) for item in items]
+
+    def run(item):
+        _in_worker.set(True)
+        return func(item)
+
+    executor = _shared_executor()
+    limit = max(1, min(max_workers, len(items)))
+    deadline = time.monotonic() + batch_timeout if batch_timeout else None
+    futures = {}
+    submitted = {}
+    pending = set()
+    next_index = 0
+
+    while True:
+        # Fyll opp til max_workers; kall som er gitt opp teller ikke lenger med
+        while next_index < len(items) and len(pending) < limit:
+            submitted[next_index] = time.monotonic()
+            # Én kopi per kall: en kontekst kan ikke være aktiv i to tråder samtidig
+            future = executor.submit(contextvars.copy_context().run, run, items[next_index])
+            futures[future] = next_index
+            pending.add(future)
+            next_index += 1
+        if not pending:
+            break
+
+        now = time.monotonic()
+        # Vent til neste frist: hele batchen eller det første kallet som går ut
+        limits = []
+        if deadline is not None:
+            limits.append(deadline)
+        if item_timeout is not None:
+            limits.extend(submitted[futures[f]] + item_timeout for f in pending)
+        timeout = max(0, min(limits) - now) if limits else None
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = futures[future]
+            try:
+                outcomes[i] = (future.result(), None)
+            except Exception as e:
+                outcomes[i] = (None, e)
+
+        now = time.monotonic()
+        expired = set()
+        if deadline is not None and now >= deadline:
+            expired = set(pending)
+            # Det som ikke er sendt til bassenget ennå, gis opp med det samme
+            for i in range(next_index, len(items)):
+                outcomes[i] = (None, TimeoutError(f"Timed out: {items[i]}"))
+            next_index = len(items)
+        elif item_timeout is not None:
+            expired = {f for f in pending if now - submitted[futures[f]] >= item_timeout}
+        for future in expired:
+            future.cancel()
+            outcomes[futures[future]] = (None, TimeoutError(f"Timed out: {items[futures[future]]}"))
+        pending -= expired
+    return outcomes
@@ -1,70 +1,245 @@
 # filepath: [data_service.py](http://_vscodecontentref_/3)
-import yfinance as yf
+import threading
+import time
 import pandas as pd
-import requests
+from app.services.price_provider import YahooPriceProvider
+from app.services.circuit_breaker import CircuitBreaker, GuardedPriceProvider, SymbolFailures, ProviderUnavailable
+from app.services.quote_cache import QuoteCache
+from app.services.market_snapshot import MarketSnapshotRefresher
+from app.services.concurrency import fan_out
+from app.services.history_store import HistoryStore
+from app.services.indicator_state import IndicatorStateStore
+from app.services.memo import memoized
+from app.services.ticker_search import TickerSearchIndex
+from app.services.ticker_registry import TickerRegistry
+from app.services.quote_stream import QuotePublisher
+from app.services.fx_store import FXStore, ExchangeRateHostSource, instrument_currency
+from app.services import http_client
+from config import Config
 
+# Startuniverset for TickerRegistry (duplikater fjernes); metadata ligger i registerfilen
 # Oslo Børs ticker symbols
-OSLO_BORS_TICKERS = [
+OSLO_BORS_TICKERS = list(dict.fromkeys([
     "EQNR.OL", "DNB.OL", "NHY.OL", "YAR.OL", "TEL.OL", "ORK.OL", "MOWI.OL", "SALM.OL", "TGS.OL", "SUBC.OL",
     "AKSO.OL", "AKERBP.OL", "PGS.OL", "STB.OL", "KOG.OL", "ELK.OL", "NOD.OL", "SCATC.OL", "BWLPG.OL", "GOGL.OL",
     "ODF.OL", "FRO.OL", "HAFNI.OL", "MPC.OL", "SASNO.OL", "NAS.OL", "NRC.OL", "AFG.OL", "BONHR.OL", "DNO.OL",
     "GSF.OL", "LPG.OL", "QFR.OL", "SCHA.OL", "SNI.OL", "TOM.OL", "VOW.OL", "WWI.OL", "ZAL.OL", "XXL.OL",
     "NRC.OL", "NPRO.OL", "PLCS.OL", "RECSI.OL", "SBX.OL", "SVEG.OL", "TGS.OL", "VISTIN.OL", "WAWI.OL", "YAR.OL"
-]
+]))
 
 # Global tickers
-GLOBAL_TICKERS = [
+GLOBAL_TICKERS = list(dict.fromkeys([
     "AAPL", "MSFT", "AMZN", "GOOGL", "META", "TSLA", "NVDA", "BRK-B", "JPM", "V",
     "UNH", "HD", "PG", "MA", "LLY", "AVGO", "XOM", "MRK", "ABBV", "COST",
     "PEP", "KO", "CVX", "WMT", "BAC", "DIS", "ADBE", "CSCO", "PFE", "T",
     "NKE", "MCD", "ORCL", "CRM", "ABT", "CMCSA", "TMO", "ACN", "DHR", "TXN",
     "LIN", "NEE", "WFC", "BMY", "PM", "HON", "AMGN", "UNP", "UPS", "LOW", "QCOM"
-]
+]))
 
 # Crypto tickers (for søk)
-CRYPTO_TICKERS = [
+CRYPTO_TICKERS = list(dict.fromkeys([
     "BTC-USD", "ETH-USD", "BNB-USD", "SOL-USD", "XRP-USD", "ADA-USD", "DOGE-USD", "AVAX-USD", "DOT-USD", "LINK-USD",
     "MATIC-USD", "TRX-USD", "LTC-USD", "BCH-USD", "XLM-USD", "ATOM-USD", "ETC-USD", "FIL-USD", "ICP-USD", "APT-USD",
     "HBAR-USD", "VET-USD", "NEAR-USD", "OP-USD", "GRT-USD", "AAVE-USD", "SAND-USD", "MANA-USD", "XTZ-USD", "EGLD-USD"
-]
+]))
+
+def _breaker(name):
+    """Circuit breaker for one provider, configured from Config"""
+    return CircuitBreaker(
+        name,
+        failure_ratio=Config.PROVIDER_BREAKER_FAILURE_RATIO,
+        min_calls=Config.PROVIDER_BREAKER_MIN_CALLS,
+        window=Config.PROVIDER_BREAKER_WINDOW,
+        open_for=Config.PROVIDER_BREAKER_OPEN_FOR,
+    )
+
+
+def _guarded(provider):
+    """Wrap a price provider with a circuit breaker and a negative cache of failing tickers"""
+    if isinstance(provider, GuardedPriceProvider):
+        return provider
+    symbols = SymbolFailures(base_backoff=Config.SYMBOL_BACKOFF_BASE, max_backoff=Config.SYMBOL_BACKOFF_MAX)
+    return GuardedPriceProvider(provider, breaker=_breaker(provider.name), symbols=symbols)
+
 
 class DataService:
+    # Kilde for kurs og historikk. Kan byttes ut (f.eks. FakePriceProvider i tester).
+    # Tickere som feiler hoppes over en stund, og hele leverandøren kobles ut ved brede feil.
+    provider = _guarded(YahooPriceProvider())
+
+    # Lokal historikk; get_stock_data svarer fra denne og henter bare nye dager
+    history_store = HistoryStore(
+        Config.HISTORY_STORE_PATH,
+        provider,
+        refresh_interval=Config.HISTORY_REFRESH_INTERVAL,
+        backfill_period=Config.HISTORY_BACKFILL_PERIOD,
+    ) if Config.HISTORY_STORE_ENABLED else None
+
+    # REST-kildene går gjennom delte klienter med tilkoblingspool, retry og målinger
+    coingecko = http_client.register_provider(
+        'coingecko', Config.COINGECKO_API_URL, timeout=Config.COINGECKO_TIMEOUT,
+        retries=Config.HTTP_RETRIES, backoff=Config.HTTP_BACKOFF,
+        max_backoff=Config.HTTP_MAX_BACKOFF, pool_size=Config.HTTP_POOL_SIZE,
+        breaker=_breaker('coingecko'))
+    fx_api = http_client.register_provider(
+        'exchangerate.host', Config.FX_API_URL, timeout=Config.FX_API_TIMEOUT,
+        retries=Config.HTTP_RETRIES, backoff=Config.HTTP_BACKOFF,
+        max_backoff=Config.HTTP_MAX_BACKOFF, pool_size=Config.HTTP_POOL_SIZE,
+        breaker=_breaker('exchangerate.host'))
+
+    # Valutakurser lagres lokalt; bare manglende dager hentes, krysskurser regnes ut her
+    fx_store = FXStore(
+        Config.FX_STORE_PATH,
+        ExchangeRateHostSource(fx_api),
+        Config.FX_CURRENCIES,
+        refresh_interval=Config.FX_REFRESH_INTERVAL,
+        backfill_days=Config.FX_BACKFILL_DAYS,
+    )
+
+    # Delt cache for oversiktene, med egen TTL per aktivaklasse
+    quote_cache = QuoteCache(
+        ttls={
+            'oslo': Config.QUOTE_CACHE_TTL_OSLO,
+            'global': Config.QUOTE_CACHE_TTL_GLOBAL,
+            'crypto': Config.QUOTE_CACHE_TTL_CRYPTO,
+            'fx': Config.QUOTE_CACHE_TTL_FX,
+        },
+        max_stale=Config.QUOTE_CACHE_MAX_STALE,
+    )
+
+    # Sender kursendringer fra hvert nye snapshot til SSE-abonnentene
+    quote_publisher = QuotePublisher(queue_size=Config.QUOTE_STREAM_QUEUE_SIZE)
+
+    # RSI/MACD/snitt per ticker, oppdatert med kursen i hvert snapshot uten å regne historikken på nytt
+    indicator_states = IndicatorStateStore(
+        Config.INDICATOR_STATE_PATH,
+        history=lambda tickers, period: DataService.get_history_batch(tickers, period=period)[0],
+    )
+
+    # Bygger markedsoversikten i bakgrunnen; forespørsler leser bare siste snapshot
+    market_snapshots = MarketSnapshotRefresher(
+        builders={
+            'oslo_stocks': lambda: DataService._fetch_oslo_bors_overview(),
+            'global_stocks': lambda: DataService._fetch_global_stocks_overview(),
+            'crypto': lambda: DataService._fetch_crypto_overview(),
+            'currency': lambda: DataService._fetch_currency_overview(),
+        },
+        interval=Config.MARKET_SNAPSHOT_INTERVAL,
+        listeners=[
+            lambda snapshot: DataService.quote_publisher.publish_snapshot(snapshot),
+            lambda snapshot: DataService.rebuild_ticker_index(snapshot),
+            lambda snapshot: DataService.indicator_states.update_from_snapshot(snapshot),
+        ],
+    )
+
+    # Tickeruniverset med navn, børs, valuta og sektor fra disk; ingen nettverkskall ved oppslag
+    ticker_registry = TickerRegistry(
+        Config.TICKER_REGISTRY_PATH,
+        seed=[(t, 'oslo') for t in OSLO_BORS_TICKERS]
+             + [(t, 'global') for t in GLOBAL_TICKERS]
+             + [(t, 'crypto') for t in CRYPTO_TICKERS],
+    )
+
+    # Søkeindeks over tickere og navn; bygges på nytt utenfor forespørslene når registeret
+    # eller snapshotet endres. (indeks, registerversjon, snapshotversjon) publiseres samlet,
+    # så en leser aldri ser en ny indeks med gammel versjon
+    _ticker_index = None
+    _ticker_index_lock = threading.Lock()
+
+    # Tickere registeret ikke har navn på (også de brukerne legger til) hentes i bakgrunnen
+    _metadata_pending = set()
+    _metadata_attempted = {}
+    _metadata_lock = threading.Lock()
+    _metadata_thread = None
+
     @staticmethod
+    def set_price_provider(provider):
+        """Replace the price provider used for all history and info lookups"""
+        provider = _guarded(provider)
+        DataService.provider = provider
+        if DataService.history_store is not None:
+            DataService.history_store.provider = provider
+        DataService.quote_cache.invalidate()
+
+    @staticmethod
+    @memoized
     def get_stock_data(ticker, period='1y'):
         """Get historical stock data for a specific ticker"""
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
+            if DataService.history_store is not None:
+                try:
+                    return DataService.history_store.get(ticker, period=period)
+                except ValueError:
+                    pass  # Periode som lageret ikke støtter; hent direkte
+            hist = DataService.provider.history(ticker, period=period)
             return hist
         except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
+            if not isinstance(e, ProviderUnavailable):
+                print(f"Error fetching data for {ticker}: {e}")
             return pd.DataFrame()
 
     @staticmethod
+    @memoized
     def get_stock_info(ticker):
         """Get detailed information about a stock"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = DataService.provider.info(ticker)
             return info
         except Exception as e:
-            print(f"Error fetching info for {ticker}: {e}")
+            if not isinstance(e, ProviderUnavailable):
+                print(f"Error fetching info for {ticker}: {e}")
             return {}
 
     @staticmethod
-    def get_multiple_stocks_data(tickers):
-        """Get data for multiple stocks"""
+    def get_history_batch(tickers, period='1y'):
+        """
+        Get historical data for many tickers in as few bulk calls as possible
+
+        Returns:
+            tuple: (frames, failures) where frames maps ticker to DataFrame
+                   and failures maps ticker to an error message
+        """
+        try:
+            if DataService.history_store is not None:
+                try:
+                    return DataService.history_store.get_many(tickers, period=period)
+                except ValueError:
+                    pass
+            return DataService.provider.history_batch(tickers, period=period)
+        except Exception as e:
+            print(f"Error fetching batch data: {e}")
+            return {}, {ticker: str(e) for ticker in tickers}
+
+    @staticmethod
+    def get_latest_prices(tickers):
+        """Last close for each ticker, fetched in one bulk lookup (missing tickers are left out)"""
+        frames, failures = DataService.get_history_batch(tickers, period='1d')
+        for ticker, error in failures.items():
+            print(f"Error fetching price for {ticker}: {error}")
+        return {ticker: float(df['Close'].iloc[-1]) for ticker, df in frames.items()
+                if df is not None and not df.empty}
+
+    @staticmethod
+    def get_multiple_stocks_data(tickers, period='1y', batch=True):
+        """Get data for multiple stocks, using one bulk download unless batch=False"""
+        if batch:
+            frames, failures = DataService.get_history_batch(tickers, period=period)
+            for ticker, error in failures.items():
+                print(f"Error fetching data for {ticker}: {error}")
+        else:
+            frames = {ticker: DataService.get_stock_data(ticker, period=period) for ticker in tickers}
+
         result = {}
         for ticker in tickers:
-            data = DataService.get_stock_data(ticker)
-            if not data.empty and len(data) > 0:
+            data = frames.get(ticker)
+            if data is not None and not data.empty and len(data) > 0:
                 last_close = data['Close'].iloc[-1]
                 prev_close = data['Close'].iloc[-2] if len(data) > 1 else data['Open'].iloc[-1]
                 change = last_close - prev_close
                 change_percent = (change / prev_close) * 100 if prev_close > 0 else 0
                 signal = "BUY" if change_percent > 0 else "SELL"
                 result[ticker] = {
-                    'name': ticker,
+                    'name': DataService.get_ticker_name(ticker),
                     'last_price': last_close,
                     'change': change,
                     'change_percent': change_percent,
@@ -73,26 +248,65 @@ class DataService:
                 }
         return result
 
+    @staticmethod
+    def get_quote_cache_stats():
+        """Hit, miss and staleness counters for the overview cache"""
+        return DataService.quote_cache.stats()
+
+    @staticmethod
+    def get_http_stats():
+        """Request, retry, error and latency metrics per external provider"""
+        return http_client.stats()
+
+    @staticmethod
+    def get_provider_health():
+        """Circuit state per provider and the tickers that are failing or backing off"""
+        return {
+            'prices': DataService.provider.stats(),
+            'http': http_client.stats(),
+        }
+
+    @staticmethod
+    def reset_failing_symbol(ticker=None):
+        """Let a backed-off ticker (or all of them) be fetched again right away"""
+        DataService.provider.symbols.reset(ticker)
+
     @staticmethod
     def get_oslo_bors_overview():
+        """Hent oversikt over Oslo Børs-aksjer (cachet)."""
+        return DataService.quote_cache.get(
+            'oslo_overview', DataService._fetch_oslo_bors_overview, asset_class='oslo') or {}
+
+    @staticmethod
+    def _fetch_oslo_bors_overview():
         """Hent oversikt over Oslo Børs-aksjer med sanntidsdata fra Yahoo Finance."""
-        tickers = OSLO_BORS_TICKERS
+        # .info er tregt, så tickerne hentes parallelt med begrenset samtidighet
+        tickers = DataService.get_ticker_registry().symbols('oslo')
+        outcomes = fan_out(
+            DataService.provider.info,
+            tickers,
+            max_workers=Config.OSLO_INFO_MAX_WORKERS,
+            item_timeout=Config.OSLO_INFO_TIMEOUT,
+            batch_timeout=Config.OSLO_OVERVIEW_TIMEOUT,
+        )
         data = {}
-        for ticker in tickers:
+        for ticker, (info, error) in zip(tickers, outcomes):
             try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
+                if error is not None:
+                    raise error
                 data[ticker] = {
-                    "name": info.get("longName", ticker),
+                    "name": info.get("longName") or DataService.ticker_registry.name(ticker),
                     "last_price": info.get("regularMarketPrice"),
                     "change": info.get("regularMarketChange"),
                     "change_percent": info.get("regularMarketChangePercent"),
                     "signal": "BUY" if info.get("regularMarketChangePercent", 0) > 0 else "SELL"
                 }
             except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
+                # Tickere i backoff (eller åpen krets) er allerede logget; de hoppes bare over
+                if not isinstance(e, ProviderUnavailable):
+                    print(f"Error fetching {ticker}: {e}")
                 data[ticker] = {
-                    "name": ticker,
+                    "name": DataService.get_ticker_name(ticker),
                     "last_price": None,
                     "change": None,
                     "change_percent": None,
@@ -102,13 +316,26 @@ class DataService:
 
     @staticmethod
     def get_global_stocks_overview():
-        """Get an overview of global stocks"""
-        return DataService.get_multiple_stocks_data(GLOBAL_TICKERS)
+        """Get an overview of global stocks (cached)"""
+        return DataService.quote_cache.get(
+            'global_overview', DataService._fetch_global_stocks_overview, asset_class='global') or {}
+
+    @staticmethod
+    def _fetch_global_stocks_overview():
+        rows = DataService.get_multiple_stocks_data(DataService.get_ticker_registry().symbols('global'))
+        # Historikken (DataFrame) hører ikke hjemme i oversikten, cachen eller snapshotet
+        return {ticker: {key: value for key, value in row.items() if key != 'data'}
+                for ticker, row in rows.items()}
 
     @staticmethod
     def get_crypto_overview():
+        """Hent kryptodata (cachet)"""
+        return DataService.quote_cache.get(
+            'crypto_overview', DataService._fetch_crypto_overview, asset_class='crypto') or {}
+
+    @staticmethod
+    def _fetch_crypto_overview():
         """Hent kryptodata fra CoinGecko API"""
-        url = "https://api.coingecko.com/api/v3/simple/price"
         coins = ["bitcoin", "ethereum", "solana", "cardano", "polkadot", "chainlink", "uniswap", "binancecoin"]
         ids = ",".join(coins)
         params = {
@@ -117,8 +344,7 @@ class DataService:
             "include_24hr_change": "true"
         }
         try:
-            r = requests.get(url, params=params, timeout=10)
-            data = r.json()
+            data = DataService.coingecko.get_json('simple/price', params=params)
             mapping = {
                 "bitcoin": ("BTC", "Bitcoin"),
                 "ethereum": ("ETH", "Ethereum"),
@@ -145,9 +371,137 @@ class DataService:
 
     @staticmethod
     def search_ticker(query):
-        """Search for ticker symbols"""
-        all_tickers = OSLO_BORS_TICKERS + GLOBAL_TICKERS + CRYPTO_TICKERS
-        return [ticker for ticker in all_tickers if query.upper() in ticker.upper()]
+        """Search for ticker symbols (ranked, without duplicates; every match, as before)"""
+        index = DataService.get_ticker_index()
+        return [match['symbol'] for match in index.search(query, limit=max(len(index), 1))]
+
+    @staticmethod
+    def search_instruments(query, limit=10):
+        """Ranked symbol and company name matches for autocomplete"""
+        return DataService.get_ticker_index().search(query, limit=limit)
+
+    @staticmethod
+    def get_ticker_index():
+        """
+        The search index over the ticker registry, with names from the latest snapshot as fallback
+
+        Only the first call builds it. New snapshots rebuild it in the
+        snapshot listener; a changed registry rebuilds it on a background
+        thread while this keeps returning the previous index.
+        """
+        current = DataService._ticker_index
+        if current is None:
+            return DataService.rebuild_ticker_index()
+        index, registry_version, _ = current
+        if registry_version != DataService.get_ticker_registry().version:
+            DataService._rebuild_ticker_index_async()
+        return index
+
+    @staticmethod
+    def rebuild_ticker_index(snapshot=None):
+        """Build the search index from the registry and a snapshot (default: the latest)"""
+        with DataService._ticker_index_lock:
+            registry = DataService.ticker_registry
+            snapshot = snapshot or DataService.market_snapshots.latest()
+            registry_version = registry.version
+            index = TickerSearchIndex.build(DataService._search_universe(registry, snapshot))
+            DataService._ticker_index = (index, registry_version, snapshot.version)
+            return index
+
+    @staticmethod
+    def _rebuild_ticker_index_async():
+        if DataService._ticker_index_lock.locked():
+            return
+        threading.Thread(target=DataService.rebuild_ticker_index, name='ticker-index', daemon=True).start()
+
+    @staticmethod
+    def _search_universe(registry, snapshot):
+        sections = snapshot.sections
+        names = {}
+        for section in ('oslo_stocks', 'global_stocks', 'crypto'):
+            for ticker, row in sections.get(section, {}).items():
+                if hasattr(row, 'get') and row.get('name') and row['name'] != ticker:
+                    names[ticker] = row['name']
+        # Kryptooversikten bruker korte symboler (BTC), registeret Yahoo-symboler (BTC-USD)
+        return [(m.symbol, m.name or names.get(m.symbol) or names.get(m.symbol.split('-')[0]), m.asset_class)
+                for m in registry.instruments()]
+
+    @staticmethod
+    def get_ticker_registry():
+        """The ticker registry, reloaded if another process has rewritten its file"""
+        DataService.ticker_registry.maybe_reload()
+        return DataService.ticker_registry
+
+    @staticmethod
+    def get_ticker_name(ticker):
+        """Company name from the registry (the ticker itself until it is known); never calls the network"""
+        DataService.request_ticker_metadata([ticker])
+        return DataService.ticker_registry.name(ticker)
+
+    @staticmethod
+    def get_ticker_sector(ticker):
+        """Sector from the registry ('Unknown' until it is known); never calls the network"""
+        DataService.request_ticker_metadata([ticker])
+        return DataService.ticker_registry.sector(ticker)
+
+    @staticmethod
+    def request_ticker_metadata(tickers):
+        """
+        Queue tickers the registry has no name for, to be fetched on a background thread
+
+        Covers a fresh deploy without tickers.json as well as tickers users
+        add that are outside the built-in universe. A ticker is tried at
+        most once every TICKER_METADATA_RETRY seconds; older attempts are
+        forgotten, so the attempt log only holds the current window.
+        """
+        registry = DataService.ticker_registry
+        missing = [str(t).upper() for t in tickers if not (registry.get(t) and registry.get(t).name)]
+        if not missing:
+            return
+        now = time.time()
+        with DataService._metadata_lock:
+            attempted = DataService._metadata_attempted
+            # Innsettingsrekkefølge er tidsrekkefølge: de eldste forsøkene ligger først
+            while attempted:
+                oldest = next(iter(attempted))
+                if now - attempted[oldest] < Config.TICKER_METADATA_RETRY:
+                    break
+                del attempted[oldest]
+            for ticker in missing:
+                if ticker not in attempted:
+                    attempted[ticker] = now
+                    DataService._metadata_pending.add(ticker)
+            thread = DataService._metadata_thread
+            if DataService._metadata_pending and (thread is None or not thread.is_alive()):
+                DataService._metadata_thread = threading.Thread(
+                    target=DataService._fetch_pending_metadata, name='ticker-metadata', daemon=True)
+                DataService._metadata_thread.start()
+
+    @staticmethod
+    def _fetch_pending_metadata():
+        while True:
+            with DataService._metadata_lock:
+                symbols = sorted(DataService._metadata_pending)
+                DataService._metadata_pending.clear()
+                if not symbols:
+                    DataService._metadata_thread = None
+                    return
+            try:
+                DataService.refresh_ticker_registry(symbols)
+            except Exception as e:
+                print(f"Error fetching ticker metadata: {e}")
+
+    @staticmethod
+    def refresh_ticker_registry(symbols=None):
+        """
+        Fetch metadata for the universe in bulk and write the registry file
+
+        Returns:
+            tuple: (updated, failures) where failures maps ticker to an error message
+        """
+        return DataService.ticker_registry.refresh(
+            DataService.provider, symbols=symbols,
+            max_workers=Config.OSLO_INFO_MAX_WORKERS, item_timeout=Config.OSLO_INFO_TIMEOUT)
 
     @staticmethod
     def get_single_stock_data(ticker):
@@ -157,41 +511,52 @@ class DataService:
 
     @staticmethod
     def get_currency_overview():
-        """Get the latest currency exchange rates"""
-        url = "https://api.exchangerate.host/latest"
-        params = {"base": "USD", "symbols": "NOK,EUR,SEK,GBP"}
+        """Get the latest currency exchange rates (cached)"""
+        return DataService.quote_cache.get(
+            'currency_overview', DataService._fetch_currency_overview, asset_class='fx') or {}
+
+    @staticmethod
+    def _fetch_currency_overview():
+        """Get the latest currency exchange rates, with change against the prior stored day"""
+        DataService.sync_fx_rates()
         try:
-            r = requests.get(url, params=params, timeout=10)
-            data = r.json()
-            rates = data.get("rates", {})
-            # Sjekk at date finnes, ellers bruk dagens dato
-            date = data.get("date")
-            if not date:
-                from datetime import date as dt 
-                date = dt.today().isoformat()
-            y_url = "https://api.exchangerate.host/" + date
-            y_params = {"base": "USD", "symbols": "NOK,EUR,SEK,GBP"}
-            y_r = requests.get(y_url, params=y_params, timeout=10)
-            y_data = y_r.json()
-            y_rates = y_data.get("rates", {})
-            result = {}
-            for symbol, price in rates.items():
-                prev = y_rates.get(symbol)
-                change = ((price - prev) / prev * 100) if prev else None
-                signal = None
-                if change is not None:
-                    signal = "BUY" if change > 0 else "SELL"
-                result[f"USD/{symbol}"] = {
-                    "name": f"USD/{symbol}",
-                    "last_price": price,
-                    "change_percent": change,
-                    "signal": signal
-                }
-            return result
+            return DataService.fx_store.overview(Config.FX_OVERVIEW_PAIRS)
         except Exception as e:
             print("Error fetching currency:", e)
             return {}
 
+    @staticmethod
+    def sync_fx_rates(force=False):
+        """Fetch missing days into the FX store; stored rates are kept if the source fails"""
+        try:
+            return DataService.fx_store.sync(force=force)
+        except Exception as e:
+            print(f"Error syncing FX rates: {e}")
+            return 0
+
+    @staticmethod
+    def convert_currency(amount, from_currency, to_currency, on=None):
+        """
+        Convert an amount with locally stored FX rates (no network call)
+
+        Args:
+            amount (float): Amount in from_currency
+            from_currency (str): e.g. 'USD'
+            to_currency (str): e.g. 'NOK'
+            on (date, optional): Use the rates of this day (or the last stored day before it)
+
+        Returns:
+            float or None: Converted amount, None if a rate is missing
+        """
+        return DataService.fx_store.convert(amount, from_currency, to_currency, on)
+
+    @staticmethod
+    def get_fx_rates(tickers, currency):
+        """Factor per ticker from its trading currency to `currency` (None if no rate is stored)"""
+        currencies = {ticker: instrument_currency(ticker) for ticker in tickers}
+        factors = {c: DataService.convert_currency(1.0, c, currency) for c in set(currencies.values())}
+        return {ticker: factors[c] for ticker, c in currencies.items()}
+
     @staticmethod
     def get_market_sentiment(stocks):
         """Get the current market sentiment"""
@@ -216,12 +581,29 @@ class DataService:
             "AAPL": {"name": "Apple", "last_price": 190, "change_percent": 0.8, "signal": "Buy"},
         }
 
+    @staticmethod
+    def get_market_snapshot():
+        """Latest published market snapshot. Only the first call after startup waits for the providers."""
+        snapshots = DataService.market_snapshots
+        if not snapshots.running and snapshots.interval > 0:
+            snapshots.start()
+        # Sidene rett etter oppstart skal ikke vises tomme mens første runde pågår
+        return snapshots.ensure_published()
+
+    @staticmethod
+    def get_live_indicators(ticker=None):
+        """RSI, MACD, moving averages and signal at the latest snapshot price, for one ticker or all"""
+        return DataService.indicator_states.live(ticker)
+
     @staticmethod
     def get_market_overview():
         """Returnerer samlet markedsoversikt for Oslo Børs, globale aksjer, krypto og valuta."""
-        return {
-            "oslo_stocks": DataService.get_oslo_bors_overview(),
-            "global_stocks": DataService.get_global_stocks_overview(),
-            "crypto": DataService.get_crypto_overview(),
-            "currency": DataService.get_currency_overview()
-        }
\ No newline at end of file
+        if DataService.market_snapshots.interval <= 0:
+            # Bakgrunnsoppdatering er slått av; hent via cachen i stedet
+            return {
+                "oslo_stocks": DataService.get_oslo_bors_overview(),
+                "global_stocks": DataService.get_global_stocks_overview(),
+                "crypto": DataService.get_crypto_overview(),
+                "currency": DataService.get_currency_overview()
+            }
+        return DataService.get_market_snapshot().sections
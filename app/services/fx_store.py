@@ -0,0 +1,252 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+# Børssuffiks -> handelsvaluta; uten suffiks (og krypto mot USD) regnes som USD
+SUFFIX_CURRENCY = {
+    '.OL': 'NOK', '.ST': 'SEK', '.CO': 'DKK', '.HE': 'EUR', '.DE': 'EUR', '.PA': 'EUR',
+    '.AS': 'EUR', '.MI': 'EUR', '.L': 'GBP', '.SW': 'CHF', '.T': 'JPY',
+}
+
+# Valutaer et kryptopar kan noteres i ('BTC-USD'); andre bindestreker er aksjeklasser ('BRK-B')
+QUOTE_CURRENCIES = frozenset(['USD'] + list(SUFFIX_CURRENCY.values()))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    date TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (date, currency)
+) WITHOUT ROWID;
+"""
+
+
+def instrument_currency(symbol, asset_class=None):
+    """
+    Trading currency of a ticker, from its exchange suffix ('EQNR.OL' -> 'NOK')
+
+    A dash suffix is the quote currency of a pair ('BTC-EUR' -> 'EUR') only
+    for crypto or a known currency; 'BRK-B' is a share class and trades in USD.
+    """
+    symbol = str(symbol).upper()
+    for suffix, currency in SUFFIX_CURRENCY.items():
+        if symbol.endswith(suffix):
+            return currency
+    if '-' in symbol:
+        quote = symbol.rsplit('-', 1)[1]
+        if asset_class == 'crypto' or quote in QUOTE_CURRENCIES:
+            return quote
+    return 'USD'
+
+
+class FXRateSource:
+    """
+    Interface for daily exchange rate sources used by FXStore.
+
+    daily_rates returns {'YYYY-MM-DD': {currency: units per 1 USD}} for
+    every day in [start, end] the source has data for.
+    """
+    name = 'base'
+
+    def daily_rates(self, start, end, currencies):
+        raise NotImplementedError
+
+
+class ExchangeRateHostSource(FXRateSource):
+    """exchangerate.host; all missing days are fetched with one timeseries call"""
+    name = 'exchangerate.host'
+
+    def __init__(self, http):
+        # ProviderHTTPClient med base-URL, pool og retry-policy for leverandøren
+        self.http = http
+
+    def daily_rates(self, start, end, currencies):
+        params = {
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'base': 'USD',
+            'symbols': ','.join(currencies),
+        }
+        return self.http.get_json('timeseries', params=params).get('rates') or {}
+
+
+class FakeFXRateSource(FXRateSource):
+    """Deterministic offline rates (jittered per currency and day) for tests and benchmarks"""
+    name = 'fake'
+
+    START = {'NOK': 10.5, 'EUR': 0.92, 'SEK': 10.8, 'GBP': 0.79, 'DKK': 6.9, 'JPY': 150.0, 'CHF': 0.88}
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.calls = 0
+
+    def _rate(self, currency, day):
+        rng = random.Random(f"{self.seed}:{currency}:{day.toordinal()}")
+        return self.START.get(currency, 1.0) * (1 + rng.uniform(-0.01, 0.01))
+
+    def daily_rates(self, start, end, currencies):
+        self.calls += 1
+        out = {}
+        day = start
+        while day <= end:
+            out[day.isoformat()] = {c: self._rate(c, day) for c in currencies}
+            day += timedelta(days=1)
+        return out
+
+
+class FXStore:
+    """
+    Daily USD-based exchange rates kept in SQLite.
+
+    sync() only fetches the days after the last stored one (the last day is
+    fetched again, since its rate can still move), at most once every
+    `refresh_interval` seconds. Every cross rate is derived locally from the
+    stored USD vector: EUR/NOK = rate(NOK) / rate(EUR). Changes compare the
+    latest stored day with the stored day before it.
+    """
+
+    def __init__(self, path, source, currencies, refresh_interval=3600, backfill_days=30):
+        self.path = path
+        self.source = source
+        self.currencies = [c.upper() for c in currencies if c.upper() != 'USD']
+        self.refresh_interval = refresh_interval
+        self.backfill_days = backfill_days
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._initialized = False
+        self._synced_at = 0
+        self._vectors = {}
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            with self._init_lock:
+                if not self._initialized or self.path == ':memory:':
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def last_date(self):
+        row = self._conn().execute("SELECT MAX(date) FROM rates").fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def sync(self, today=None, force=False):
+        """
+        Fetch the days that are missing locally
+
+        Returns:
+            int: Number of days stored (0 if nothing was due)
+        """
+        with self._sync_lock:
+            if not force and time.time() - self._synced_at < self.refresh_interval:
+                return 0
+            today = today or date.today()
+            last = self.last_date()
+            start = last if last is not None else today - timedelta(days=self.backfill_days)
+            if start > today:
+                return 0
+            daily = self.source.daily_rates(start, today, self.currencies)
+            rows = [(day, currency, float(rate))
+                    for day, rates in daily.items()
+                    for currency, rate in (rates or {}).items()
+                    if currency in self.currencies and rate]
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO rates (date, currency, rate) VALUES (?, ?, ?)", rows)
+            self._vectors = {}
+            self._synced_at = time.time()
+            return len(daily)
+
+    def _dates(self, on=None, count=2):
+        query = "SELECT DISTINCT date FROM rates"
+        params = ()
+        if on is not None:
+            query += " WHERE date <= ?"
+            params = (on.isoformat(),)
+        rows = self._conn().execute(query + " ORDER BY date DESC LIMIT ?", params + (count,)).fetchall()
+        return [r[0] for r in rows]
+
+    def vector(self, day):
+        """currency -> units per 1 USD on a stored day (USD itself is 1.0)"""
+        vector = self._vectors.get(day)
+        if vector is None:
+            vector = {'USD': 1.0}
+            vector.update(self._conn().execute(
+                "SELECT currency, rate FROM rates WHERE date = ?", (day,)).fetchall())
+            self._vectors[day] = vector
+        return vector
+
+    def cross(self, base, quote, on=None):
+        """Units of `quote` per 1 `base` on the latest stored day <= on; None if unknown"""
+        days = self._dates(on, count=1)
+        if not days:
+            return None
+        return self._cross(self.vector(days[0]), base, quote)
+
+    @staticmethod
+    def _cross(vector, base, quote):
+        base_rate, quote_rate = vector.get(base.upper()), vector.get(quote.upper())
+        if not base_rate or not quote_rate:
+            return None
+        return quote_rate / base_rate
+
+    def convert(self, amount, from_currency, to_currency, on=None):
+        """Convert an amount with the stored rates; None if a rate is missing"""
+        if from_currency.upper() == to_currency.upper():
+            return amount
+        rate = self.cross(from_currency, to_currency, on)
+        return amount * rate if rate is not None else None
+
+    def overview(self, pairs):
+        """
+        Latest rate and change against the prior stored day for each pair
+
+        Args:
+            pairs (list): 'BASE/QUOTE' strings, e.g. ['USD/NOK', 'EUR/NOK']
+
+        Returns:
+            dict: pair -> row in the shape of the other market overviews
+        """
+        days = self._dates(count=2)
+        if not days:
+            return {}
+        latest = self.vector(days[0])
+        prior = self.vector(days[1]) if len(days) > 1 else {}
+        result = {}
+        for pair in pairs:
+            base, quote = pair.upper().split('/')
+            price = self._cross(latest, base, quote)
+            if price is None:
+                continue
+            prev = self._cross(prior, base, quote)
+            change = price - prev if prev else None
+            change_percent = change / prev * 100 if prev else None
+            signal = None
+            if change_percent is not None:
+                signal = "BUY" if change_percent > 0 else "SELL"
+            result[f"{base}/{quote}"] = {
+                "name": f"{base}/{quote}",
+                "last_price": price,
+                "change": change,
+                "change_percent": change_percent,
+                "signal": signal,
+                "date": days[0],
+                "prior_date": days[1] if len(days) > 1 else None,
+            }
+        return result
+
+    def stats(self):
+        conn = self._conn()
+        days, rows = conn.execute("SELECT COUNT(DISTINCT date), COUNT(*) FROM rates").fetchone()
+        last = self.last_date()
+        return {'path': self.path, 'days': days, 'rates': rows,
+                'last_date': last.isoformat() if last else None, 'source': self.source.name}
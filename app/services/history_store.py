@@ -0,0 +1,212 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app.services.price_provider import OHLCV_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    last_date TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def parse_period(period, today=None):
+    """
+    Translate a yfinance period string into a start date and row limit
+
+    Args:
+        period (str): '5d', '60d', '1wk', '3mo', '1y', 'ytd', 'max', ...
+        today (date): Reference date (defaults to today)
+
+    Returns:
+        tuple: (start_date, row_limit). Day periods count trading bars, so they
+               get a row limit and a generous calendar start; the others only
+               get a start date.
+    """
+    today = today or date.today()
+    if period == 'max':
+        return date(1900, 1, 1), None
+    if period == 'ytd':
+        return date(today.year, 1, 1), None
+    match = _PERIOD_RE.match(period or '')
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        # N handelsdager; helger og helligdager gir behov for ekstra kalenderdager
+        return today - timedelta(days=n * 7 // 5 + 10), n
+    if unit == 'wk':
+        return today - timedelta(weeks=n), None
+    if unit == 'mo':
+        return (pd.Timestamp(today) - pd.DateOffset(months=n)).date(), None
+    return (pd.Timestamp(today) - pd.DateOffset(years=n)).date(), None
+
+
+class HistoryStore:
+    """
+    Persistent daily OHLCV store in SQLite, keyed by ticker and date.
+
+    The first request for a ticker backfills at least `backfill_period` of
+    history. After that only the bars from the last stored date onwards are
+    fetched, at most once every `refresh_interval` seconds per ticker. Any
+    period is answered by slicing the stored bars.
+    """
+
+    def __init__(self, path, provider, refresh_interval=900, backfill_period='2y'):
+        self.path = path
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.backfill_period = backfill_period
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized or self.path == ':memory:':
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _coverage(self, tickers):
+        conn = self._conn()
+        rows = {}
+        for start in range(0, len(tickers), 500):
+            chunk = tickers[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for ticker, covered_from, last_date, checked_at in conn.execute(
+                    f"SELECT ticker, covered_from, last_date, checked_at FROM coverage "
+                    f"WHERE ticker IN ({placeholders})", chunk):
+                rows[ticker] = (date.fromisoformat(covered_from), last_date, checked_at)
+        return rows
+
+    def _plan(self, tickers, start):
+        """Group tickers by the start date they need to be fetched from"""
+        now = time.time()
+        backfill_start, _ = parse_period(self.backfill_period)
+        coverage = self._coverage(tickers)
+        plan = {}
+        for ticker in tickers:
+            cov = coverage.get(ticker)
+            if cov is None or cov[0] > start:
+                fetch_from = min(start, backfill_start)
+            elif now - cov[2] >= self.refresh_interval:
+                # Hent fra siste lagrede dag; den kan ha vært ufullstendig
+                fetch_from = date.fromisoformat(cov[1]) if cov[1] else cov[0]
+            else:
+                continue
+            plan.setdefault(fetch_from, []).append(ticker)
+        return plan, coverage
+
+    def _save(self, ticker, df, fetch_from, previous):
+        conn = self._conn()
+        rows = []
+        if df is not None and not df.empty:
+            df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+            dates = pd.DatetimeIndex(df.index).strftime('%Y-%m-%d')
+            values = df.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=float)
+            rows = [(ticker, d) + tuple(None if v != v else v for v in row)
+                    for d, row in zip(dates, values)]
+        covered_from = fetch_from if previous is None else min(fetch_from, previous[0])
+        last_date = rows[-1][1] if rows else (previous[1] if previous else None)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage (ticker, covered_from, last_date, checked_at) "
+                "VALUES (?, ?, ?, ?)", (ticker, covered_from.isoformat(), last_date, time.time()))
+
+    def _read(self, ticker, start, limit):
+        conn = self._conn()
+        if limit is not None:
+            # Siste N dager innenfor perioden; en ticker uten nye kurser gir ikke gamle dager som ferske
+            rows = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM bars WHERE ticker = ? AND date >= ? "
+                "ORDER BY date DESC LIMIT ?", (ticker, start.isoformat(), limit)).fetchall()
+            rows.reverse()
+        else:
+            rows = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM bars WHERE ticker = ? AND date >= ? "
+                "ORDER BY date", (ticker, start.isoformat())).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        index = pd.DatetimeIndex(pd.to_datetime([r[0] for r in rows], format='%Y-%m-%d'), name='Date')
+        return pd.DataFrame([r[1:] for r in rows], index=index, columns=OHLCV_COLUMNS)
+
+    def get(self, ticker, period='1y'):
+        """Return the stored history for one ticker, fetching new bars first if due"""
+        frames, _ = self.get_many([ticker], period=period)
+        return frames.get(ticker, pd.DataFrame())
+
+    def get_many(self, tickers, period='1y'):
+        """
+        Return stored history for many tickers, fetching due bars in bulk
+
+        Returns:
+            tuple: (frames, failures) where failures maps ticker to an error
+                   message for tickers that have no stored data at all
+        """
+        tickers = list(dict.fromkeys(tickers))
+        start, limit = parse_period(period)
+        plan, coverage = self._plan(tickers, start)
+
+        fetch_errors = {}
+        for fetch_from, group in plan.items():
+            try:
+                if len(group) == 1:
+                    fetched = {group[0]: self.provider.history(group[0], start=fetch_from)}
+                    errors = {}
+                else:
+                    fetched, errors = self.provider.history_batch(group, start=fetch_from)
+            except Exception as e:
+                fetched, errors = {}, {ticker: str(e) for ticker in group}
+            fetch_errors.update(errors)
+            for ticker in group:
+                if ticker in errors:
+                    continue
+                try:
+                    self._save(ticker, fetched.get(ticker), fetch_from, coverage.get(ticker))
+                except Exception as e:
+                    fetch_errors[ticker] = str(e)
+
+        frames = {}
+        failures = {}
+        for ticker in tickers:
+            df = self._read(ticker, start, limit)
+            if df.empty:
+                failures[ticker] = fetch_errors.get(ticker, 'No data returned')
+            else:
+                frames[ticker] = df
+        return frames, failures
+
+    def stats(self):
+        conn = self._conn()
+        tickers, bars = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM coverage), (SELECT COUNT(*) FROM bars)").fetchone()
+        return {'path': self.path, 'tickers': tickers, 'bars': bars}
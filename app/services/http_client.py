@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services import metrics
+
+# Statuskoder som er verdt et nytt forsøk
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class ProviderHTTPError(Exception):
+    """A provider request failed after all retries"""
+
+    def __init__(self, provider, message, status=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class ProviderHTTPClient:
+    """
+    HTTP client for one external REST provider.
+
+    Requests share one requests.Session, so connections to the provider
+    are kept alive and pooled (up to `pool_size`) instead of a new TCP/TLS
+    handshake per call. Connection errors, timeouts and RETRY_STATUSES are
+    retried up to `retries` times with full-jitter exponential backoff
+    (a Retry-After header is honoured, capped at `max_backoff`). Latency,
+    retries and errors are counted per provider.
+    """
+
+    def __init__(self, name, base_url, timeout=(3.05, 10), retries=2, backoff=0.3,
+                 max_backoff=5.0, pool_size=10, headers=None, sample_size=500, breaker=None):
+        self.name = name
+        # Valgfri CircuitBreaker; når den er åpen feiler kall med en gang
+        self.breaker = breaker
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'User-Agent': 'aksjeradar', 'Accept': 'application/json'})
+        if headers:
+            self.session.headers.update(headers)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=sample_size)
+        self._counts = {'requests': 0, 'attempts': 0, 'retries': 0, 'errors': 0, 'rejected': 0}
+        self._statuses = {}
+        self._last_error = None
+
+    def url(self, path):
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _record(self, latency=None, status=None, **counts):
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if status is not None:
+                self._statuses[status] = self._statuses.get(status, 0) + 1
+            for field, n in counts.items():
+                self._counts[field] += n
+
+    def get(self, path, params=None, timeout=None, **kwargs):
+        """
+        GET with pooling and retries
+
+        Args:
+            path (str): Path relative to base_url (or a full URL)
+            params (dict, optional): Query parameters
+            timeout (float or tuple, optional): Overrides the provider timeout
+
+        Returns:
+            requests.Response: The first successful response
+
+        Raises:
+            ProviderHTTPError: If every attempt failed
+        """
+        url = self.url(path)
+        self._record(requests=1)
+        if self.breaker is not None and not self.breaker.allow():
+            self._record(rejected=1)
+            raise ProviderHTTPError(self.name, 'circuit open')
+        ok = False
+        try:
+            with metrics.external_call(self.name, path if '://' not in path else 'url'):
+                response = self._get_with_retries(url, params, timeout, **kwargs)
+            ok = True
+        except ProviderHTTPError as e:
+            # 4xx sier noe om forespørselen, ikke om leverandøren: den svarte
+            ok = e.status is not None and e.status not in RETRY_STATUSES
+            raise
+        finally:
+            # Alltid et utfall, ellers blir et prøvekall i halvåpen tilstand hengende
+            if self.breaker is not None:
+                self.breaker.record(ok)
+        return response
+
+    def _get_with_retries(self, url, params, timeout, **kwargs):
+        for attempt in range(self.retries + 1):
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+                self._record(time.perf_counter() - start, response.status_code, attempts=1)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                error = ProviderHTTPError(self.name, f"HTTP {response.status_code} from {url}", response.status_code)
+            except requests.HTTPError as e:
+                # 4xx (utenom 429) blir ikke bedre av et nytt forsøk
+                self._fail(e)
+                raise ProviderHTTPError(self.name, str(e), response.status_code) from e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(time.perf_counter() - start, attempts=1)
+                error = ProviderHTTPError(self.name, f"{type(e).__name__}: {e}")
+            if attempt < self.retries:
+                self._record(retries=1)
+                time.sleep(self._delay(attempt, response))
+        self._fail(error)
+        raise error
+
+    def get_json(self, path, params=None, **kwargs):
+        """GET and decode the JSON body"""
+        return self.get(path, params=params, **kwargs).json()
+
+    def _fail(self, error):
+        with self._lock:
+            self._counts['errors'] += 1
+            self._last_error = str(error)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self._counts)
+            statuses = dict(self._statuses)
+            last_error = self._last_error
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else None
+
+        return {
+            'base_url': self.base_url,
+            **counts,
+            'statuses': statuses,
+            'latency_ms': {'p50': pct(0.5), 'p95': pct(0.95), 'max': latencies[-1] * 1000 if latencies else None},
+            'last_error': last_error,
+            'circuit': self.breaker.stats() if self.breaker is not None else None,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def register_provider(name, base_url, **options):
+    """Create (or replace) the shared client for a provider"""
+    client = ProviderHTTPClient(name, base_url, **options)
+    with _clients_lock:
+        old = _clients.get(name)
+        _clients[name] = client
+    if old is not None:
+        old.close()
+    return client
+
+
+def provider_client(name):
+    """The shared client registered for a provider"""
+    with _clients_lock:
+        return _clients[name]
+
+
+def stats():
+    """Metrics for every registered provider"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.stats() for client in clients}
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+
+class IndicatorEngine:
+    """
+    Vectorized indicators for a whole universe at once.
+
+    Input is a close-price panel (dates x tickers). Each ticker's prices are
+    first packed to the bottom of the panel so missing days (other exchange
+    calendars, later listings, delisted tickers) do not break the rolling
+    windows. The indicators are then computed for every column at once with
+    NumPy, using the same formulas as AnalysisService.calculate_rsi,
+    calculate_macd and calculate_moving_averages.
+    """
+
+    @staticmethod
+    def close_panel(frames):
+        """
+        Build a close-price panel from per-ticker OHLCV frames
+
+        Args:
+            frames (dict): ticker -> DataFrame with a 'Close' column
+
+        Returns:
+            DataFrame: Close prices, dates x tickers
+        """
+        closes = {ticker: df['Close'] for ticker, df in frames.items() if df is not None and not df.empty}
+        if not closes:
+            return pd.DataFrame()
+        return pd.DataFrame(closes).sort_index()
+
+    @staticmethod
+    def _pack(values):
+        # Stabil sortering på "har verdi" flytter NaN øverst og beholder rekkefølgen på resten
+        order = np.argsort(~np.isnan(values), axis=0, kind='stable')
+        return np.take_along_axis(values, order, axis=0), order
+
+    @staticmethod
+    def _unpack(packed, order, valid):
+        out = np.empty_like(packed)
+        np.put_along_axis(out, order, packed, axis=0)
+        out[~valid] = np.nan
+        return out
+
+    @staticmethod
+    def rolling_mean(values, window):
+        """Rolling mean down the rows of a 2D array; NaN until `window` valid values"""
+        filled = np.where(np.isnan(values), 0.0, values)
+        sums = np.cumsum(filled, axis=0)
+        counts = np.cumsum(~np.isnan(values), axis=0)
+        out = np.full(values.shape, np.nan)
+        if len(values) < window:
+            return out
+        window_sums = sums[window - 1:].copy()
+        window_sums[1:] -= sums[:-window]
+        window_counts = counts[window - 1:].copy()
+        window_counts[1:] -= counts[:-window]
+        out[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+        return out
+
+    @staticmethod
+    def ewm_mean(values, span):
+        """EMA like pandas ewm(span, adjust=False) for each column, starting at its first value"""
+        alpha = 2.0 / (span + 1.0)
+        out = np.empty(values.shape)
+        prev = np.full(values.shape[1:], np.nan)
+        for i, row in enumerate(values):
+            # Kolonner uten startverdi ennå tar første kurs direkte
+            prev = np.where(np.isnan(prev), row, prev + alpha * (row - prev))
+            out[i] = prev
+        return out
+
+    @staticmethod
+    def _indicators(close, rsi_period, fast_period, slow_period, signal_period, ma_periods):
+        """Compute all indicators on a packed close array (NaN only at the top of each column)"""
+        result = {'Close': close}
+
+        # Som i calculate_rsi blir første diff 0, men radene før tickerens første kurs forblir NaN
+        delta = np.full(close.shape, np.nan)
+        delta[1:] = close[1:] - close[:-1]
+        delta = np.where(np.isnan(delta), 0.0, delta)
+        delta[np.isnan(close)] = np.nan
+        gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = IndicatorEngine.rolling_mean(gain, rsi_period) / IndicatorEngine.rolling_mean(loss, rsi_period)
+            result['RSI'] = 100 - (100 / (1 + rs))
+
+        macd = IndicatorEngine.ewm_mean(close, fast_period) - IndicatorEngine.ewm_mean(close, slow_period)
+        macd_signal = IndicatorEngine.ewm_mean(macd, signal_period)
+        result['MACD'] = macd
+        result['MACD_signal'] = macd_signal
+        result['MACD_histogram'] = macd - macd_signal
+
+        for period in ma_periods:
+            result[f'MA_{period}'] = IndicatorEngine.rolling_mean(close, period)
+        return result
+
+    @staticmethod
+    def compute(close, latest_only=False, rsi_period=14, fast_period=12, slow_period=26,
+                signal_period=9, ma_periods=(20, 50, 200)):
+        """
+        Compute RSI, MACD and moving averages for every ticker in the panel
+
+        Args:
+            close (DataFrame): Close prices, dates x tickers
+            latest_only (bool): Only return the latest value per ticker
+            rsi_period (int): Period for RSI
+            fast_period (int): Fast EMA period for MACD
+            slow_period (int): Slow EMA period for MACD
+            signal_period (int): Signal period for MACD
+            ma_periods (tuple): Periods for moving averages
+
+        Returns:
+            DataFrame: With latest_only, one row per ticker and one column per
+                       indicator, taken at each ticker's last available date.
+            dict: Otherwise indicator name -> DataFrame (dates x tickers)
+        """
+        if close.empty:
+            return pd.DataFrame() if latest_only else {}
+
+        values = close.to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        packed, order = IndicatorEngine._pack(values)
+
+        indicators = IndicatorEngine._indicators(
+            packed, rsi_period, fast_period, slow_period, signal_period, ma_periods)
+
+        if latest_only:
+            # Siste rad i det pakkede panelet er siste tilgjengelige dag for hver ticker
+            latest = pd.DataFrame({name: arr[-1] for name, arr in indicators.items()}, index=close.columns)
+            last_row = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+            latest['last_date'] = close.index[last_row]
+            return latest[latest['Close'].notna()]
+
+        return {
+            name: pd.DataFrame(IndicatorEngine._unpack(arr, order, valid),
+                               index=close.index, columns=close.columns)
+            for name, arr in indicators.items()
+        }
@@ -0,0 +1,443 @@
+import json
+import os
+import threading
+from collections import deque
+from datetime import date
+
+
+class EMAState:
+    """Exponential moving average, same values as pandas ewm(span, adjust=False)"""
+    kind = 'ema'
+
+    def __init__(self, span, value=None, count=0):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+        self.count = count
+
+    def peek(self, x):
+        """EMA if x were the next value, without changing the state"""
+        if x is None or x != x:
+            return self.value
+        if self.value is None:
+            return x
+        return self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        if x is None or x != x:
+            return self.value
+        self.value = self.peek(x)
+        self.count += 1
+        return self.value
+
+    def to_dict(self):
+        return {'kind': self.kind, 'span': self.span, 'value': self.value, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['span'], value=data['value'], count=data['count'])
+
+
+class RollingMeanState:
+    """Simple moving average over the last `window` values, O(1) per update"""
+    kind = 'rolling_mean'
+
+    def __init__(self, window, values=None, total=None):
+        self.window = window
+        self.values = deque(values or [], maxlen=window)
+        self.total = sum(self.values) if total is None else total
+        self._updates = 0
+
+    @property
+    def value(self):
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+    def peek(self, x):
+        if x is None or x != x:
+            return self.value
+        if len(self.values) < self.window - 1:
+            return None
+        dropped = self.values[0] if len(self.values) == self.window else 0.0
+        return (self.total - dropped + x) / self.window
+
+    def update(self, x):
+        if x is None or x != x:
+            return self.value
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        # Summen regnes på nytt en gang per vindu så avrundingsfeil ikke hoper seg opp
+        self._updates += 1
+        if self._updates >= self.window:
+            self.total = sum(self.values)
+            self._updates = 0
+        return self.value
+
+    def to_dict(self):
+        return {'kind': self.kind, 'window': self.window, 'values': list(self.values), 'total': self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['window'], values=data['values'], total=data['total'])
+
+
+class WilderRSIState:
+    """
+    RSI with Wilder's smoothing.
+
+    The first average gain/loss is the simple mean of the first `period`
+    changes; after that avg = (avg * (period - 1) + change) / period.
+    """
+    kind = 'wilder_rsi'
+
+    def __init__(self, period=14, prev_close=None, avg_gain=None, avg_loss=None, seed_gains=None,
+                 seed_losses=None):
+        self.period = period
+        self.prev_close = prev_close
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.seed_gains = list(seed_gains or [])
+        self.seed_losses = list(seed_losses or [])
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if avg_gain is None:
+            return None
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else float('nan')
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    @property
+    def value(self):
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    def _next(self, close):
+        if self.prev_close is None:
+            return None, None, [], []
+        change = close - self.prev_close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.avg_gain is None:
+            gains = self.seed_gains + [gain]
+            losses = self.seed_losses + [loss]
+            if len(gains) < self.period:
+                return None, None, gains, losses
+            return sum(gains) / self.period, sum(losses) / self.period, [], []
+        p = self.period
+        return ((self.avg_gain * (p - 1) + gain) / p,
+                (self.avg_loss * (p - 1) + loss) / p, [], [])
+
+    def peek(self, close):
+        if close is None or close != close:
+            return self.value
+        avg_gain, avg_loss, _, _ = self._next(close)
+        return self._rsi(avg_gain, avg_loss)
+
+    def update(self, close):
+        if close is None or close != close:
+            return self.value
+        if self.prev_close is not None:
+            self.avg_gain, self.avg_loss, self.seed_gains, self.seed_losses = self._next(close)
+        self.prev_close = close
+        return self.value
+
+    def to_dict(self):
+        return {
+            'kind': self.kind, 'period': self.period, 'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain, 'avg_loss': self.avg_loss,
+            'seed_gains': self.seed_gains, 'seed_losses': self.seed_losses,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['period'], prev_close=data['prev_close'], avg_gain=data['avg_gain'],
+                   avg_loss=data['avg_loss'], seed_gains=data['seed_gains'],
+                   seed_losses=data['seed_losses'])
+
+
+class MACDState:
+    """MACD line, signal line and histogram built from three EMA states"""
+    kind = 'macd'
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9, fast=None, slow=None, signal=None):
+        self.fast = fast or EMAState(fast_period)
+        self.slow = slow or EMAState(slow_period)
+        self.signal = signal or EMAState(signal_period)
+
+    @staticmethod
+    def _values(macd, signal):
+        if macd is None or signal is None:
+            return {'macd': macd, 'macd_signal': signal, 'macd_histogram': None}
+        return {'macd': macd, 'macd_signal': signal, 'macd_histogram': macd - signal}
+
+    @property
+    def value(self):
+        if self.fast.value is None:
+            return self._values(None, None)
+        return self._values(self.fast.value - self.slow.value, self.signal.value)
+
+    def peek(self, close):
+        if close is None or close != close:
+            return self.value
+        macd = self.fast.peek(close) - self.slow.peek(close)
+        return self._values(macd, self.signal.peek(macd))
+
+    def update(self, close):
+        if close is None or close != close:
+            return self.value
+        macd = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(macd)
+        return self.value
+
+    def to_dict(self):
+        return {'kind': self.kind, 'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(),
+                'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(fast=EMAState.from_dict(data['fast']), slow=EMAState.from_dict(data['slow']),
+                   signal=EMAState.from_dict(data['signal']))
+
+
+class IndicatorState:
+    """
+    Streaming indicators for one ticker.
+
+    Seed it once from history with from_history(). After that update()
+    commits a finished bar and peek() shows the indicators for an
+    intraday tick without committing it. Both are O(1).
+    """
+
+    def __init__(self, ticker, rsi=None, macd=None, moving_averages=None, volume_avg=None, last_date=None):
+        self.ticker = ticker
+        self.rsi = rsi or WilderRSIState(14)
+        self.macd = macd or MACDState(12, 26, 9)
+        self.moving_averages = moving_averages or {
+            period: RollingMeanState(period) for period in (20, 50, 200)
+        }
+        # Samme vindu som calculate_volume_analysis
+        self.volume_avg = volume_avg or RollingMeanState(21)
+        self.last_date = last_date
+
+    @classmethod
+    def from_history(cls, ticker, data):
+        """
+        Seed the state from an OHLCV DataFrame
+
+        Args:
+            ticker (str): Stock ticker symbol
+            data (DataFrame): Historical data with Close and Volume columns
+
+        Returns:
+            IndicatorState: State positioned after the last bar
+        """
+        state = cls(ticker)
+        state.catch_up(data)
+        return state
+
+    @classmethod
+    def for_ticker(cls, ticker, period='1y'):
+        """Seed the state from the history DataService already serves"""
+        from app.services.data_service import DataService
+        return cls.from_history(ticker, DataService.get_stock_data(ticker, period=period))
+
+    def catch_up(self, data, before=None):
+        """
+        Commit the bars of an OHLCV DataFrame that come after last_date
+
+        Args:
+            data (DataFrame): Historical data with Close and Volume columns
+            before (str, optional): ISO date; bars from this day on are left out
+                                    (e.g. today's unfinished bar)
+
+        Returns:
+            int: Number of bars committed
+        """
+        days = [str(d)[:10] for d in data.index]
+        volumes = data['Volume'].tolist() if 'Volume' in data.columns else [None] * len(data)
+        committed = 0
+        for day, close, volume in zip(days, data['Close'].tolist(), volumes):
+            if self.last_date is not None and day <= self.last_date:
+                continue
+            if before is not None and day >= before:
+                break
+            self.update(close, volume, date=day)
+            committed += 1
+        return committed
+
+    def update(self, close, volume=None, date=None):
+        """Commit one finished bar and return the new indicator values"""
+        self.rsi.update(close)
+        self.macd.update(close)
+        for state in self.moving_averages.values():
+            state.update(close)
+        self.volume_avg.update(volume)
+        if date is not None:
+            self.last_date = str(date)[:10]
+        return self.values(close)
+
+    def peek(self, close, volume=None):
+        """Indicator values if the current bar closed at `close`, without committing it"""
+        values = {'close': close, 'rsi': self.rsi.peek(close)}
+        values.update(self.macd.peek(close))
+        for period, state in self.moving_averages.items():
+            values[f'ma_{period}'] = state.peek(close)
+        values['avg_volume'] = self.volume_avg.peek(volume)
+        values['signal'] = self._signal(values['rsi'], values['macd'])
+        return values
+
+    def values(self, close=None):
+        values = {'close': close if close is not None else self.rsi.prev_close, 'rsi': self.rsi.value}
+        values.update(self.macd.value)
+        for period, state in self.moving_averages.items():
+            values[f'ma_{period}'] = state.value
+        values['avg_volume'] = self.volume_avg.value
+        values['signal'] = self._signal(values['rsi'], values['macd'])
+        return values
+
+    @staticmethod
+    def _signal(rsi, macd):
+        # Sen import: data_service bruker denne modulen, og analysis_service importerer data_service
+        from app.services.analysis_service import AnalysisService
+        return AnalysisService.signal_from_indicators(rsi, macd)
+
+    def to_dict(self):
+        return {
+            'ticker': self.ticker,
+            'last_date': self.last_date,
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict(),
+            'moving_averages': {str(p): s.to_dict() for p, s in self.moving_averages.items()},
+            'volume_avg': self.volume_avg.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['ticker'],
+            rsi=WilderRSIState.from_dict(data['rsi']),
+            macd=MACDState.from_dict(data['macd']),
+            moving_averages={int(p): RollingMeanState.from_dict(s) for p, s in data['moving_averages'].items()},
+            volume_avg=RollingMeanState.from_dict(data['volume_avg']),
+            last_date=data.get('last_date'),
+        )
+
+
+def save_states(path, states):
+    """Write ticker -> IndicatorState to a JSON file (atomically)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({ticker: state.to_dict() for ticker, state in states.items()}, f)
+    os.replace(tmp_path, path)
+
+
+def load_states(path):
+    """Read ticker -> IndicatorState from a JSON file written by save_states"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {ticker: IndicatorState.from_dict(data) for ticker, data in json.load(f).items()}
+
+
+class IndicatorStateStore:
+    """
+    Live indicators for the tickers in the market snapshots.
+
+    Each ticker's IndicatorState is seeded once from stored history and
+    holds the finished daily bars up to yesterday; the bars that finished
+    since are committed once a day. Every snapshot only peeks the latest
+    price into the state, so refreshing the whole universe costs O(1) per
+    ticker. States are saved to `path` after seeding or catching up and
+    loaded from it again after a restart.
+    """
+
+    def __init__(self, path, history, sections=('oslo_stocks', 'global_stocks'), seed_period='1y',
+                 catch_up_period='1mo', catch_up_days=20):
+        self.path = path
+        # Kalles med (tickers, period) og gir ticker -> OHLCV-DataFrame
+        self.history = history
+        self.sections = tuple(sections)
+        self.seed_period = seed_period
+        self.catch_up_period = catch_up_period
+        self.catch_up_days = catch_up_days
+        self._states = None
+        self._checked = {}
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._states is None:
+            try:
+                self._states = load_states(self.path) if self.path else {}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading indicator states: {e}")
+                self._states = {}
+        return self._states
+
+    def _bring_up_to_date(self, tickers, today):
+        """Seed missing states and commit the finished bars since each state's last date"""
+        states = self._load()
+        before = today.isoformat()
+        seed, due = [], []
+        for ticker in tickers:
+            if self._checked.get(ticker) == before:
+                continue
+            state = states.get(ticker)
+            if state is None or state.last_date is None or \
+                    (today - date.fromisoformat(state.last_date)).days > self.catch_up_days:
+                seed.append(ticker)
+            else:
+                due.append(ticker)
+
+        changed = False
+        for group, period, fresh in ((seed, self.seed_period, True), (due, self.catch_up_period, False)):
+            if not group:
+                continue
+            try:
+                frames = self.history(group, period)
+            except Exception as e:
+                print(f"Error fetching history for indicator states: {e}")
+                continue
+            for ticker in group:
+                # Én gang per dag, også for tickere uten historikk
+                self._checked[ticker] = before
+                data = frames.get(ticker)
+                if data is None or data.empty:
+                    continue
+                state = IndicatorState(ticker) if fresh else states[ticker]
+                if state.catch_up(data, before=before):
+                    states[ticker] = state
+                    changed = True
+        return changed
+
+    def update_from_snapshot(self, snapshot, today=None):
+        """
+        Peek the snapshot's prices into the states and return ticker -> live values
+
+        Args:
+            snapshot (MarketSnapshot): Published market snapshot
+            today (date, optional): Date of the unfinished bar (defaults to today)
+        """
+        prices = {}
+        for section in self.sections:
+            for ticker, row in snapshot.sections.get(section, {}).items():
+                if hasattr(row, 'get') and row.get('last_price') is not None:
+                    prices[ticker] = row['last_price']
+
+        with self._lock:
+            if self._bring_up_to_date(list(prices), today or date.today()) and self.path:
+                save_states(self.path, self._states)
+            live = {ticker: self._states[ticker].peek(price)
+                    for ticker, price in prices.items() if ticker in self._states}
+            self._live = live
+        return live
+
+    def live(self, ticker=None):
+        """Latest live values for one ticker (None if unknown), or for all of them"""
+        live = self._live
+        if ticker is None:
+            return dict(live)
+        return live.get(ticker)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import math
+import numbers
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def normalize(value):
+    """
+    Normalize prompt inputs so equal inputs always hash the same
+
+    Strings get collapsed whitespace, floats are rounded to 4 decimals
+    (NaN and inf become None) and tuples/sets become lists. Dict key order
+    does not matter because the key is built with sort_keys.
+    """
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(normalize(v) for v in value)
+    if isinstance(value, bool) or value is None or isinstance(value, int):
+        return value
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return round(value, 4) if math.isfinite(value) else None
+    return ' '.join(str(value).split())
+
+
+def cache_key(kind, inputs, params):
+    """sha256 of the kind, the normalized inputs and the model parameters"""
+    payload = json.dumps([kind, normalize(inputs), normalize(params)], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent cache for language model responses, in SQLite.
+
+    Entries are content-addressed: the key is a hash of what the answer
+    depends on, not of the raw prompt. They expire after `ttl` seconds and
+    at most `max_entries` are kept, dropping the least recently used first.
+    Only successful responses are stored.
+    """
+
+    def __init__(self, path, ttl=21600, max_entries=2000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized or self.path == ':memory:':
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def get(self, key):
+        """The cached response for key, or None if missing or expired"""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            self._count('misses')
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return json.loads(row[0])
+
+    def put(self, key, kind, response):
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, kind, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)", (key, kind, json.dumps(response), now, now))
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+                self._count('evictions', count - self.max_entries)
+
+    def get_or_call(self, kind, inputs, params, call):
+        """
+        Return the cached response for these inputs, or call() and cache it
+
+        Args:
+            kind (str): What is being asked, e.g. 'portfolio_recommendation'
+            inputs: Everything the prompt is built from
+            params (dict): Model, client and sampling parameters
+            call (callable): Makes the actual request; returns the response text
+
+        Returns:
+            str: The response text
+        """
+        key = cache_key(kind, inputs, params)
+        try:
+            cached = self.get(key)
+        except sqlite3.Error as e:
+            print(f"Error reading LLM cache: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+        response = call()
+        try:
+            self.put(key, kind, response)
+        except sqlite3.Error as e:
+            print(f"Error writing LLM cache: {e}")
+        return response
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        (entries,) = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()
+        with self._stats_lock:
+            return dict(self._stats, entries=entries, path=self.path, ttl=self.ttl,
+                        max_entries=self.max_entries)
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+
+class LLMClient:
+    """
+    Interface for the language model calls AIService makes.
+
+    configure() returns False when the client cannot be used (for example
+    no API key), so callers can fall back to their "unavailable" message.
+    chat() and complete() return the response text.
+    """
+    name = 'base'
+
+    def configure(self, api_key=None):
+        raise NotImplementedError
+
+    def chat(self, messages, model='gpt-4', max_tokens=1000, temperature=0.7):
+        raise NotImplementedError
+
+    def complete(self, prompt, engine='text-davinci-003', max_tokens=1000, temperature=0.7):
+        raise NotImplementedError
+
+
+class OpenAILLMClient(LLMClient):
+    """OpenAI client; the key comes from the argument or OPENAI_API_KEY"""
+    name = 'openai'
+
+    @staticmethod
+    def _openai():
+        # openai lastes først når en AI-funksjon faktisk brukes
+        import openai
+        return openai
+
+    def configure(self, api_key=None):
+        openai = self._openai()
+        openai.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        return bool(openai.api_key)
+
+    def chat(self, messages, model='gpt-4', max_tokens=1000, temperature=0.7):
+        response = self._openai().ChatCompletion.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return response.choices[0].message.content.strip()
+
+    def complete(self, prompt, engine='text-davinci-003', max_tokens=1000, temperature=0.7):
+        response = self._openai().Completion.create(
+            engine=engine,
+            prompt=prompt,
+            max_tokens=max_tokens,
+            n=1,
+            stop=None,
+            temperature=temperature,
+        )
+        return response.choices[0].text.strip()
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Deterministic offline client for load tests and benchmarks.
+
+    The answer depends only on the prompt, and `latency` seconds of sleep
+    stand in for the network round trip. The answer has the three
+    paragraphs AIService splits on, and lists an allocation for every
+    ticker found in a portfolio prompt.
+    """
+    name = 'fake'
+
+    _TICKER_LINE = re.compile(r'^\s*([A-Z0-9.\-^=]+) \(', re.MULTILINE)
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {'chat': 0, 'complete': 0}
+        self._lock = threading.Lock()
+
+    def configure(self, api_key=None):
+        return True
+
+    def _answer(self, prompt):
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]
+        tickers = self._TICKER_LINE.findall(prompt)
+        allocation = ''
+        if tickers:
+            share = round(100 / len(tickers), 2)
+            allocation = '\n'.join(f"{ticker}: {share}%" for ticker in tickers)
+        return (f"Market Analysis: offline answer {digest}.\n\n"
+                f"Investment Strategy:\n{allocation or 'Hold current positions.'}\n\n"
+                f"Risk Assessment: moderate.")
+
+    def _call(self, kind, prompt):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def chat(self, messages, model='gpt-4', max_tokens=1000, temperature=0.7):
+        return self._call('chat', '\n'.join(m['content'] for m in messages))
+
+    def complete(self, prompt, engine='text-davinci-003', max_tokens=1000, temperature=0.7):
+        return self._call('complete', prompt)
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+# Et publisert, uforanderlig øyeblikksbilde av markedsoversikten
+MarketSnapshot = namedtuple('MarketSnapshot', ['version', 'created_at', 'sections'])
+
+
+def freeze_section(section):
+    """Return a read-only copy of an overview dict (ticker -> row dict), without history frames"""
+    # En DataFrame i en rad kan verken sammenlignes med != eller gjøres om til JSON
+    return MappingProxyType({
+        key: MappingProxyType({k: v for k, v in row.items() if k != 'data'}) if isinstance(row, dict) else row
+        for key, row in section.items()
+    })
+
+
+class MarketSnapshotRefresher:
+    """
+    Builds the market overview sections in a background thread.
+
+    Every `interval` seconds each builder is called and the results are
+    published together as a new MarketSnapshot with an increasing version.
+    Readers get the latest published snapshot; only ensure_published()
+    before the first refresh waits for the external providers. A builder
+    that fails or returns nothing keeps the section from the previous
+    snapshot.
+    """
+
+    def __init__(self, builders, interval=60, listeners=()):
+        self.builders = dict(builders)
+        self.interval = interval
+        # Kalles med hvert nye snapshot (f.eks. for å sende endringer til SSE-klienter)
+        self.listeners = list(listeners)
+        self._snapshot = MarketSnapshot(
+            version=0,
+            created_at=None,
+            sections=MappingProxyType({name: MappingProxyType({}) for name in self.builders}),
+        )
+        self._lock = threading.Lock()
+        # Hindrer at bakgrunnstråden og første forespørsel bygger samtidig
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def latest(self):
+        """The most recently published snapshot (version 0 before the first refresh)"""
+        return self._snapshot
+
+    def ensure_published(self):
+        """The latest snapshot, building the first one synchronously if none is published yet"""
+        if self._snapshot.created_at is None:
+            with self._refresh_lock:
+                if self._snapshot.created_at is None:
+                    self._refresh()
+        return self._snapshot
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        """Start the refresher thread if it is not already running"""
+        with self._lock:
+            if interval is not None:
+                self.interval = interval
+            if self.running:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='market-snapshot', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def request_refresh(self):
+        """Wake the refresher so it rebuilds now instead of at the next tick"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Tråden må overleve én feilet runde, ellers fryser snapshotet for godt
+                print(f"Error refreshing market snapshot: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def refresh(self):
+        """
+        Build every section once and publish the result as a new snapshot
+
+        If nothing changed the previous snapshot stays current, so the
+        version (and any ETag built from it) only moves when data changes.
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        previous = self._snapshot
+        sections = dict(previous.sections)
+        changed = previous.created_at is None
+        for name, builder in self.builders.items():
+            try:
+                section = builder()
+            except Exception as e:
+                print(f"Error building snapshot section {name}: {e}")
+                continue
+            if section:
+                frozen = freeze_section(section)
+                if frozen != sections.get(name):
+                    sections[name] = frozen
+                    changed = True
+        if not changed:
+            return previous
+
+        snapshot = MarketSnapshot(
+            version=previous.version + 1,
+            created_at=time.time(),
+            sections=MappingProxyType(sections),
+        )
+        self._snapshot = snapshot
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error in snapshot listener: {e}")
+        return snapshot
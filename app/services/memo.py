@@ -0,0 +1,127 @@
+import contextvars
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('memo_scope', default=None)
+
+# Summert over alle enheter (forespørsler og jobber) siden oppstart
+_totals_lock = threading.Lock()
+_totals = {'scopes': 0, 'calls': 0, 'deduplicated': 0}
+
+
+class MemoScope:
+    """
+    Results of memoized calls for one unit of work (a request or a job).
+
+    Each distinct (function, arguments) pair is computed once in the scope;
+    repeated calls get the stored result. Results are shared, so callers
+    must treat them as read-only. fan_out workers share the scope of the
+    request that started them, so the bookkeeping is locked; two threads
+    asking for the same uncached call at once may both compute it.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.values = {}
+        self.calls = 0
+        self.deduplicated = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, name, key):
+        """(True, result) if the call is stored, else (False, None); counts the call"""
+        with self._lock:
+            self.calls += 1
+            if key in self.values:
+                self.deduplicated[name] = self.deduplicated.get(name, 0) + 1
+                return True, self.values[key]
+            return False, None
+
+    def store(self, key, result):
+        with self._lock:
+            self.values.setdefault(key, result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'calls': self.calls,
+                'deduplicated': sum(self.deduplicated.values()),
+                'by_function': dict(self.deduplicated),
+            }
+
+
+def current_scope():
+    """The active MemoScope, or None outside a unit of work"""
+    return _current.get()
+
+
+def begin(name=None):
+    """Open a scope and return the token to pass to end()"""
+    return _current.set(MemoScope(name))
+
+
+def end(token):
+    """Close the scope opened by begin() and add its counters to the totals"""
+    scope = _current.get()
+    _current.reset(token)
+    if scope is not None:
+        counts = scope.stats()
+        with _totals_lock:
+            _totals['scopes'] += 1
+            _totals['calls'] += counts['calls']
+            _totals['deduplicated'] += counts['deduplicated']
+    return scope
+
+
+@contextmanager
+def memo_scope(name=None):
+    """Memoize inside the with-block; an enclosing scope is reused if there is one"""
+    if _current.get() is not None:
+        yield _current.get()
+        return
+    token = begin(name)
+    try:
+        yield _current.get()
+    finally:
+        end(token)
+
+
+def memoized(func):
+    """
+    Memoize a function within the active MemoScope
+
+    Arguments are bound to the signature first, so get_stock_data('X') and
+    get_stock_data('X', period='1y') share one entry. Outside a scope, or
+    with unhashable arguments, the function is simply called.
+    """
+    signature = inspect.signature(func)
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        scope = _current.get()
+        if scope is None:
+            return func(*args, **kwargs)
+        try:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, tuple(bound.arguments.items()))
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+        found, result = scope.lookup(name, key)
+        if found:
+            return result
+        result = func(*args, **kwargs)
+        scope.store(key, result)
+        return result
+
+    return wrapper
+
+
+def stats():
+    """Totals over all closed scopes"""
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,363 @@
+import bisect
+import contextvars
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+# Innholdstypen Prometheus forventer for tekstformatet
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Øvre grenser (sekunder); databasekall ligger ofte under ett millisekund
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route-etikett for arbeid utenfor en forespørsel (bakgrunnstråder, CLI)
+BACKGROUND = 'background'
+
+_current = contextvars.ContextVar('request_timings', default=None)
+_lock = threading.Lock()
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    """A monotonically increasing count per label combination"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with _lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(v)}"
+                for labels, v in values]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label combination, with their sum"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # Antall per bøtte (siste er +Inf), sum
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labels):
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def render(self):
+        with _lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = ('le', _format_number(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def counter(name, documentation, labelnames=()):
+    """Create a Counter and register it for render()"""
+    metric = Counter(name, documentation, labelnames)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Create a Histogram and register it for render()"""
+    metric = Histogram(name, documentation, labelnames, buckets)
+    _registry.append(metric)
+    return metric
+
+
+REQUEST_SECONDS = histogram(
+    'aksjeradar_request_duration_seconds', 'Time spent handling HTTP requests',
+    ['route', 'method', 'status'])
+REQUEST_EXCEPTIONS = counter(
+    'aksjeradar_request_exceptions_total', 'Unhandled exceptions in request handlers',
+    ['route', 'exception'])
+EXTERNAL_SECONDS = histogram(
+    'aksjeradar_external_call_duration_seconds', 'Time spent in calls to external providers',
+    ['provider', 'operation', 'route'])
+EXTERNAL_ERRORS = counter(
+    'aksjeradar_external_call_errors_total', 'External provider calls that raised an error',
+    ['provider', 'operation', 'route'])
+DB_SECONDS = histogram(
+    'aksjeradar_db_query_duration_seconds', 'Time spent executing database statements',
+    ['statement', 'route'])
+DB_ERRORS = counter(
+    'aksjeradar_db_errors_total', 'Database statements that raised an error',
+    ['statement', 'route'])
+TEMPLATE_SECONDS = histogram(
+    'aksjeradar_template_render_duration_seconds', 'Time spent rendering templates',
+    ['template', 'route'])
+
+
+class RequestTimings:
+    """
+    Time spent per component in one request, for the Server-Timing header.
+
+    Spans are summed per name ('yahoo', 'db', 'template', ...). Calls made
+    in parallel on fan_out threads are all added, so the spans of a request
+    can add up to more than its total time.
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            span = self.spans.setdefault(name, [0.0, 0])
+            span[0] += seconds
+            span[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """Server-Timing value: one entry per span, the rest as 'app' and the whole request as 'total'"""
+        total = self.elapsed()
+        with self._lock:
+            spans = sorted(self.spans.items(), key=lambda item: -item[1][0])
+        entries = [f'{name};dur={seconds * 1000:.1f};desc="{count} calls"' for name, (seconds, count) in spans]
+        # Det som ikke er eksterne kall, database eller maler: Python/pandas i selve ruten
+        rest = max(total - sum(seconds for _, (seconds, _) in spans), 0.0)
+        entries.append(f"app;dur={rest * 1000:.1f}")
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ', '.join(entries)
+
+
+def current():
+    """The RequestTimings of the active request, or None outside a request"""
+    return _current.get()
+
+
+def current_route():
+    timings = _current.get()
+    return timings.route if timings is not None else BACKGROUND
+
+
+def begin(route):
+    """Start timing a request and return the token to pass to end()"""
+    return _current.set(RequestTimings(route))
+
+
+def end(token):
+    """Stop timing the request started by begin()"""
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+def _span(name, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def external_call(provider, operation):
+    """
+    Time a call to an external provider (also usable as a decorator)
+
+    The duration goes into EXTERNAL_SECONDS and the request's Server-Timing
+    span for the provider; an exception is counted in EXTERNAL_ERRORS and
+    re-raised.
+    """
+    start = time.perf_counter()
+    route = current_route()
+    try:
+        yield
+    except Exception:
+        EXTERNAL_ERRORS.inc(provider, operation, route)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        EXTERNAL_SECONDS.observe(seconds, provider, operation, route)
+        _span(provider, seconds)
+
+
+def observe_db(statement, seconds, failed=False):
+    """Record one database statement (statement is the SQL verb, e.g. SELECT)"""
+    route = current_route()
+    DB_SECONDS.observe(seconds, statement, route)
+    if failed:
+        DB_ERRORS.inc(statement, route)
+    _span('db', seconds)
+
+
+def observe_template(template, seconds):
+    TEMPLATE_SECONDS.observe(seconds, template, current_route())
+    _span('template', seconds)
+
+
+def observe_request(route, method, status, seconds):
+    REQUEST_SECONDS.observe(seconds, route, method, str(status))
+
+
+def observe_exception(route, exception):
+    REQUEST_EXCEPTIONS.inc(route, type(exception).__name__)
+
+
+def scrape_allowed(request, token, debug=False):
+    """
+    Whether a request may read /metrics
+
+    With a token configured the request must send it as a bearer token.
+    Without one /metrics is closed, except to requests from the machine
+    itself in debug mode: behind a reverse proxy every request comes from
+    127.0.0.1, so remote_addr alone proves nothing in production.
+    """
+    if token:
+        sent = request.headers.get('Authorization', '')
+        return hmac.compare_digest(sent.encode('utf-8'), f"Bearer {token}".encode('utf-8'))
+    return debug and request.remote_addr in ('127.0.0.1', '::1')
+
+
+def render():
+    """All registered metrics in the Prometheus text format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _sql_verb(statement):
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else 'UNKNOWN'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if started:
+        observe_db(_sql_verb(statement), time.perf_counter() - started.pop())
+
+
+def _handle_db_error(exception_context):
+    conn = exception_context.connection
+    started = conn.info.get('metrics_started') if conn is not None else None
+    seconds = time.perf_counter() - started.pop() if started else 0.0
+    observe_db(_sql_verb(exception_context.statement or ''), seconds, failed=True)
+
+
+_db_hooks_installed = False
+
+
+def _install_db_hooks():
+    """Time every statement on every SQLAlchemy engine (installed once per process)"""
+    global _db_hooks_installed
+    if _db_hooks_installed:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_db_error)
+    _db_hooks_installed = True
+
+
+def init_app(app):
+    """
+    Instrument a Flask app
+
+    Every request is timed per route (the URL rule, so /portfolio/<int:id>
+    is one series), along with its database statements and template
+    renders. With SERVER_TIMING_ENABLED the breakdown is added as a
+    Server-Timing header to responses for logged-in users; it names the
+    providers and their latencies, so anonymous visitors do not get it.
+    """
+    from flask import g, request, template_rendered, before_render_template, got_request_exception
+    from flask_login import current_user
+
+    _install_db_hooks()
+    server_timing = app.config.get('SERVER_TIMING_ENABLED', False)
+
+    def route_label():
+        return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+    @app.before_request
+    def start_request_timing():
+        g.metrics_token = begin(route_label())
+
+    @app.after_request
+    def finish_request_timing(response):
+        timings = current()
+        if timings is not None:
+            observe_request(timings.route, request.method, response.status_code, timings.elapsed())
+            if server_timing and current_user.is_authenticated:
+                response.headers['Server-Timing'] = timings.header()
+        return response
+
+    @app.teardown_request
+    def close_request_timing(exc=None):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            end(token)
+
+    def template_started(sender, template, context, **extra):
+        g.setdefault('metrics_templates', []).append(time.perf_counter())
+
+    def template_finished(sender, template, context, **extra):
+        started = g.get('metrics_templates')
+        if started:
+            observe_template(template.name or '<string>', time.perf_counter() - started.pop())
+
+    def request_failed(sender, exception, **extra):
+        observe_exception(current_route(), exception)
+
+    # Signalene holder bare svake referanser; appen holder de lokale funksjonene i live
+    app.extensions['metrics'] = (template_started, template_finished, request_failed)
+    before_render_template.connect(template_started, app)
+    template_rendered.connect(template_finished, app)
+    got_request_exception.connect(request_failed, app)
@@ -0,0 +1,133 @@
+import numpy as np
+from app import db
+from app.models.portfolio import Portfolio, PortfolioStock
+from app.services.data_service import DataService
+
+
+class PortfolioValuationService:
+    """
+    Values many portfolios at once.
+
+    All holdings are loaded in one joined query and the distinct tickers are
+    priced with one bulk lookup, so the number of database and market-data
+    round trips does not grow with the number of portfolios. Values and
+    gain/loss are computed as NumPy arrays over all holdings. With a target
+    currency, prices are converted with the locally stored FX rates.
+    """
+
+    @staticmethod
+    def load_holdings(user_id=None, portfolio_id=None):
+        """
+        Load portfolios and their holdings in one query
+
+        Args:
+            user_id (int, optional): Only portfolios owned by this user
+            portfolio_id (int, optional): Only this portfolio
+
+        Returns:
+            list: (Portfolio, PortfolioStock or None) tuples ordered by portfolio
+        """
+        query = db.session.query(Portfolio, PortfolioStock).outerjoin(
+            PortfolioStock, PortfolioStock.portfolio_id == Portfolio.id)
+        if user_id is not None:
+            query = query.filter(Portfolio.user_id == user_id)
+        if portfolio_id is not None:
+            query = query.filter(Portfolio.id == portfolio_id)
+        return query.order_by(Portfolio.id, PortfolioStock.id).all()
+
+    @staticmethod
+    def value_holdings(rows, currency=None):
+        """
+        Value holdings loaded by load_holdings
+
+        Args:
+            rows (list): (Portfolio, PortfolioStock or None) tuples
+            currency (str, optional): Convert prices (current and average)
+                from each ticker's trading currency to this currency
+
+        Returns:
+            list: One dict per portfolio (in query order) with the portfolio,
+                  its valued stocks and totals. Holdings without a current
+                  price are left out, as before.
+        """
+        portfolios = []
+        slot = {}
+        holdings = []
+        tickers_by_portfolio = []
+        for portfolio, stock in rows:
+            if portfolio.id not in slot:
+                slot[portfolio.id] = len(portfolios)
+                portfolios.append(portfolio)
+                tickers_by_portfolio.append([])
+            if stock is not None:
+                holdings.append((slot[portfolio.id], stock))
+                tickers_by_portfolio[slot[portfolio.id]].append(stock.ticker)
+
+        tickers = list(dict.fromkeys(stock.ticker for _, stock in holdings))
+        prices = DataService.get_latest_prices(tickers) if tickers else {}
+
+        owner = np.array([i for i, _ in holdings], dtype=int)
+        shares = np.array([stock.shares or 0 for _, stock in holdings], dtype=float)
+        average_price = np.array([stock.average_price or 0 for _, stock in holdings], dtype=float)
+        current_price = np.array([prices.get(stock.ticker, np.nan) for _, stock in holdings], dtype=float)
+        if currency and tickers:
+            # Omregning uten nettverkskall; mangler kursen, holdes beholdningen utenfor
+            fx = DataService.get_fx_rates(tickers, currency)
+            factor = np.array([fx.get(stock.ticker) or np.nan for _, stock in holdings], dtype=float)
+            current_price = current_price * factor
+            average_price = average_price * factor
+
+        priced = ~np.isnan(current_price)
+        value = current_price * shares
+        investment = average_price * shares
+        gain_loss = (current_price - average_price) * shares
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gain_loss_percent = np.where(average_price > 0, (current_price / average_price - 1) * 100, 0.0)
+
+        n = len(portfolios)
+        total_value = np.bincount(owner[priced], weights=value[priced], minlength=n) if n else np.zeros(0)
+        total_investment = np.bincount(owner[priced], weights=investment[priced], minlength=n) if n else np.zeros(0)
+
+        stocks_by_portfolio = [[] for _ in portfolios]
+        for i in np.flatnonzero(priced):
+            stock = holdings[i][1]
+            stocks_by_portfolio[owner[i]].append({
+                'id': stock.id,
+                'ticker': stock.ticker,
+                'shares': stock.shares,
+                'average_price': float(average_price[i]) if currency else stock.average_price,
+                'current_price': float(current_price[i]),
+                'value': float(value[i]),
+                'investment': float(investment[i]),
+                'gain_loss': float(gain_loss[i]),
+                'gain_loss_percent': float(gain_loss_percent[i]),
+            })
+
+        result = []
+        for i, portfolio in enumerate(portfolios):
+            total_gain_loss = total_value[i] - total_investment[i]
+            total_gain_loss_percent = ((total_value[i] / total_investment[i]) - 1) * 100 if total_investment[i] > 0 else 0
+            result.append({
+                'portfolio': portfolio,
+                'stocks': stocks_by_portfolio[i],
+                'tickers': tickers_by_portfolio[i],
+                'total_value': float(total_value[i]),
+                'total_investment': float(total_investment[i]),
+                'total_gain_loss': float(total_gain_loss),
+                'total_gain_loss_percent': float(total_gain_loss_percent),
+                'currency': currency,
+            })
+        return result
+
+    @staticmethod
+    def value_portfolios(user_id=None, currency=None):
+        """Value every portfolio (optionally only one user's)"""
+        return PortfolioValuationService.value_holdings(
+            PortfolioValuationService.load_holdings(user_id=user_id), currency=currency)
+
+    @staticmethod
+    def value_portfolio(portfolio_id, currency=None):
+        """Value a single portfolio; None if it does not exist"""
+        valued = PortfolioValuationService.value_holdings(
+            PortfolioValuationService.load_holdings(portfolio_id=portfolio_id), currency=currency)
+        return valued[0] if valued else None
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+# Kolonnene vi forventer i en historikk-frame (samme som yf.Ticker.history)
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Feilmelding i bulk-resultatet for en ticker leverandøren ikke hadde data for
+NO_DATA = 'No data returned'
+
+
+class PriceProvider:
+    """
+    Interface for market data providers used by DataService.
+
+    A provider must be able to fetch the history of a single ticker, the
+    history of many tickers in bulk and the info dict of a ticker. History
+    is requested either by period or from a start date (then period is
+    ignored). Bulk fetches return a tuple (frames, failures) where frames
+    maps ticker to an OHLCV DataFrame and failures maps ticker to an error
+    message.
+    """
+    name = 'base'
+
+    def history(self, ticker, period='1y', start=None):
+        raise NotImplementedError
+
+    def history_batch(self, tickers, period='1y', start=None):
+        # Standard: én og én ticker. Providere med bulk-API overstyrer denne.
+        frames = {}
+        failures = {}
+        for ticker in tickers:
+            try:
+                hist = self.history(ticker, period=period, start=start)
+            except Exception as e:
+                failures[ticker] = str(e)
+                continue
+            if hist is None or hist.empty:
+                failures[ticker] = NO_DATA
+            else:
+                frames[ticker] = hist
+        return frames, failures
+
+    def info(self, ticker):
+        raise NotImplementedError
+
+
+class YahooPriceProvider(PriceProvider):
+    """Yahoo Finance provider. Bulk history uses chunked yf.download calls."""
+    name = 'yahoo'
+
+    def __init__(self, chunk_size=100):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _yf():
+        # yfinance er tregt å importere; lastes først ved første oppslag
+        import yfinance as yf
+        return yf
+
+    def history(self, ticker, period='1y', start=None):
+        yf = self._yf()
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start)
+        return yf.Ticker(ticker).history(period=period)
+
+    def history_batch(self, tickers, period='1y', start=None):
+        yf = self._yf()
+        frames = {}
+        failures = {}
+        tickers = list(dict.fromkeys(tickers))
+        span = {'start': start} if start is not None else {'period': period}
+        for offset in range(0, len(tickers), self.chunk_size):
+            chunk = tickers[offset:offset + self.chunk_size]
+            try:
+                wide = yf.download(
+                    chunk,
+                    **span,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False,
+                    multi_level_index=True,
+                )
+            except Exception as e:
+                for ticker in chunk:
+                    failures[ticker] = str(e)
+                continue
+            chunk_frames, chunk_failures = split_wide_frame(wide, chunk)
+            frames.update(chunk_frames)
+            failures.update(chunk_failures)
+        return frames, failures
+
+    def info(self, ticker):
+        return self._yf().Ticker(ticker).info
+
+
+class FakePriceProvider(PriceProvider):
+    """
+    Deterministic offline provider for tests and benchmarks.
+
+    Prices follow a seeded random walk per ticker, so the same ticker always
+    gets the same history. Tickers listed in `failing` raise an error.
+    """
+    name = 'fake'
+
+    PERIOD_DAYS = {
+        '1d': 1, '2d': 2, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126,
+        '1y': 252, '2y': 504, '5y': 1260, '10y': 2520, 'ytd': 200, 'max': 5040,
+    }
+
+    def __init__(self, failing=None, seed=0, end=None):
+        self.failing = set(failing or [])
+        self.seed = seed
+        self.end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+        self.calls = {'history': 0, 'history_batch': 0, 'info': 0}
+        self._index = None
+        self._frames = {}
+
+    def _days(self, period):
+        if period in self.PERIOD_DAYS:
+            return self.PERIOD_DAYS[period]
+        if period.endswith('d') and period[:-1].isdigit():
+            return int(period[:-1])
+        raise ValueError(f"Unsupported period: {period}")
+
+    def _rng(self, ticker):
+        return np.random.default_rng([self.seed] + [ord(c) for c in ticker])
+
+    def _frame(self, ticker, days):
+        if ticker in self.failing:
+            raise ValueError(f"No data found for {ticker}")
+        if ticker not in self._frames:
+            self._frames[ticker] = self._generate(ticker)
+        return self._frames[ticker].iloc[-days:]
+
+    def _generate(self, ticker):
+        full = self.PERIOD_DAYS['max']
+        rng = self._rng(ticker)
+        start_price = rng.uniform(10, 500)
+        returns = rng.normal(0.0003, 0.02, full)
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = close * (1 + rng.normal(0, 0.005, full))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, full))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, full))
+        volume = rng.integers(100_000, 5_000_000, full).astype(float)
+        if self._index is None:
+            self._index = pd.bdate_range(end=self.end, periods=full, name='Date')
+        return pd.DataFrame(
+            {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+            index=self._index,
+        )
+
+    def _span(self, ticker, period, start):
+        if start is None:
+            return self._frame(ticker, self._days(period))
+        df = self._frame(ticker, self.PERIOD_DAYS['max'])
+        return df[df.index >= pd.Timestamp(start)]
+
+    def history(self, ticker, period='1y', start=None):
+        self.calls['history'] += 1
+        return self._span(ticker, period, start)
+
+    def history_batch(self, tickers, period='1y', start=None):
+        self.calls['history_batch'] += 1
+        frames = {}
+        failures = {}
+        for ticker in dict.fromkeys(tickers):
+            try:
+                frames[ticker] = self._span(ticker, period, start)
+            except Exception as e:
+                failures[ticker] = str(e)
+        return frames, failures
+
+    def info(self, ticker):
+        self.calls['info'] += 1
+        hist = self._frame(ticker, 2)
+        last, prev = hist['Close'].iloc[-1], hist['Close'].iloc[-2]
+        return {
+            'symbol': ticker,
+            'longName': f"{ticker} Fake Corp",
+            'sector': 'Technology',
+            'currency': 'NOK' if ticker.endswith('.OL') else 'USD',
+            'regularMarketPrice': float(last),
+            'regularMarketChange': float(last - prev),
+            'regularMarketChangePercent': float((last - prev) / prev * 100),
+            'trailingPE': 15.0,
+            'dividendYield': 0.02,
+            'marketCap': 1_000_000_000,
+        }
+
+
+def split_wide_frame(wide, tickers):
+    """
+    Split a wide yf.download result into one OHLCV frame per ticker.
+
+    Args:
+        wide (DataFrame): Result of yf.download with group_by='ticker'
+        tickers (list): Tickers that were requested
+
+    Returns:
+        tuple: (frames, failures) dicts keyed by ticker
+    """
+    frames = {}
+    failures = {}
+    if wide is None or wide.empty:
+        return frames, {ticker: NO_DATA for ticker in tickers}
+
+    multi = isinstance(wide.columns, pd.MultiIndex)
+    level0 = set(wide.columns.get_level_values(0)) if multi else set()
+    for ticker in tickers:
+        if multi:
+            if ticker not in level0:
+                failures[ticker] = NO_DATA
+                continue
+            df = wide[ticker]
+        else:
+            # Én ticker uten MultiIndex
+            df = wide
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].dropna(how='all')
+        if df.empty:
+            failures[ticker] = NO_DATA
+        else:
+            frames[ticker] = df
+    return frames, failures
@@ -0,0 +1,134 @@
+import threading
+import time
+
+
+class QuoteCache:
+    """
+    Process-wide TTL cache with stale-while-revalidate.
+
+    Each entry belongs to an asset class with its own TTL. A fresh entry is
+    returned directly. A stale entry (older than the TTL but younger than
+    TTL + max_stale) is returned immediately while a background thread
+    reloads it. Anything older, or missing, is loaded synchronously.
+    """
+
+    def __init__(self, ttls, default_ttl=60, max_stale=600):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self._entries = {}
+        self._refreshing = set()
+        # Økes av invalidate(), så lasting som startet før den ikke skriver gamle data tilbake
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._stats = {}
+
+    def _count(self, asset_class, field):
+        with self._lock:
+            stats = self._stats.setdefault(asset_class, {
+                'hits': 0, 'misses': 0, 'stale_hits': 0, 'refreshes': 0, 'errors': 0
+            })
+            stats[field] += 1
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def ttl_for(self, asset_class):
+        return self.ttls.get(asset_class, self.default_ttl)
+
+    def get(self, key, loader, asset_class):
+        """
+        Return the cached value for key, loading it with loader() if needed
+
+        Args:
+            key (str): Cache key
+            loader (callable): Function without arguments that fetches the value
+            asset_class (str): Asset class deciding the TTL (oslo, global, crypto, fx)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        ttl = self.ttl_for(asset_class)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age < ttl:
+                self._count(asset_class, 'hits')
+                return entry[0]
+            if age < ttl + self.max_stale:
+                self._count(asset_class, 'stale_hits')
+                self._refresh_in_background(key, loader, asset_class)
+                return entry[0]
+
+        # Miss: bare én tråd laster samme nøkkel, de andre venter på resultatet
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < ttl:
+                self._count(asset_class, 'hits')
+                return entry[0]
+            self._count(asset_class, 'misses')
+            value = self._load(key, loader, asset_class)
+            if value is None and entry is not None:
+                return entry[0]
+            return value
+
+    def _load(self, key, loader, asset_class):
+        with self._lock:
+            generation = self._generation
+        try:
+            value = loader()
+        except Exception as e:
+            print(f"Error refreshing {key}: {e}")
+            self._count(asset_class, 'errors')
+            return None
+        # Tomme svar betyr som regel at kilden feilet, så de caches ikke
+        if value:
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = (value, time.monotonic())
+        else:
+            self._count(asset_class, 'errors')
+        return value
+
+    def _refresh_in_background(self, key, loader, asset_class):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._count(asset_class, 'refreshes')
+                with self._key_lock(key):
+                    self._load(key, loader, asset_class)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"quote-cache-{key}", daemon=True).start()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None; loads already running are not stored"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Hit, miss and staleness counters per asset class plus entry ages"""
+        now = time.monotonic()
+        with self._lock:
+            counters = {asset_class: dict(s) for asset_class, s in self._stats.items()}
+            entries = {key: round(now - fetched_at, 1) for key, (_, fetched_at) in self._entries.items()}
+            refreshing = sorted(self._refreshing)
+        return {
+            'ttls': dict(self.ttls),
+            'max_stale': self.max_stale,
+            'counters': counters,
+            'entry_age_seconds': entries,
+            'refreshing': refreshing,
+        }
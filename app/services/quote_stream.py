@@ -0,0 +1,230 @@
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+
+# Feltene som sendes som endringer til abonnentene
+DELTA_FIELDS = ('last_price', 'change', 'change_percent', 'signal')
+
+# Seksjonene i markeds-snapshotet som inneholder kurser
+QUOTE_SECTIONS = ('oslo_stocks', 'global_stocks', 'crypto', 'currency')
+
+# Kryptooversikten bruker korte symboler (BTC), mens registeret og watchlist bruker BTC-USD
+CRYPTO_QUOTE_SUFFIX = '-USD'
+
+
+def quote_value(value):
+    """A field value as plain JSON: NumPy scalars become Python values, NaN and inf become None"""
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def format_sse(data, event=None, event_id=None, retry=None):
+    """Format one Server-Sent Events message"""
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One client's bounded queue of quote deltas"""
+
+    def __init__(self, publisher, tickers=None, queue_size=256):
+        self.publisher = publisher
+        self.tickers = frozenset(tickers) if tickers else None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = False
+        self.created_at = time.time()
+
+    def events(self, heartbeat=15.0, retry=3000):
+        """
+        Yield SSE messages for this subscription
+
+        The first message is a 'snapshot' with the current values, then one
+        'delta' per change. A comment line is sent after `heartbeat` seconds
+        without data so proxies keep the connection open. The stream ends
+        when the subscription is dropped; the browser then reconnects and
+        gets a fresh snapshot.
+
+        The subscription is registered with the publisher when the stream
+        starts, not when it is created, so a response that is never sent
+        leaves nothing behind.
+        """
+        self.publisher.register(self)
+        try:
+            yield format_sse(self.publisher.current(self.tickers), event='snapshot',
+                             event_id=self.publisher.sequence, retry=retry)
+            while not self.dropped:
+                try:
+                    sequence, delta = self.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if self.dropped:
+                    break
+                yield format_sse(delta, event='delta', event_id=sequence)
+        finally:
+            self.publisher.unsubscribe(self)
+
+
+class QuotePublisher:
+    """
+    Fans quote changes out to many SSE subscribers.
+
+    publish() compares the new quotes with the last published values and
+    sends only the changed fields. Every subscriber has a bounded queue; a
+    subscriber whose queue is full is too slow and is dropped instead of
+    holding up the others or growing without limit.
+    """
+
+    def __init__(self, queue_size=256, fields=DELTA_FIELDS):
+        self.queue_size = queue_size
+        self.fields = tuple(fields)
+        self.sequence = 0
+        self._state = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'dropped': 0, 'connections': 0}
+
+    def subscribe(self, tickers=None):
+        """A new Subscription; it receives deltas once its events() stream starts"""
+        return Subscription(self, tickers, self.queue_size)
+
+    def register(self, subscription):
+        with self._lock:
+            self._subscribers.add(subscription)
+            self._stats['connections'] += 1
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def current(self, tickers=None):
+        """Last published values, for all tickers or the given ones"""
+        with self._lock:
+            if tickers is None:
+                return {ticker: dict(values) for ticker, values in self._state.items()}
+            return {ticker: dict(self._state[ticker]) for ticker in tickers if ticker in self._state}
+
+    def publish(self, quotes):
+        """
+        Publish new quotes and push the changes to the subscribers
+
+        Args:
+            quotes (dict): ticker -> row with (some of) the delta fields
+
+        Returns:
+            dict: ticker -> changed fields
+        """
+        deltas = {}
+        with self._lock:
+            for ticker, row in quotes.items():
+                previous = self._state.get(ticker, {})
+                # NaN er ulik seg selv og er ikke gyldig JSON; None sammenlignes og sendes som null
+                values = {field: quote_value(row[field]) for field in self.fields if field in row}
+                changed = {field: value for field, value in values.items() if value != previous.get(field)}
+                if changed:
+                    deltas[ticker] = changed
+                    self._state[ticker] = dict(previous, **changed)
+            if not deltas:
+                return {}
+            self.sequence += 1
+            sequence = self.sequence
+            subscribers = list(self._subscribers)
+            self._stats['published'] += 1
+
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.tickers is None:
+                payload = deltas
+            else:
+                payload = {t: d for t, d in deltas.items() if t in subscription.tickers}
+                if not payload:
+                    continue
+            try:
+                subscription.queue.put_nowait((sequence, payload))
+                delivered += 1
+            except queue.Full:
+                # Treg mottaker: kobles fra og får et nytt snapshot når den kobler til igjen
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+                with self._lock:
+                    self._stats['dropped'] += 1
+        with self._lock:
+            self._stats['delivered'] += delivered
+        return deltas
+
+    def publish_snapshot(self, snapshot):
+        """
+        Publish the quote rows of a MarketSnapshot
+
+        Crypto rows are published under both the short symbol of the
+        overview (BTC) and the registry ticker (BTC-USD), so the front page
+        and the watchlist both get updates.
+        """
+        quotes = {}
+        for section in QUOTE_SECTIONS:
+            for ticker, row in snapshot.sections.get(section, {}).items():
+                if not hasattr(row, 'get'):
+                    continue
+                quotes[ticker] = row
+                if section == 'crypto' and '-' not in ticker:
+                    quotes[f"{ticker}{CRYPTO_QUOTE_SUFFIX}"] = row
+        return self.publish(quotes)
+
+    def stats(self):
+        with self._lock:
+            backlog = [s.queue.qsize() for s in self._subscribers]
+            return dict(
+                self._stats,
+                subscribers=len(self._subscribers),
+                tickers=len(self._state),
+                sequence=self.sequence,
+                max_backlog=max(backlog) if backlog else 0,
+                pid=os.getpid(),
+            )
+
+
+class FakeQuoteSource:
+    """
+    Deterministic random-walk quotes for load tests.
+
+    Every tick() moves a `move_fraction` share of the tickers and returns
+    ticker -> row in the same shape as the market overview sections.
+    """
+
+    def __init__(self, tickers, seed=0, move_fraction=0.2):
+        self.rng = random.Random(seed)
+        self.move_fraction = move_fraction
+        self.quotes = {}
+        for ticker in tickers:
+            price = round(self.rng.uniform(10, 500), 2)
+            self.quotes[ticker] = {'last_price': price, 'change': 0.0, 'change_percent': 0.0, 'signal': 'HOLD'}
+        self._open = {ticker: row['last_price'] for ticker, row in self.quotes.items()}
+
+    def tick(self):
+        tickers = list(self.quotes)
+        for ticker in self.rng.sample(tickers, max(1, int(len(tickers) * self.move_fraction))):
+            row = self.quotes[ticker]
+            price = round(row['last_price'] * (1 + self.rng.gauss(0, 0.002)), 2)
+            change = round(price - self._open[ticker], 2)
+            change_percent = round(change / self._open[ticker] * 100, 2)
+            self.quotes[ticker] = {
+                'last_price': price,
+                'change': change,
+                'change_percent': change_percent,
+                'signal': 'BUY' if change_percent > 0 else 'SELL',
+            }
+        return dict(self.quotes)
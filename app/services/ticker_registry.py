@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from app.services.concurrency import fan_out
+from app.services.fx_store import SUFFIX_CURRENCY, instrument_currency
+
+# Rekkefølgen på feltene i hver rad i registerfilen; nøkkeltallene er de sist hentede
+FIELDS = ['symbol', 'name', 'exchange', 'currency', 'sector', 'asset_class',
+          'pe_ratio', 'dividend_yield', 'market_cap']
+
+TickerMeta = namedtuple('TickerMeta', FIELDS, defaults=(None, None, None))
+
+# Børssuffiks -> børs (uten suffiks regnes som amerikansk børs)
+SUFFIX_EXCHANGE = {
+    '.OL': 'OSL', '.ST': 'STO', '.CO': 'CPH', '.HE': 'HEL', '.DE': 'GER', '.PA': 'PAR',
+    '.AS': 'AMS', '.MI': 'MIL', '.L': 'LSE', '.SW': 'SWX', '.T': 'TYO',
+}
+
+
+def static_meta(symbol, asset_class):
+    """Metadata that follows from the symbol alone (no name or sector yet)"""
+    symbol = symbol.upper()
+    exchange = None
+    for suffix in SUFFIX_CURRENCY:
+        if symbol.endswith(suffix):
+            exchange = SUFFIX_EXCHANGE.get(suffix)
+            break
+    if exchange is None:
+        exchange = 'CCC' if asset_class == 'crypto' else 'US'
+    return TickerMeta(symbol, None, exchange, instrument_currency(symbol, asset_class), None, asset_class)
+
+
+class TickerRegistry:
+    """
+    The ticker universe with static metadata, kept in a compact JSON file.
+
+    Besides name, exchange, currency and sector each row keeps the P/E,
+    dividend yield and market cap from the last metadata refresh, so
+    screens can show them without an info call per ticker.
+
+    The file holds one row per symbol (see FIELDS) and is written in bulk
+    by refresh(), e.g. from `flask refresh-tickers`; page rendering only
+    does dictionary lookups. Symbols from `seed` that the file does not
+    know yet are added with metadata derived from the symbol. Another
+    process rewriting the file is picked up by maybe_reload(), which
+    checks the file's mtime at most every `check_interval` seconds.
+    `version` changes whenever the contents change.
+    """
+
+    def __init__(self, path, seed=(), check_interval=30):
+        self.path = path
+        self.seed = list(seed)
+        self.check_interval = check_interval
+        self.version = 0
+        self.updated_at = None
+        self._meta = {}
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0
+        self.load()
+
+    def load(self):
+        """(Re)load the file and merge in the seed symbols"""
+        meta = {}
+        updated_at = None
+        mtime = None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            fields = data.get('fields', FIELDS)
+            for row in data.get('instruments', []):
+                record = dict(zip(fields, row))
+                meta[record['symbol']] = TickerMeta(*(record.get(field) for field in FIELDS))
+            updated_at = data.get('updated_at')
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading ticker registry {self.path}: {e}")
+        for symbol, asset_class in self.seed:
+            symbol = symbol.upper()
+            if symbol not in meta:
+                meta[symbol] = static_meta(symbol, asset_class)
+        with self._lock:
+            self._meta = meta
+            self.updated_at = updated_at
+            self._mtime = mtime
+            self._checked_at = time.time()
+            self.version += 1
+
+    def maybe_reload(self):
+        """Reload if the file was rewritten (checked at most every check_interval seconds)"""
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self.load()
+        return True
+
+    def __contains__(self, symbol):
+        return str(symbol).upper() in self._meta
+
+    def __len__(self):
+        return len(self._meta)
+
+    def get(self, symbol):
+        """TickerMeta for a symbol, or None if it is not in the universe"""
+        return self._meta.get(str(symbol).upper())
+
+    def name(self, symbol):
+        """Company name, or the symbol itself when no name is known"""
+        meta = self.get(symbol)
+        return meta.name if meta is not None and meta.name else symbol
+
+    def sector(self, symbol, default='Unknown'):
+        meta = self.get(symbol)
+        return meta.sector if meta is not None and meta.sector else default
+
+    def symbols(self, asset_class=None):
+        """Symbols in registry order, optionally only one asset class"""
+        return [s for s, m in self._meta.items() if asset_class is None or m.asset_class == asset_class]
+
+    def instruments(self):
+        """All TickerMeta rows"""
+        return list(self._meta.values())
+
+    def update(self, rows):
+        """Merge metadata into the registry (None values keep what is stored) and save it"""
+        with self._lock:
+            meta = dict(self._meta)
+            for row in rows:
+                row = dict(row)
+                symbol = row['symbol'].upper()
+                old = meta.get(symbol) or static_meta(symbol, row.get('asset_class'))
+                meta[symbol] = TickerMeta(*(
+                    row.get(field) if row.get(field) is not None else getattr(old, field)
+                    for field in FIELDS))
+            meta = {symbol: m._replace(symbol=symbol) for symbol, m in meta.items()}
+            self._meta = meta
+            self.updated_at = time.time()
+            self.version += 1
+        self.save()
+
+    def save(self):
+        """Write the registry atomically (temporary file + rename)"""
+        with self._lock:
+            data = {
+                'fields': FIELDS,
+                'updated_at': self.updated_at,
+                'instruments': [list(m) for m in self._meta.values()],
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def refresh(self, provider, symbols=None, max_workers=8, item_timeout=15):
+        """
+        Fetch name, sector, exchange, currency and fundamentals for many symbols in bulk
+
+        Args:
+            provider (PriceProvider): Source of info dicts
+            symbols (list, optional): Only these symbols (default: the whole universe)
+            max_workers (int): Concurrent info lookups
+            item_timeout (float): Seconds one lookup may take
+
+        Returns:
+            tuple: (updated, failures) where failures maps symbol to an error message
+        """
+        symbols = list(symbols or self.symbols())
+        outcomes = fan_out(provider.info, symbols, max_workers=max_workers, item_timeout=item_timeout)
+        rows = []
+        failures = {}
+        for symbol, (info, error) in zip(symbols, outcomes):
+            if error is not None or not info:
+                failures[symbol] = str(error or 'No info returned')
+                continue
+            rows.append({
+                'symbol': symbol,
+                'name': info.get('longName') or info.get('shortName'),
+                'exchange': info.get('exchange'),
+                'currency': info.get('currency'),
+                'sector': info.get('sector'),
+                'pe_ratio': info.get('trailingPE'),
+                'dividend_yield': info.get('dividendYield'),
+                'market_cap': info.get('marketCap'),
+            })
+        if rows:
+            self.update(rows)
+        return len(rows), failures
+
+    def stats(self):
+        by_class = {}
+        named = 0
+        for m in self._meta.values():
+            by_class[m.asset_class] = by_class.get(m.asset_class, 0) + 1
+            named += 1 if m.name else 0
+        return {'path': self.path, 'symbols': len(self._meta), 'named': named,
+                'by_asset_class': by_class, 'updated_at': self.updated_at, 'version': self.version}
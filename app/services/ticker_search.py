@@ -0,0 +1,216 @@
+import re
+import heapq
+from bisect import bisect_left
+from collections import namedtuple
+
+# Rangering: lavere er bedre
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, WORD_PREFIX, SUBSTRING = range(5)
+
+Instrument = namedtuple('Instrument', ['symbol', 'name', 'asset_class'])
+
+_WORD_RE = re.compile(r'[A-Z0-9ÆØÅÄÖÜ]+')
+
+
+def normalize_query(text):
+    """Upper-case and collapse whitespace, so queries and keys compare equally"""
+    return ' '.join(str(text).upper().split())
+
+
+def base_symbol(symbol):
+    """'EQNR.OL' -> 'EQNR', 'BTC-USD' -> 'BTC', 'AAPL' -> 'AAPL'"""
+    return re.split(r'[.\-=]', symbol, maxsplit=1)[0]
+
+
+class TickerSearchIndex:
+    """
+    Prebuilt search index over symbols and company names.
+
+    Prefix lookups use a sorted key array searched with bisect (a
+    flattened prefix trie). Prefixes that cover more than `wide_prefix`
+    keys get their best `top_k` matches precomputed, so short or common
+    prefixes cost the same as rare ones. Substring matches use a trigram
+    index whose posting lists are kept in rank order; queries shorter
+    than three characters match substrings of the symbol only (as the
+    old linear search_ticker did), from a one- and two-character index
+    over symbols. Results are
+    deduplicated per symbol and ranked: exact symbol, symbol prefix, name
+    prefix, name word prefix, then substring; ties go to the shorter symbol.
+    """
+
+    def __init__(self, instruments=(), top_k=50, wide_prefix=64):
+        self.top_k = top_k
+        self.wide_prefix = wide_prefix
+        self.instruments = []
+        self._ids = {}
+        for instrument in instruments:
+            self.add(*instrument)
+        self._build()
+
+    @classmethod
+    def build(cls, instruments, top_k=50, wide_prefix=64):
+        """
+        Build an index
+
+        Args:
+            instruments: Iterable of (symbol, name, asset_class) tuples;
+                         duplicates of a symbol are merged (last name wins)
+            top_k (int): Precomputed matches per wide prefix
+            wide_prefix (int): Key count above which a prefix is precomputed
+
+        Returns:
+            TickerSearchIndex
+        """
+        return cls(instruments, top_k=top_k, wide_prefix=wide_prefix)
+
+    def add(self, symbol, name=None, asset_class=None):
+        symbol = normalize_query(symbol)
+        if not symbol:
+            return
+        name = ' '.join(str(name).split()) if name and name != symbol else None
+        existing = self._ids.get(symbol)
+        if existing is None:
+            self._ids[symbol] = len(self.instruments)
+            self.instruments.append(Instrument(symbol, name, asset_class))
+        else:
+            old = self.instruments[existing]
+            self.instruments[existing] = Instrument(symbol, name or old.name, asset_class or old.asset_class)
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def _build(self):
+        exact = {}
+        keys = []
+        trigrams = {}
+        short = {}
+        self._haystacks = [None] * len(self.instruments)
+        # Instrumentene gås gjennom i rangeringsrekkefølge, så trigram-listene blir sortert
+        order = sorted(range(len(self.instruments)),
+                       key=lambda i: (len(self.instruments[i].symbol), self.instruments[i].symbol))
+        for i in order:
+            symbol, name, _ = self.instruments[i]
+            base = base_symbol(symbol)
+            for key in {symbol, base}:
+                exact.setdefault(key, []).append(i)
+                keys.append((key, SYMBOL_PREFIX, i))
+            upper_name = normalize_query(name) if name else ''
+            if upper_name:
+                keys.append((upper_name, NAME_PREFIX, i))
+                for word in set(_WORD_RE.findall(upper_name)[1:]):
+                    keys.append((word, WORD_PREFIX, i))
+            haystack = f"{symbol} {upper_name}" if upper_name else symbol
+            self._haystacks[i] = haystack
+            for gram in {haystack[j:j + 3] for j in range(len(haystack) - 2)}:
+                trigrams.setdefault(gram, []).append(i)
+            for gram in {symbol[j:j + n] for n in (1, 2) for j in range(len(symbol) - n + 1)}:
+                short.setdefault(gram, []).append(i)
+
+        keys.sort()
+        self._exact = exact
+        self._keys = [k for k, _, _ in keys]
+        self._key_entries = [(tier, i) for _, tier, i in keys]
+        self._trigrams = trigrams
+        self._short = short
+        self._wide = {}
+        self._precompute_wide_prefixes()
+
+    def _precompute_wide_prefixes(self):
+        # Brede prefiks (korte eller vanlige ord) får de beste treffene regnet ut på forhånd.
+        # Områdene er nøstet, så vi kan stoppe på første dybde uten brede prefiks.
+        keys = self._keys
+        depth = 1
+        while True:
+            found = False
+            pos = 0
+            while pos < len(keys):
+                key = keys[pos]
+                if len(key) < depth:
+                    pos += 1
+                    continue
+                prefix = key[:depth]
+                end = bisect_left(keys, prefix + '\uffff', pos)
+                if end - pos > self.wide_prefix:
+                    self._wide[prefix] = self._best_in_range(pos, end, self.top_k)
+                    found = True
+                pos = end
+            if not found:
+                break
+            depth += 1
+
+    def _best_in_range(self, lo, hi, limit=None):
+        best = {}
+        for pos in range(lo, hi):
+            tier, i = self._key_entries[pos]
+            if i not in best or tier < best[i]:
+                best[i] = tier
+        if limit is None:
+            return self._ranked(best.items())
+        return heapq.nsmallest(limit, best.items(), key=self._rank_key)
+
+    def _rank_key(self, item):
+        i, tier = item
+        symbol = self.instruments[i].symbol
+        return tier, len(symbol), symbol
+
+    def _ranked(self, items):
+        return sorted(items, key=self._rank_key)
+
+    def _prefix_matches(self, query):
+        wide = self._wide.get(query)
+        if wide is not None:
+            return wide
+        lo = bisect_left(self._keys, query)
+        hi = bisect_left(self._keys, query + '\uffff', lo)
+        return self._best_in_range(lo, hi)
+
+    def _substring_matches(self, query, exclude, limit):
+        if len(query) < 3:
+            # Korte søk: delstreng av symbolet; listene inneholder bare treff
+            found = []
+            for i in self._short.get(query, []):
+                if i not in exclude:
+                    found.append((i, SUBSTRING))
+                    if len(found) >= limit:
+                        break
+            return found
+        postings = [self._trigrams.get(query[j:j + 3]) for j in range(len(query) - 2)]
+        if not postings or any(p is None for p in postings):
+            return []
+        # Listene er i rangeringsrekkefølge, så de første treffene er de beste
+        found = []
+        for i in min(postings, key=len):
+            if i not in exclude and query in self._haystacks[i]:
+                found.append((i, SUBSTRING))
+                if len(found) >= limit:
+                    break
+        return found
+
+    def search(self, query, limit=10):
+        """
+        Ranked matches for a query
+
+        Args:
+            query (str): Symbol or name fragment
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Dicts with symbol, name, asset_class and match (the rank tier)
+        """
+        query = normalize_query(query)
+        if not query or limit <= 0:
+            return []
+        matches = {}
+        for i in self._exact.get(query, []):
+            matches.setdefault(i, EXACT)
+        if len(matches) < limit:
+            for i, tier in self._prefix_matches(query):
+                matches.setdefault(i, tier)
+        if len(matches) < limit:
+            for i, tier in self._substring_matches(query, matches, limit - len(matches)):
+                matches[i] = tier
+
+        results = []
+        for i, tier in self._ranked(matches.items())[:limit]:
+            symbol, name, asset_class = self.instruments[i]
+            results.append({'symbol': symbol, 'name': name or symbol, 'asset_class': asset_class, 'match': tier})
+        return results
@@ -0,0 +1,57 @@
+// Live kursoppdateringer via Server-Sent Events.
+// Rader med data-quote-ticker og celler med data-quote-field oppdateres når endringer kommer.
+(function() {
+    const script = document.currentScript;
+
+    function formatValue(cell, value) {
+        if (value === null || value === undefined) {
+            return 'N/A';
+        }
+        const decimals = cell.dataset.decimals;
+        const text = decimals !== undefined ? Number(value).toFixed(Number(decimals)) : String(value);
+        return text + (cell.dataset.suffix || '');
+    }
+
+    function applyQuote(rows, ticker, fields) {
+        (rows[ticker] || []).forEach(function(row) {
+            Object.keys(fields).forEach(function(field) {
+                row.querySelectorAll('[data-quote-field="' + field + '"]').forEach(function(cell) {
+                    cell.textContent = formatValue(cell, fields[field]);
+                    if (cell.dataset.signClass !== undefined && fields[field] !== null) {
+                        cell.classList.toggle('text-success', fields[field] > 0);
+                        cell.classList.toggle('text-danger', fields[field] <= 0);
+                    }
+                });
+            });
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if (!window.EventSource || !script) {
+            return;
+        }
+        const rows = {};
+        document.querySelectorAll('[data-quote-ticker]').forEach(function(row) {
+            const ticker = row.dataset.quoteTicker.toUpperCase();
+            (rows[ticker] = rows[ticker] || []).push(row);
+        });
+        const tickers = Object.keys(rows);
+        if (!tickers.length) {
+            return;
+        }
+
+        const url = script.dataset.streamUrl + '?tickers=' + encodeURIComponent(tickers.join(','));
+        const source = new EventSource(url);
+        const handler = function(event) {
+            const quotes = JSON.parse(event.data);
+            Object.keys(quotes).forEach(function(ticker) {
+                applyQuote(rows, ticker, quotes[ticker]);
+            });
+        };
+        source.addEventListener('snapshot', handler);
+        source.addEventListener('delta', handler);
+        window.addEventListener('beforeunload', function() {
+            source.close();
+        });
+    });
+})();
@@ -0,0 +1,80 @@
+"""
+Load test: AI portfolio recommendations through the background job queue.
+
+Runs offline with FakePriceProvider and FakeLLMClient (with a simulated
+model latency). Reports how long submit() takes, which is what a page
+request waits for, and how long the queue needs to finish all jobs for
+a few worker counts. Resubmitting the same ticker sets must reuse the
+finished jobs.
+
+Run from the project root:
+
+    python benchmarks/bench_ai_jobs.py
+    python benchmarks/bench_ai_jobs.py --jobs 200 --latency 0.5 --workers 1 4 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MARKET_SNAPSHOT_INTERVAL', '0')
+os.environ.setdefault('HISTORY_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'history.sqlite'))
+os.environ.setdefault('LLM_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'llm_cache.sqlite'))
+
+from app.services.ai_jobs import AIJobQueue
+from app.services.ai_service import AIService
+from app.services.data_service import DataService
+from app.services.llm_client import FakeLLMClient
+from app.services.price_provider import FakePriceProvider
+
+
+def portfolios(count, seed=0):
+    rng = random.Random(seed)
+    universe = [f"T{i}.OL" for i in range(40)]
+    return [rng.sample(universe, rng.randint(3, 8)) for _ in range(count)]
+
+
+def run(workers, baskets, llm):
+    AIService.jobs = AIJobQueue(max_workers=workers)
+    if AIService.llm_cache is not None:
+        AIService.llm_cache.clear()
+    start = time.perf_counter()
+    jobs = [AIService.submit_portfolio_recommendation(tickers) for tickers in baskets]
+    submit_time = time.perf_counter() - start
+    for job in jobs:
+        AIService.jobs.wait(job.id)
+    total = time.perf_counter() - start
+
+    calls_before = llm.calls['complete']
+    reused = [AIService.submit_portfolio_recommendation(list(reversed(tickers))) for tickers in baskets]
+    assert all(job.status == 'done' for job in reused)
+    assert llm.calls['complete'] == calls_before
+    return submit_time / len(baskets), total, AIService.jobs.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated model latency (seconds)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    DataService.set_price_provider(FakePriceProvider())
+    llm = FakeLLMClient(latency=args.latency)
+    AIService.set_llm_client(llm)
+    baskets = portfolios(args.jobs)
+    # Varm opp historikklageret så målingen handler om køen
+    DataService.get_history_batch(sorted({t for tickers in baskets for t in tickers}))
+
+    print(f"{'workers':>7} {'submit us/job':>14} {'all done s':>11} {'jobs/s':>8}")
+    for workers in args.workers:
+        per_submit, total, stats = run(workers, baskets, llm)
+        assert stats['statuses'].get('done') == len(baskets), stats
+        print(f"{workers:>7} {per_submit * 1e6:14.1f} {total:11.2f} {len(baskets) / total:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: vectorized backtests of the signal rules.
+
+Builds a synthetic close panel (random walks, with staggered listing
+dates and missing days) and times IndicatorEngine plus BacktestEngine for
+every registered rule over the whole panel. A per-ticker, per-day replay
+with AnalysisService.signal_from_indicators is timed on a few tickers and
+extrapolated for comparison; its signals are also checked against the
+vectorized rsi_macd rule.
+
+Run from the project root:
+
+    python benchmarks/bench_backtest.py
+    python benchmarks/bench_backtest.py --tickers 500 --years 10 --loop-tickers 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MARKET_SNAPSHOT_INTERVAL', '0')
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_service import AnalysisService
+from app.services.backtest import SIGNAL_RULES, BacktestEngine, rsi_macd_rule
+from app.services.indicator_engine import IndicatorEngine
+
+
+def make_panel(n_tickers, days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2024-12-31', periods=days, name='Date')
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, (days, n_tickers)), axis=0))
+    # Senere børsnoteringer og enkelte manglende dager
+    listed = rng.integers(0, days // 2, n_tickers)
+    closes[np.arange(days)[:, None] < listed] = np.nan
+    closes[rng.random((days, n_tickers)) < 0.01] = np.nan
+    return pd.DataFrame(closes, index=index, columns=[f"T{i:04d}" for i in range(n_tickers)])
+
+
+def loop_signals(close, indicators):
+    """Signals the slow way: one signal_from_indicators call per ticker and day"""
+    rsi, macd = indicators['RSI'], indicators['MACD']
+    out = np.full(close.shape, np.nan)
+    for j, ticker in enumerate(close.columns):
+        for i in range(len(close)):
+            r, m = rsi.iat[i, j], macd.iat[i, j]
+            if np.isnan(r) or np.isnan(m):
+                continue
+            out[i, j] = {'Buy': 1.0, 'Hold': 0.0, 'Sell': -1.0}[AnalysisService.signal_from_indicators(r, m)]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--loop-tickers', type=int, default=3, help='tickers replayed with the per-day loop')
+    args = parser.parse_args()
+
+    close = make_panel(args.tickers, args.years * 252)
+    start = time.perf_counter()
+    indicators = IndicatorEngine.compute(close)
+    indicator_time = time.perf_counter() - start
+    print(f"panel: {close.shape[1]} tickers x {close.shape[0]} days")
+    print(f"indicators: {indicator_time:.2f} s")
+
+    print(f"{'rule':>14} {'seconds':>8} {'port. CAGR':>11} {'max DD':>8} {'hit rate':>9} {'trades':>8}")
+    for name in SIGNAL_RULES:
+        start = time.perf_counter()
+        result = BacktestEngine.run(close, rule=name, indicators=indicators)
+        elapsed = time.perf_counter() - start
+        p = result['portfolio']
+        print(f"{name:>14} {elapsed:8.3f} {p['cagr'] * 100:10.2f}% {p['max_drawdown'] * 100:7.1f}% "
+              f"{p['hit_rate'] * 100:8.1f}% {int(result['per_ticker']['trades'].sum()):8d}")
+
+    subset = close.iloc[:, :args.loop_tickers]
+    sub_indicators = {name: frame.iloc[:, :args.loop_tickers] for name, frame in indicators.items()}
+    start = time.perf_counter()
+    slow = loop_signals(subset, sub_indicators)
+    loop_time = time.perf_counter() - start
+    fast = rsi_macd_rule({name: frame.to_numpy(dtype=float) for name, frame in sub_indicators.items()})
+    mismatches = int((~((slow == fast) | (np.isnan(slow) & np.isnan(fast)))).sum())
+    print(f"per-day loop: {loop_time:.2f} s for {args.loop_tickers} tickers "
+          f"(~{loop_time / args.loop_tickers * args.tickers:.0f} s for {args.tickers}), "
+          f"signal mismatches vs rsi_macd: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: pooled provider HTTP client against bare requests.get.
+
+Both run the same CoinGecko-style request against a local stub server
+(benchmarks/stub_http.py) from several threads. Bare requests.get opens
+a new connection per call and gives up on the first 503; the
+ProviderHTTPClient reuses pooled keep-alive connections and retries with
+jittered backoff. Reports p50/p95 latency, failed calls and how many TCP
+connections the server accepted.
+
+Run from the project root:
+
+    python benchmarks/bench_http.py
+    python benchmarks/bench_http.py --requests 2000 --threads 16 --latency 0.002 --fail-rate 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from app.services.http_client import ProviderHTTPClient
+from stub_http import StubServer
+
+PARAMS = {'ids': 'bitcoin,ethereum,solana', 'vs_currencies': 'usd', 'include_24hr_change': 'true'}
+
+
+def run(call, args):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            call()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    latencies = sorted(latency for latency, _ in results)
+    failed = sum(1 for _, ok in results if not ok)
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.001, help='stub server delay per response (s)')
+    parser.add_argument('--fail-rate', type=float, default=0.05, help='share of 503 responses')
+    parser.add_argument('--retries', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'':>14} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7} {'conns':>6}")
+    with StubServer(latency=args.latency, fail_rate=args.fail_rate) as stub:
+        url = stub.url + '/simple/price'
+        p50, p95, failed = run(lambda: requests.get(url, params=PARAMS, timeout=10).raise_for_status(), args)
+        print(f"{'requests.get':>14} {p50 * 1e3:8.2f} {p95 * 1e3:8.2f} {failed:7d} {stub.connections:6d}")
+
+    with StubServer(latency=args.latency, fail_rate=args.fail_rate) as stub:
+        client = ProviderHTTPClient('stub', stub.url, retries=args.retries, backoff=0.01,
+                                    pool_size=args.threads)
+        p50, p95, failed = run(lambda: client.get_json('simple/price', params=PARAMS), args)
+        print(f"{'pooled client':>14} {p50 * 1e3:8.2f} {p95 * 1e3:8.2f} {failed:7d} {stub.connections:6d}")
+        stats = client.stats()
+        print(f"client: {stats['attempts']} attempts, {stats['retries']} retries, {stats['errors']} errors")
+
+
+if __name__ == '__main__':
+    main()
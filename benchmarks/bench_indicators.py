@@ -0,0 +1,83 @@
+"""
+Benchmark: IndicatorEngine (whole universe in one pass) vs the per-ticker
+AnalysisService.calculate_rsi / calculate_macd / calculate_moving_averages.
+
+Run from the project root:
+
+    python benchmarks/bench_indicators.py
+    python benchmarks/bench_indicators.py --sizes 100 1000 5000 --days 252
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MARKET_SNAPSHOT_INTERVAL', '0')
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_service import AnalysisService
+from app.services.indicator_engine import IndicatorEngine
+
+
+def make_frames(n_tickers, days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2024-12-31', periods=days, name='Date')
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, n_tickers)), axis=0))
+    frames = {}
+    for i in range(n_tickers):
+        frames[f"T{i:05d}"] = pd.DataFrame({'Close': closes[:, i], 'Volume': 1e6}, index=index)
+    return frames
+
+
+def per_ticker(frames):
+    latest = {}
+    for ticker, df in frames.items():
+        rsi = AnalysisService.calculate_rsi(df)['RSI'].iloc[-1]
+        macd = AnalysisService.calculate_macd(df)['MACD'].iloc[-1]
+        ma = AnalysisService.calculate_moving_averages(df)
+        latest[ticker] = (rsi, macd, ma['MA_20'].iloc[-1], ma['MA_200'].iloc[-1])
+    return latest
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--days', type=int, default=252)
+    parser.add_argument('--loop-limit', type=int, default=5000,
+                        help='Skip the per-ticker loop above this many tickers')
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'per-ticker s':>13} {'engine latest s':>16} {'engine full s':>14} {'speedup':>8}")
+    for size in args.sizes:
+        frames = make_frames(size, args.days)
+        panel = IndicatorEngine.close_panel(frames)
+
+        latest, t_latest = timed(IndicatorEngine.compute, panel, latest_only=True)
+        _, t_full = timed(IndicatorEngine.compute, panel)
+
+        if size <= args.loop_limit:
+            reference, t_loop = timed(per_ticker, frames)
+            sample = list(reference)[:: max(1, size // 20)]
+            for ticker in sample:
+                rsi, macd, ma20, ma200 = reference[ticker]
+                row = latest.loc[ticker]
+                assert np.allclose([row['RSI'], row['MACD'], row['MA_20'], row['MA_200']],
+                                   [rsi, macd, ma20, ma200], equal_nan=True), ticker
+            speedup = f"{t_loop / t_latest:7.1f}x"
+            loop = f"{t_loop:13.3f}"
+        else:
+            speedup, loop = f"{'-':>8}", f"{'skipped':>13}"
+        print(f"{size:>8} {loop} {t_latest:16.4f} {t_full:14.4f} {speedup}")
+
+
+if __name__ == '__main__':
+    main()
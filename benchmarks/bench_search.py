@@ -0,0 +1,97 @@
+"""
+Benchmark: ticker search and autocomplete.
+
+Builds TickerSearchIndex over a synthetic universe (symbols plus company
+names) and reports build time and per-query latency (p50/p99) for symbol
+prefixes, name fragments and substrings. A linear substring scan over the
+same universe, as the old search_ticker did, is timed for comparison.
+
+Run from the project root:
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --size 100000 --queries 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ticker_search import TickerSearchIndex
+
+WORDS = ['Nordic', 'Ocean', 'Energy', 'Holding', 'Group', 'Capital', 'Bio', 'Tech', 'Salmon', 'Shipping',
+         'Invest', 'Power', 'Solar', 'Marine', 'Bank', 'Mining', 'Health', 'Data', 'Systems', 'Gold']
+SUFFIXES = ['ASA', 'AB', 'Inc.', 'Corp', 'plc', 'AG', 'SA', 'Ltd']
+EXCHANGES = ['', '.OL', '.ST', '.CO', '.DE', '.L']
+
+
+def universe(size, seed=0):
+    rng = random.Random(seed)
+    seen = set()
+    items = []
+    while len(items) < size:
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 5))) + rng.choice(EXCHANGES)
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        name = ' '.join(rng.sample(WORDS, rng.randint(1, 3)) + [rng.choice(SUFFIXES)])
+        items.append((symbol, name, 'equity'))
+    return items
+
+
+def queries(items, count, seed=1):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        symbol, name, _ = rng.choice(items)
+        kind = rng.randrange(4)
+        if kind == 0:
+            out.append(symbol[:rng.randint(1, len(symbol))])
+        elif kind == 1:
+            out.append(name[:rng.randint(2, 8)])
+        elif kind == 2:
+            word = rng.choice(name.split())
+            out.append(word[1:5] if len(word) > 4 else word)
+        else:
+            out.append(rng.choice(WORDS)[:rng.randint(3, 6)].lower())
+    return out
+
+
+def timed(func, qs):
+    latencies = []
+    for q in qs:
+        start = time.perf_counter()
+        func(q)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    items = universe(args.size)
+    start = time.perf_counter()
+    index = TickerSearchIndex.build(items)
+    build = time.perf_counter() - start
+    qs = queries(items, args.queries)
+
+    symbols = [symbol for symbol, _, _ in items]
+    p50, p99 = timed(lambda q: index.search(q, limit=10), qs)
+    s50, s99 = timed(lambda q: [s for s in symbols if q.upper() in s.upper()], qs[:200])
+
+    print(f"instruments: {len(index)}  build: {build:.2f} s")
+    print(f"{'':>14} {'p50 us':>9} {'p99 us':>9}")
+    print(f"{'index':>14} {p50 * 1e6:9.1f} {p99 * 1e6:9.1f}")
+    print(f"{'linear scan':>14} {s50 * 1e6:9.1f} {s99 * 1e6:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Load test: SSE quote deltas fanned out to many subscribers.
+
+In-process mode (default) drives QuotePublisher with FakeQuoteSource and
+consumes every subscription's event stream on its own thread, like one
+worker serving that many SSE connections. A share of the consumers is
+deliberately slow so slow-consumer dropping can be seen. Reports the
+fan-out time per publish, the delivered and dropped counts and the
+memory per connection.
+
+With --url the same number of real HTTP connections is opened against a
+running server, and /api/stream/stats shows how many one worker holds
+(it needs a logged-in session: pass the session cookie with --session).
+
+Run from the project root:
+
+    python benchmarks/bench_sse.py
+    python benchmarks/bench_sse.py --clients 2000 --tickers 500 --seconds 5 --slow 0.05
+    python benchmarks/bench_sse.py --url http://localhost:5000 --clients 200 --session <cookie>
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.quote_stream import FakeQuoteSource, QuotePublisher
+
+
+def consume(subscription, counts, index, delay):
+    for message in subscription.events(heartbeat=0.5):
+        if 'event: delta' in message:
+            counts[index] += 1
+        if delay:
+            time.sleep(delay)
+
+
+def run_in_process(args):
+    tickers = [f"T{i}.OL" for i in range(args.tickers)]
+    source = FakeQuoteSource(tickers)
+    publisher = QuotePublisher(queue_size=args.queue_size)
+    publisher.publish(source.tick())
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    subscriptions = []
+    for i in range(args.clients):
+        watch = None if i % 2 == 0 else tickers[i % len(tickers):i % len(tickers) + args.watch]
+        subscriptions.append(publisher.subscribe(watch))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = [0] * args.clients
+    slow_every = int(1 / args.slow) if args.slow else 0
+    threads = []
+    for i, subscription in enumerate(subscriptions):
+        delay = 1.0 if slow_every and i % slow_every == 0 else 0
+        thread = threading.Thread(target=consume, args=(subscription, counts, i, delay), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    publish_times = []
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        quotes = source.tick()
+        start = time.perf_counter()
+        publisher.publish(quotes)
+        publish_times.append(time.perf_counter() - start)
+        time.sleep(1 / args.rate)
+
+    stats = publisher.stats()
+    publish_times.sort()
+    print(f"connections: {args.clients}  tickers: {args.tickers}  publishes: {len(publish_times)}")
+    print(f"fan-out per publish: p50 {statistics.median(publish_times) * 1e3:.2f} ms  "
+          f"p99 {publish_times[int(len(publish_times) * 0.99) - 1] * 1e3:.2f} ms")
+    print(f"delivered: {stats['delivered']}  dropped (slow consumers): {stats['dropped']}  "
+          f"still subscribed: {stats['subscribers']}")
+    print(f"memory per subscription: {(after - before) / args.clients / 1024:.1f} KiB")
+
+
+def run_http(args):
+    import requests
+
+    url = args.url.rstrip('/') + '/api/stream/quotes'
+    opened = []
+
+    def client():
+        try:
+            with requests.get(url, stream=True, timeout=(5, args.seconds + 10)) as response:
+                opened.append(1)
+                for _ in response.iter_lines():
+                    pass
+        except Exception:
+            pass
+
+    for _ in range(args.clients):
+        threading.Thread(target=client, daemon=True).start()
+    time.sleep(args.seconds)
+    response = requests.get(args.url.rstrip('/') + '/api/stream/stats', timeout=5,
+                            cookies={'session': args.session} if args.session else None,
+                            allow_redirects=False)
+    if response.status_code != 200:
+        print(f"opened: {len(opened)}/{args.clients}  (/api/stream/stats needs --session)")
+        return
+    stats = response.json()
+    print(f"opened: {len(opened)}/{args.clients}  server pid {stats['pid']} "
+          f"holds {stats['subscribers']} subscribers  (dropped {stats['dropped']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--watch', type=int, default=10, help='tickers per filtered subscription')
+    parser.add_argument('--rate', type=float, default=20, help='publishes per second')
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--slow', type=float, default=0.02, help='share of slow consumers')
+    parser.add_argument('--queue-size', type=int, default=32)
+    parser.add_argument('--url', help='run against a live server instead')
+    parser.add_argument('--session', help='session cookie of a logged-in user, for /api/stream/stats')
+    args = parser.parse_args()
+    if args.url:
+        run_http(args)
+    else:
+        run_in_process(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: cold start of the web app.
+
+Every run starts a fresh Python process and measures the time to
+import the `app` package, to build the app with create_app() and to
+serve the first request (through the test client). It also lists which
+heavy optional dependencies are loaded after startup; they should only
+be imported on first use.
+
+Run from the project root:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --path /memo-stats
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['matplotlib', 'sklearn', 'yfinance', 'openai', 'joblib']
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+loaded_at_start = [m for m in HEAVY_MODULES if m in sys.modules]
+response = flask_app.test_client().get(PATH)
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'status': response.status_code,
+    'loaded_at_start': loaded_at_start,
+}))
+"""
+
+
+def run_once(path, env):
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nPATH = {path!r}\n" + CHILD
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/cache-stats', help='URL of the first request')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env.setdefault('MARKET_SNAPSHOT_INTERVAL', '0')
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+    env.setdefault('HISTORY_STORE_PATH', os.path.join(tmp, 'history.sqlite'))
+    env.setdefault('LLM_CACHE_PATH', os.path.join(tmp, 'llm_cache.sqlite'))
+
+    results = [run_once(args.path, env) for _ in range(args.runs)]
+    print(f"{'phase':>14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for phase in ('import', 'create_app', 'first_request'):
+        values = [r[phase] * 1000 for r in results]
+        print(f"{phase:>14} {statistics.median(values):10.1f} {min(values):8.1f} {max(values):8.1f}")
+    total = statistics.median(sum(r[p] for p in ('import', 'create_app', 'first_request')) for r in results)
+    print(f"{'total':>14} {total * 1000:10.1f}")
+    print(f"first request status: {results[-1]['status']}")
+    print(f"heavy modules loaded at startup: {', '.join(results[-1]['loaded_at_start']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
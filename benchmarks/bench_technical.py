@@ -0,0 +1,77 @@
+"""
+Benchmark: RSI + MACD as read by get_technical_analysis.
+
+Compares the old path (calculate_rsi + calculate_macd, each copying the
+OHLCV frame) with the fused calculate_latest_indicators, which reads the
+Close prices once. Reports time per call and memory allocated per call,
+and checks that both give the same values.
+
+Run from the project root:
+
+    python benchmarks/bench_technical.py
+    python benchmarks/bench_technical.py --days 60 252 --calls 2000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MARKET_SNAPSHOT_INTERVAL', '0')
+
+import numpy as np
+
+from app.services.analysis_service import AnalysisService
+from app.services.price_provider import FakePriceProvider
+
+
+def copy_path(data):
+    rsi = AnalysisService.calculate_rsi(data)['RSI'].iloc[-1]
+    macd = AnalysisService.calculate_macd(data)['MACD'].iloc[-1]
+    return rsi, macd
+
+
+def fused_path(data):
+    indicators = AnalysisService.calculate_latest_indicators(data['Close'])
+    return indicators['rsi'], indicators['macd']
+
+
+def measure(func, frames, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(frames[i % len(frames)])
+    per_call = (time.perf_counter() - start) / calls
+
+    tracemalloc.start()
+    func(frames[0])
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    func(frames[1 % len(frames)])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, nargs='+', default=[60, 252])
+    parser.add_argument('--calls', type=int, default=1000)
+    args = parser.parse_args()
+
+    provider = FakePriceProvider()
+    print(f"{'bars':>5} {'copy us/call':>13} {'fused us/call':>14} {'copy KiB':>9} {'fused KiB':>10} {'speedup':>8}")
+    for days in args.days:
+        frames = [provider.history(f"T{i}", period=f"{days}d") for i in range(50)]
+        for data in frames:
+            expected, got = copy_path(data), fused_path(data)
+            assert np.allclose(expected, got, equal_nan=True), (expected, got)
+
+        t_copy, mem_copy = measure(copy_path, frames, args.calls)
+        t_fused, mem_fused = measure(fused_path, frames, args.calls)
+        print(f"{days:>5} {t_copy * 1e6:13.1f} {t_fused * 1e6:14.1f} "
+              f"{mem_copy / 1024:9.1f} {mem_fused / 1024:10.1f} {t_copy / t_fused:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
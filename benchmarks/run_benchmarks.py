@@ -0,0 +1,264 @@
+"""
+Offline benchmark suite for the hot routes and the core service functions.
+
+The app is booted against temporary SQLite files with FakePriceProvider,
+FakeLLMClient and a local stub of the REST providers (stub_http.py), so
+runs are deterministic and need no network. A user with a portfolio and
+a watchlist is created and logged in. Route URLs are built with url_for.
+
+Every case is run once to warm caches, then timed for --iterations runs
+(p50, p95 and mean in ms); one extra run under tracemalloc gives the peak
+Python memory. Results are written as JSON. With a baseline file, a case
+fails when its p95 exceeds the baseline by more than --tolerance (and by
+more than --min-delta-ms, to ignore noise on fast cases), when its peak
+memory exceeds the baseline by more than --memory-tolerance, or when it
+does not answer 200 (--update-baseline refuses to record such a run, so a
+broken page cannot hide in the baseline). The exit status is 1 on any
+regression.
+
+Run from the project root:
+
+    python benchmarks/run_benchmarks.py --update-baseline
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --only routes --iterations 50 --output /tmp/results.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp(prefix='aksjeradar-bench-')
+for key, value in {
+    'MARKET_SNAPSHOT_INTERVAL': '0',
+    'DATABASE_URL': f"sqlite:///{os.path.join(TMP, 'bench.db')}",
+    'HISTORY_STORE_PATH': os.path.join(TMP, 'history.sqlite'),
+    'LLM_CACHE_PATH': os.path.join(TMP, 'llm_cache.sqlite'),
+    'FX_STORE_PATH': os.path.join(TMP, 'fx.sqlite'),
+    'INDICATOR_STATE_PATH': os.path.join(TMP, 'indicator_state.json'),
+    'TICKER_REGISTRY_PATH': os.path.join(TMP, 'tickers.json'),
+}.items():
+    os.environ[key] = value
+
+from flask import url_for
+
+from app import create_app, db, init_db
+from app.models.portfolio import Portfolio, PortfolioStock
+from app.models.stock import Watchlist, WatchlistStock
+from app.models.user import User
+from app.services.ai_service import AIService
+from app.services.analysis_service import AnalysisService
+from app.services.data_service import DataService
+from app.services.indicator_engine import IndicatorEngine
+from app.services.llm_client import FakeLLMClient
+from app.services.price_provider import FakePriceProvider
+from stub_http import StubServer
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'latest.json')
+
+HOLDINGS = ['EQNR.OL', 'DNB.OL', 'NHY.OL', 'AAPL', 'MSFT', 'NVDA', 'MOWI.OL', 'TEL.OL']
+WATCHLIST = ['EQNR.OL', 'AAPL', 'TSLA', 'KOG.OL', 'BTC-USD']
+
+
+def seed(app):
+    """Create a user with a portfolio and a watchlist; returns (user_id, portfolio_id)"""
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        portfolio = Portfolio(name='Benchmark', user_id=user.id)
+        watchlist = Watchlist(name='Benchmark', user_id=user.id)
+        db.session.add_all([portfolio, watchlist])
+        db.session.commit()
+        db.session.add_all([PortfolioStock(portfolio_id=portfolio.id, ticker=t, shares=10 + i, average_price=100)
+                            for i, t in enumerate(HOLDINGS)])
+        db.session.add_all([WatchlistStock(watchlist_id=watchlist.id, ticker=t) for t in WATCHLIST])
+        db.session.commit()
+        return user.id, portfolio.id
+
+
+def route_cases(app, client, portfolio_id):
+    with app.test_request_context():
+        urls = {
+            'route:/': url_for('main.index'),
+            'route:/stocks/': url_for('stocks.index'),
+            'route:/analysis/': url_for('analysis.index'),
+            'route:/analysis/technical': url_for('analysis.technical'),
+            'route:/analysis/prediction': url_for('analysis.prediction'),
+            'route:/portfolio/': url_for('portfolio.index'),
+            'route:/portfolio/<id>': url_for('portfolio.view', id=portfolio_id),
+            'route:/portfolio/watchlist': url_for('portfolio.watchlist'),
+            'route:/stocks/<ticker>': url_for('stocks.stock_detail', ticker='EQNR.OL'),
+        }
+    return {name: (lambda url=url: client.get(url).status_code) for name, url in urls.items()}
+
+
+def function_cases():
+    registry = DataService.get_ticker_registry()
+    universe = registry.symbols('oslo') + registry.symbols('global')
+    frames, _ = DataService.get_history_batch(universe, period='1y')
+    close = IndicatorEngine.close_panel(frames)
+    sample = frames['EQNR.OL']
+    return {
+        'DataService.get_history_batch': lambda: DataService.get_history_batch(universe, period='1y'),
+        'DataService.get_latest_prices': lambda: DataService.get_latest_prices(universe),
+        'DataService.get_market_overview': DataService.get_market_overview,
+        'DataService.search_instruments': lambda: DataService.search_instruments('eq', limit=10),
+        'AnalysisService.get_technical_analysis': lambda: AnalysisService.get_technical_analysis('EQNR.OL'),
+        'AnalysisService.technical_analysis_from_data': lambda: AnalysisService.technical_analysis_from_data(sample),
+        'AnalysisService.predict_next_day_price': lambda: AnalysisService.predict_next_day_price('EQNR.OL'),
+        'AnalysisService.analyze_tickers': lambda: AnalysisService.analyze_tickers(universe, include_fundamentals=False),
+        'IndicatorEngine.compute': lambda: IndicatorEngine.compute(close),
+    }
+
+
+def measure(func, iterations):
+    """Warm up once, time `iterations` calls, then one call under tracemalloc (route cases return a status code)"""
+    status = func()
+    # Søppel fra oppvarmingen skal ikke gi en GC-pause midt i målingene
+    gc.collect()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        status = func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    return {
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': latencies[max(0, int(round(len(latencies) * 0.95)) - 1)],
+        'mean_ms': statistics.fmean(latencies),
+        'peak_kib': peak / 1024,
+        'status': status if isinstance(status, int) else 200,
+    }
+
+
+def compare(results, baseline, tolerance, memory_tolerance, min_delta_ms):
+    """List of regression messages (empty if none)"""
+    # En side som feiler måles ikke, uansett hva baseline sier
+    problems = [f"{name}: status {current['status']}" for name, current in results.items()
+                if current['status'] != 200]
+    for name, base in baseline.get('results', {}).items():
+        current = results.get(name)
+        if current is None:
+            problems.append(f"{name}: missing from this run")
+            continue
+        if current['status'] != 200 or base['status'] != 200:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance)
+        if current['p95_ms'] > limit and current['p95_ms'] - base['p95_ms'] > min_delta_ms:
+            problems.append(f"{name}: p95 {current['p95_ms']:.1f} ms > {limit:.1f} ms "
+                            f"(baseline {base['p95_ms']:.1f} ms)")
+        memory_limit = base['peak_kib'] * (1 + memory_tolerance)
+        if current['peak_kib'] > memory_limit and current['peak_kib'] - base['peak_kib'] > 256:
+            problems.append(f"{name}: peak {current['peak_kib']:.0f} KiB > {memory_limit:.0f} KiB "
+                            f"(baseline {base['peak_kib']:.0f} KiB)")
+    return problems
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--only', choices=['routes', 'functions'], help='run only one group')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='results file (JSON)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 increase (share)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='allowed peak memory increase')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore p95 increases below this')
+    args = parser.parse_args()
+
+    DataService.set_price_provider(FakePriceProvider())
+    AIService.set_llm_client(FakeLLMClient())
+    app = create_app()
+    init_db(app)
+    # Feilende sider vises med status i tabellen; tracebackene ville druknet den
+    app.logger.setLevel(logging.CRITICAL)
+    user_id, portfolio_id = seed(app)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    cases = {}
+    with StubServer() as stub:
+        DataService.coingecko.base_url = stub.url
+        DataService.fx_api.base_url = stub.url
+        if args.only != 'functions':
+            cases.update(route_cases(app, client, portfolio_id))
+        if args.only != 'routes':
+            cases.update(function_cases())
+
+        results = {}
+        print(f"{'case':<46} {'p50 ms':>9} {'p95 ms':>9} {'peak KiB':>10} {'status':>7}")
+        for name, func in cases.items():
+            try:
+                with app.app_context():
+                    result = measure(func, args.iterations)
+            except Exception as e:
+                print(f"Error benchmarking {name}: {e}")
+                result = {'p50_ms': None, 'p95_ms': None, 'mean_ms': None, 'peak_kib': None, 'status': 'error'}
+                results[name] = result
+                continue
+            results[name] = result
+            print(f"{name:<46} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+                  f"{result['peak_kib']:10.0f} {result['status']:>7}")
+
+    data = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    write_json(args.output, data)
+    print(f"results written to {args.output}")
+
+    if args.update_baseline:
+        failing = [name for name, result in results.items() if result['status'] != 200]
+        if failing:
+            print(f"baseline not written: {', '.join(failing)} did not answer 200")
+            return 1
+        write_json(args.baseline, data)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print('no baseline to compare against (run with --update-baseline to create one)')
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if args.only:
+        prefix = 'route:' if args.only == 'routes' else ''
+        baseline['results'] = {name: r for name, r in baseline['results'].items()
+                               if name.startswith('route:') == bool(prefix)}
+    problems = compare(results, baseline, args.tolerance, args.memory_tolerance, args.min_delta_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print(f"{len(problems)} regression(s) against {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Local stub of the external REST providers (CoinGecko, exchangerate.host).
+
+StubServer runs a threaded HTTP/1.1 server on 127.0.0.1 with canned JSON
+for /simple/price and /timeseries. `latency` delays every response and
+`fail_rate` answers that share of requests with 503, so pooling and
+retries can be measured without network access. New TCP connections
+and requests are counted. respond() queues a fixed answer (status,
+headers, delay) for the next request, so tests can script a 429 with
+Retry-After or a reply slower than the client's timeout.
+
+    with StubServer(latency=0.005, fail_rate=0.1) as stub:
+        client = ProviderHTTPClient('stub', stub.url)
+"""
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _timeseries(query):
+    start = date.fromisoformat(query.get('start_date', [date.today().isoformat()])[0])
+    end = date.fromisoformat(query.get('end_date', [date.today().isoformat()])[0])
+    symbols = query.get('symbols', ['NOK,EUR'])[0].split(',')
+    rates = {}
+    day = start
+    while day <= end:
+        rates[day.isoformat()] = {s: 10.0 + (day.toordinal() % 7) * 0.01 for s in symbols}
+        day += timedelta(days=1)
+    return {'success': True, 'timeseries': True, 'base': 'USD', 'rates': rates}
+
+
+def _simple_price(query):
+    ids = query.get('ids', ['bitcoin'])[0].split(',')
+    return {coin: {'usd': 100.0 + i, 'usd_24h_change': 1.5 - i} for i, coin in enumerate(ids)}
+
+
+ROUTES = {'/timeseries': _timeseries, '/simple/price': _simple_price}
+
+
+class StubServer:
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.connections = 0
+        self.requests = 0
+        self._scripted = deque()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headere og body skrives hver for seg; uten dette gir keep-alive 40 ms forsinket ACK
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    fail = stub._rng.random() < stub.fail_rate
+                    scripted = stub._scripted.popleft() if stub._scripted else None
+                delay, headers = stub.latency, {}
+                if scripted is not None:
+                    status, headers, delay = scripted
+                if delay:
+                    time.sleep(delay)
+                parsed = urlparse(self.path)
+                route = ROUTES.get(parsed.path)
+                if scripted is not None and status != 200:
+                    body = b'{}'
+                elif fail or route is None:
+                    status, body = (503 if fail else 404), b'{}'
+                else:
+                    status, body = 200, json.dumps(route(parse_qs(parsed.query))).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, status, headers=None, delay=0.0):
+        """Queue a status, headers and delay for the next request"""
+        with self._lock:
+            self._scripted.append((status, dict(headers or {}), delay))
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
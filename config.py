@@ -2,9 +2,80 @@ from dotenv import load_dotenv
 load_dotenv()
 import os
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///users.id'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # OpenAI API key for AI analysis (optional)
-    OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
\ No newline at end of file
+    OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    # Cache for markedsoversikter (sekunder per aktivaklasse)
+    QUOTE_CACHE_TTL_OSLO = int(os.environ.get('QUOTE_CACHE_TTL_OSLO', 60))
+    QUOTE_CACHE_TTL_GLOBAL = int(os.environ.get('QUOTE_CACHE_TTL_GLOBAL', 300))
+    QUOTE_CACHE_TTL_CRYPTO = int(os.environ.get('QUOTE_CACHE_TTL_CRYPTO', 60))
+    QUOTE_CACHE_TTL_FX = int(os.environ.get('QUOTE_CACHE_TTL_FX', 3600))
+    # Hvor lenge utløpte verdier kan serveres mens de oppdateres i bakgrunnen
+    QUOTE_CACHE_MAX_STALE = int(os.environ.get('QUOTE_CACHE_MAX_STALE', 600))
+    # Sekunder mellom hver bakgrunnsoppdatering av markedsoversikten (0 = av)
+    MARKET_SNAPSHOT_INTERVAL = int(os.environ.get('MARKET_SNAPSHOT_INTERVAL', 60))
+    # SSE-strøm av kursendringer: kø per klient (fulle køer kobles fra) og sekunder mellom ping
+    QUOTE_STREAM_QUEUE_SIZE = int(os.environ.get('QUOTE_STREAM_QUEUE_SIZE', 256))
+    QUOTE_STREAM_HEARTBEAT = float(os.environ.get('QUOTE_STREAM_HEARTBEAT', 15))
+    # Parallell henting av Oslo Børs-data (.info) i oversikten
+    OSLO_INFO_MAX_WORKERS = int(os.environ.get('OSLO_INFO_MAX_WORKERS', 8))
+    OSLO_INFO_TIMEOUT = float(os.environ.get('OSLO_INFO_TIMEOUT', 10))
+    OSLO_OVERVIEW_TIMEOUT = float(os.environ.get('OSLO_OVERVIEW_TIMEOUT', 30))
+    # Tråder i bassenget alle parallelle kall deler; kall som henger kan aldri bli flere enn dette
+    FAN_OUT_MAX_THREADS = int(os.environ.get('FAN_OUT_MAX_THREADS', 32))
+    # Lokal historikk (OHLCV) i SQLite; bare nye dager hentes fra Yahoo
+    HISTORY_STORE_ENABLED = os.environ.get('HISTORY_STORE_ENABLED', '1') == '1'
+    HISTORY_STORE_PATH = os.environ.get('HISTORY_STORE_PATH') or os.path.join(basedir, 'instance', 'history.sqlite')
+    HISTORY_REFRESH_INTERVAL = int(os.environ.get('HISTORY_REFRESH_INTERVAL', 900))
+    HISTORY_BACKFILL_PERIOD = os.environ.get('HISTORY_BACKFILL_PERIOD', '2y')
+    # Løpende indikatorer (RSI, MACD, snitt) per ticker, lagret mellom omstarter
+    INDICATOR_STATE_PATH = os.environ.get('INDICATOR_STATE_PATH') or os.path.join(basedir, 'instance', 'indicator_state.json')
+    # Bakgrunnsjobber for AI-analyser (antall arbeidere, sekunder et resultat gjenbrukes)
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', 4))
+    AI_JOB_RESULT_TTL = int(os.environ.get('AI_JOB_RESULT_TTL', 900))
+    # ML-modellen for tips lastes først når den trengs
+    ML_MODEL_PATH = os.environ.get('ML_MODEL_PATH') or os.path.join(basedir, 'stock_tip_model.pkl')
+    # Lokal cache for svar fra språkmodellen (standard: én handelsdag)
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', '1') == '1'
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH') or os.path.join(basedir, 'instance', 'llm_cache.sqlite')
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 8 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 2000))
+    # Eksterne REST-kilder: delt tilkoblingspool per leverandør, antall nye forsøk og backoff (sekunder)
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 0.3))
+    HTTP_MAX_BACKOFF = float(os.environ.get('HTTP_MAX_BACKOFF', 5))
+    COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+    COINGECKO_TIMEOUT = float(os.environ.get('COINGECKO_TIMEOUT', 10))
+    FX_API_URL = os.environ.get('FX_API_URL', 'https://api.exchangerate.host')
+    FX_API_TIMEOUT = float(os.environ.get('FX_API_TIMEOUT', 10))
+    # Tickeruniverset med metadata (navn, børs, valuta, sektor); oppdateres med `flask refresh-tickers`
+    TICKER_REGISTRY_PATH = os.environ.get('TICKER_REGISTRY_PATH') or os.path.join(basedir, 'instance', 'tickers.json')
+    # Tickere uten navn i registeret hentes i bakgrunnen ved første oppslag; nytt forsøk etter (sekunder)
+    TICKER_METADATA_RETRY = int(os.environ.get('TICKER_METADATA_RETRY', 3600))
+    # Kretsbryter per leverandør: åpner ved feilandel over terskel i vinduet (sekunder), prøver igjen etter OPEN_FOR
+    PROVIDER_BREAKER_FAILURE_RATIO = float(os.environ.get('PROVIDER_BREAKER_FAILURE_RATIO', 0.5))
+    PROVIDER_BREAKER_MIN_CALLS = int(os.environ.get('PROVIDER_BREAKER_MIN_CALLS', 10))
+    PROVIDER_BREAKER_WINDOW = int(os.environ.get('PROVIDER_BREAKER_WINDOW', 60))
+    PROVIDER_BREAKER_OPEN_FOR = int(os.environ.get('PROVIDER_BREAKER_OPEN_FOR', 30))
+    # Tickere som feiler hoppes over med dobling av ventetiden (sekunder), opp til maks
+    SYMBOL_BACKOFF_BASE = int(os.environ.get('SYMBOL_BACKOFF_BASE', 300))
+    SYMBOL_BACKOFF_MAX = int(os.environ.get('SYMBOL_BACKOFF_MAX', 6 * 3600))
+    # Lokale valutakurser (USD-basert, én rad per dag); krysskurser regnes ut lokalt
+    FX_STORE_PATH = os.environ.get('FX_STORE_PATH') or os.path.join(basedir, 'instance', 'fx.sqlite')
+    FX_CURRENCIES = os.environ.get('FX_CURRENCIES', 'NOK,EUR,SEK,GBP,DKK,CHF,JPY').split(',')
+    FX_OVERVIEW_PAIRS = os.environ.get('FX_OVERVIEW_PAIRS', 'USD/NOK,USD/EUR,USD/SEK,USD/GBP,EUR/NOK,GBP/NOK,NOK/SEK').split(',')
+    FX_REFRESH_INTERVAL = int(os.environ.get('FX_REFRESH_INTERVAL', 3600))
+    FX_BACKFILL_DAYS = int(os.environ.get('FX_BACKFILL_DAYS', 30))
+    # Tidsfordeling per forespørsel (eksterne kall, database, maler) i Server-Timing-headeren;
+    # sendes bare til innloggede brukere
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', '0') == '1'
+    # /metrics krever 'Authorization: Bearer <token>'; uten token bare fra localhost i debug-modus
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Brukernavn (kommaseparert) som får bruke /admin-sidene; tom liste betyr ingen
+    ADMIN_USERS = [u.strip() for u in os.environ.get('ADMIN_USERS', '').split(',') if u.strip()]
@@ -1,6 +1,9 @@
-from app import app
+from app import create_app, init_db
+
+app = create_app()
 
 if __name__ == "__main__":
     import os
+    init_db(app)
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
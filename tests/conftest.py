@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Lagring i midlertidige filer og ingen bakgrunnstråd, før app-modulene leser Config
+TMP = tempfile.mkdtemp(prefix='aksjeradar-tests-')
+for key, value in {
+    'MARKET_SNAPSHOT_INTERVAL': '0',
+    'DATABASE_URL': f"sqlite:///{os.path.join(TMP, 'test.db')}",
+    'HISTORY_STORE_PATH': os.path.join(TMP, 'history.sqlite'),
+    'LLM_CACHE_PATH': os.path.join(TMP, 'llm_cache.sqlite'),
+    'FX_STORE_PATH': os.path.join(TMP, 'fx.sqlite'),
+    'INDICATOR_STATE_PATH': os.path.join(TMP, 'indicator_state.json'),
+    'TICKER_REGISTRY_PATH': os.path.join(TMP, 'tickers.json'),
+}.items():
+    os.environ[key] = value
@@ -0,0 +1,58 @@
+import pytest
+
+from app import create_app, db, init_db
+from app.models.user import User
+from app.services.ai_jobs import AIJobQueue
+from app.services.ai_service import AIService
+
+
+def test_owners_accumulate_on_a_shared_job():
+    queue = AIJobQueue(max_workers=1)
+    first = queue.submit('kind', ['A', 'B'], lambda: {'ok': True}, owner=1)
+    second = queue.submit('kind', ['A', 'B'], lambda: {'ok': True}, owner=2)
+    anonymous = queue.submit('kind', ['A', 'B'], lambda: {'ok': True})
+
+    assert first is second is anonymous
+    assert first.owned_by(1) and first.owned_by(2)
+    assert not first.owned_by(None) and not first.owned_by(3)
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    init_db(app)
+    return app
+
+
+def login(app, client, username):
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            user = User(username=username, email=f'{username}@example.com')
+            user.set_password(username)
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return user_id
+
+
+def test_job_results_only_for_their_owners(app):
+    owner_client, other_client = app.test_client(), app.test_client()
+    owner_id = login(app, owner_client, 'job-owner')
+    login(app, other_client, 'job-other')
+    job = AIService.jobs.submit('test_portfolio', ['EQNR.OL', owner_id], lambda: {'holdings': ['EQNR.OL']},
+                                owner=owner_id)
+    url = f'/ai-jobs/{job.id}'
+
+    assert app.test_client().get(url).status_code == 302
+    assert other_client.get(url).status_code == 404
+    assert owner_client.get(url).json['id'] == job.id
+
+
+def test_ai_stats_needs_login(app):
+    client = app.test_client()
+    assert client.get('/ai-stats').status_code == 302
+    login(app, client, 'job-owner')
+    assert client.get('/ai-stats').status_code == 200
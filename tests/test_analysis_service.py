@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from app.services.analysis_service import AnalysisService
+from app.services.data_service import DataService
+from app.services.price_provider import FakePriceProvider
+
+TICKERS = ['EQNR.OL', 'DNB.OL', 'NHY.OL', 'AAPL', 'MSFT']
+
+
+@pytest.fixture
+def provider():
+    provider = FakePriceProvider(failing=['JUNK.OL'])
+    DataService.set_price_provider(provider)
+    return provider
+
+
+def test_chunked_screen_matches_a_per_ticker_run(provider):
+    result = AnalysisService.analyze_tickers(TICKERS + ['JUNK.OL'], chunk_size=2, max_workers=3,
+                                             include_fundamentals=False)
+
+    index_close = AnalysisService._date_index(DataService.get_stock_data('^OSEAX', period='1y')['Close'])
+    rows = []
+    for ticker in TICKERS:
+        data = DataService.get_stock_data(ticker, period='1y')
+        row = AnalysisService._screen_ticker(ticker, data, index_close, False)
+        assert row['last_price'] == data['Close'].iloc[-1]
+        assert row['volatility'] == AnalysisService.calculate_volatility(data['Close'])
+        rows.append(row)
+    expected = pd.DataFrame(rows)
+
+    pd.testing.assert_frame_equal(result.drop(columns='last_signals'), expected.drop(columns='last_signals'))
+
+
+def test_fundamentals_come_from_the_registry(provider):
+    DataService.refresh_ticker_registry(['EQNR.OL'])
+    info_calls = provider.calls['info']
+
+    result = AnalysisService.analyze_tickers(['EQNR.OL'], include_fundamentals=True)
+
+    assert provider.calls['info'] == info_calls
+    row = result.iloc[0]
+    assert (row['pe_ratio'], row['dividend_yield'], row['market_cap']) == (15.0, 0.02, 1_000_000_000)
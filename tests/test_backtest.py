@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest import BUY, HOLD, SELL, BacktestEngine
+
+N = np.nan
+
+
+def loop_backtest(prices, signals, cost_bps=0.0, long_short=False):
+    """One ticker, one day at a time: the position decided at a close earns the next day's return"""
+    equity, position, last_price, days, trades = 1.0, 0.0, None, 0, 0
+    for day, (price, signal) in enumerate(zip(prices, signals)):
+        if np.isnan(price) and last_price is None:
+            # Ikke børsnotert ennå
+            continue
+        target = position
+        if signal == BUY:
+            target = 1.0
+        elif signal == SELL:
+            target = -1.0 if long_short else 0.0
+        change = price / last_price - 1 if last_price is not None and not np.isnan(price) else 0.0
+        if day > 0:
+            equity *= 1 + position * change - abs(target - position) * cost_bps / 10000.0
+            days += 1
+        if target != position and target != 0:
+            trades += 1
+        position = target
+        if not np.isnan(price):
+            last_price = price
+    return equity - 1, days, trades
+
+
+def run_with(close, signals, **kwargs):
+    return BacktestEngine.run(close, rule=lambda ind: signals, indicators={}, **kwargs)
+
+
+@pytest.fixture
+def panel():
+    index = pd.bdate_range('2024-01-01', periods=8)
+    close = pd.DataFrame({
+        'EQNR.OL': [100, 102, 101, 105, 107, 104, 108, 110],
+        # Notert fra dag 3, og uten kurs på dag 5
+        'LATE.OL': [N, N, N, 50, 52, N, 49, 53],
+    }, index=index, dtype=float)
+    signals = np.array([
+        [N, N],
+        [BUY, N],
+        [HOLD, N],
+        [N, BUY],
+        [SELL, HOLD],
+        [BUY, HOLD],
+        [HOLD, SELL],
+        [SELL, N],
+    ])
+    return close, signals
+
+
+@pytest.mark.parametrize('long_short', [False, True])
+@pytest.mark.parametrize('cost_bps', [0.0, 25.0])
+def test_run_matches_a_per_ticker_loop(panel, cost_bps, long_short):
+    close, signals = panel
+
+    result = run_with(close, signals, cost_bps=cost_bps, long_short=long_short)
+
+    per_ticker = result['per_ticker']
+    for j, ticker in enumerate(close.columns):
+        total, days, trades = loop_backtest(close[ticker].to_numpy(), signals[:, j], cost_bps, long_short)
+        assert per_ticker.loc[ticker, 'total_return'] == pytest.approx(total)
+        assert per_ticker.loc[ticker, 'days'] == days
+        assert per_ticker.loc[ticker, 'trades'] == trades
+
+
+def test_late_listing_and_gaps_add_no_returns(panel):
+    close, signals = panel
+
+    per_ticker = run_with(close, signals, cost_bps=0.0)['per_ticker']
+
+    # Kjøpt ved notering (50), tom dag holder 52, solgt på 49
+    assert per_ticker.loc['LATE.OL', 'total_return'] == pytest.approx(49 / 50 - 1)
+    assert per_ticker.loc['LATE.OL', 'buy_hold_return'] == pytest.approx(53 / 50 - 1)
+
+
+def test_costs_are_charged_per_unit_of_turnover(panel):
+    close, signals = panel
+
+    free = run_with(close, signals, cost_bps=0.0, long_short=True)['per_ticker']
+    costly = run_with(close, signals, cost_bps=100.0, long_short=True)['per_ticker']
+
+    # EQNR.OL: inn (1), ut til short (2), long (2), short (2) = 7 enheter omsetning
+    total, _, _ = loop_backtest(close['EQNR.OL'].to_numpy(), signals[:, 0], 100.0, long_short=True)
+    assert costly.loc['EQNR.OL', 'total_return'] == pytest.approx(total)
+    assert costly.loc['EQNR.OL', 'total_return'] < free.loc['EQNR.OL', 'total_return']
+
+
+def test_signal_earns_only_the_following_days():
+    index = pd.bdate_range('2024-01-01', periods=4)
+    close = pd.DataFrame({'X': [100.0, 200.0, 220.0, 220.0]}, index=index)
+    # Kjøpssignal på dagen med hoppet: hoppet selv skal ikke tjenes
+    signals = np.array([[N], [BUY], [HOLD], [HOLD]])
+
+    per_ticker = run_with(close, signals, cost_bps=0.0)['per_ticker']
+
+    assert per_ticker.loc['X', 'total_return'] == pytest.approx(0.1)
+
+
+def test_future_prices_do_not_change_past_results():
+    rng = np.random.default_rng(1)
+    index = pd.bdate_range('2023-01-02', periods=300)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (300, 3)), axis=0)),
+                         index=index, columns=['A', 'B', 'C'])
+    changed = close.copy()
+    changed.iloc[200:] *= rng.uniform(0.5, 1.5, (100, 3))
+
+    before = BacktestEngine.run(close)['equity']
+    after = BacktestEngine.run(changed)['equity']
+
+    pd.testing.assert_series_equal(before.iloc[:200], after.iloc[:200])
+    assert not before.iloc[200:].equals(after.iloc[200:])
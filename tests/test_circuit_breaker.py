@@ -0,0 +1,158 @@
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from app.services.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, GuardedPriceProvider,
+                                          SymbolBackoffError)
+from app.services.http_client import ProviderHTTPClient, ProviderHTTPError
+from app.services.price_provider import PriceProvider
+
+OPEN_FOR = 0.05
+
+
+def open_breaker(**options):
+    breaker = CircuitBreaker('test', min_calls=2, open_for=OPEN_FOR, **options)
+    breaker.record(False)
+    breaker.record(False)
+    return breaker
+
+
+def test_opens_at_failure_ratio_after_min_calls():
+    breaker = CircuitBreaker('test', failure_ratio=0.5, min_calls=4)
+    for ok in (False, True, False):
+        breaker.record(ok)
+    assert breaker.state == CLOSED
+    breaker.record(True)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = open_breaker()
+    time.sleep(OPEN_FOR)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_trial_success_closes():
+    breaker = open_breaker()
+    time.sleep(OPEN_FOR)
+    breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_trial_failure_reopens():
+    breaker = open_breaker()
+    time.sleep(OPEN_FOR)
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert breaker.stats()['times_opened'] == 2
+    assert not breaker.allow()
+
+
+def test_unrecorded_trial_is_replaced():
+    breaker = open_breaker()
+    time.sleep(OPEN_FOR)
+    assert breaker.allow()
+    time.sleep(OPEN_FOR)
+    assert breaker.allow()
+
+
+class FakeSession:
+    """Answers GETs with the given status codes in turn"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response.url = url
+        response._content = b'{}'
+        return response
+
+
+def client_with(statuses):
+    breaker = CircuitBreaker('stub', min_calls=2, open_for=OPEN_FOR)
+    client = ProviderHTTPClient('stub', 'http://stub.invalid', retries=0, breaker=breaker)
+    client.session = FakeSession(statuses)
+    return client, breaker
+
+
+def test_client_error_on_trial_closes_circuit():
+    client, breaker = client_with([503, 503, 404, 200])
+    for _ in range(2):
+        with pytest.raises(ProviderHTTPError):
+            client.get('x')
+    assert breaker.state == OPEN
+    time.sleep(OPEN_FOR)
+
+    with pytest.raises(ProviderHTTPError) as error:
+        client.get('x')
+    assert error.value.status == 404
+    assert breaker.state == CLOSED
+    assert client.get('x').status_code == 200
+
+
+def test_unexpected_error_on_trial_reopens_circuit():
+    client, breaker = client_with([503, 503])
+    for _ in range(2):
+        with pytest.raises(ProviderHTTPError):
+            client.get('x')
+    time.sleep(OPEN_FOR)
+
+    with pytest.raises(IndexError):
+        client.get('x')
+    assert breaker.state == OPEN
+
+
+class EmptyProvider(PriceProvider):
+    """Answers every ticker without data, like a delisted symbol"""
+    name = 'empty'
+
+    def __init__(self, error=None):
+        self.error = error
+
+    def history(self, ticker, period='1y', start=None):
+        if self.error:
+            raise self.error
+        return pd.DataFrame()
+
+    def info(self, ticker):
+        return {'shortName': ticker}
+
+
+def test_missing_data_backs_off_the_symbol_but_not_the_provider():
+    breaker = CircuitBreaker('empty', min_calls=2)
+    provider = GuardedPriceProvider(EmptyProvider(), breaker=breaker)
+
+    for ticker in ('GONE1.OL', 'GONE2.OL', 'GONE3.OL'):
+        assert provider.history(ticker).empty
+    assert provider.info('GONE4.OL') == {'shortName': 'GONE4.OL'}
+    frames, failures = provider.history_batch(['GONE5.OL', 'GONE6.OL'])
+
+    assert frames == {}
+    assert set(failures) == {'GONE5.OL', 'GONE6.OL'}
+    assert breaker.state == CLOSED
+    assert breaker.stats()['failures_in_window'] == 0
+    assert len(provider.symbols.snapshot()) == 6
+    with pytest.raises(SymbolBackoffError):
+        provider.history('GONE1.OL')
+
+
+def test_raised_errors_open_the_circuit():
+    breaker = CircuitBreaker('empty', min_calls=2)
+    provider = GuardedPriceProvider(EmptyProvider(error=ConnectionError('down')), breaker=breaker)
+
+    for ticker in ('EQNR.OL', 'DNB.OL'):
+        with pytest.raises(ConnectionError):
+            provider.history(ticker)
+
+    assert breaker.state == OPEN
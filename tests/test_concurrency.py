@@ -0,0 +1,56 @@
+import threading
+import time
+
+from app.services.concurrency import fan_out
+from config import Config
+
+
+def test_results_keep_item_order():
+    outcomes = fan_out(lambda n: n * 2, range(50), max_workers=4)
+    assert outcomes == [(n * 2, None) for n in range(50)]
+
+
+def test_errors_are_returned_per_item():
+    def func(n):
+        if n == 2:
+            raise ValueError('bad')
+        return n
+
+    outcomes = fan_out(func, range(4))
+    assert [result for result, _ in outcomes] == [0, 1, None, 3]
+    assert isinstance(outcomes[2][1], ValueError)
+
+
+def test_hung_calls_do_not_add_threads():
+    release = threading.Event()
+
+    def hang(n):
+        release.wait(5)
+        return n
+
+    try:
+        for _ in range(10):
+            outcomes = fan_out(hang, range(4), max_workers=4, item_timeout=0.05)
+            assert all(isinstance(error, TimeoutError) for _, error in outcomes)
+        workers = [t for t in threading.enumerate() if t.name.startswith('fan-out')]
+        assert len(workers) <= Config.FAN_OUT_MAX_THREADS
+    finally:
+        release.set()
+
+
+def test_batch_timeout_gives_up_items_not_started():
+    started = []
+
+    def slow(n):
+        started.append(n)
+        time.sleep(0.2)
+        return n
+
+    outcomes = fan_out(slow, range(10), max_workers=1, batch_timeout=0.05)
+    assert all(isinstance(error, TimeoutError) for _, error in outcomes)
+    assert len(started) <= 2
+
+
+def test_nested_fan_out_runs_in_the_worker():
+    outcomes = fan_out(lambda n: fan_out(lambda m: m + n, range(3)), range(3), max_workers=2)
+    assert [result for result, _ in outcomes] == [[(m + n, None) for m in range(3)] for n in range(3)]
@@ -0,0 +1,52 @@
+import pytest
+
+from app import create_app, db, init_db
+from app.models.user import User
+from app.services.data_service import DataService
+
+# Diagnostikk som viser leverandører, nøkler og feil skal bare vises innloggede brukere
+DIAGNOSTICS = ['/memo-stats', '/api/stream/stats', '/http-stats']
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    init_db(app)
+    return app
+
+
+def login(app, client):
+    with app.app_context():
+        user = User.query.filter_by(username='diagnostics').first()
+        if user is None:
+            user = User(username='diagnostics', email='diagnostics@example.com')
+            user.set_password('diagnostics')
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+
+@pytest.mark.parametrize('url', DIAGNOSTICS)
+def test_diagnostics_need_login(app, url):
+    client = app.test_client()
+    assert client.get(url).status_code == 302
+    login(app, client)
+    assert client.get(url).status_code == 200
+
+
+def test_provider_admin_needs_an_admin_user(app, monkeypatch):
+    resets = []
+    monkeypatch.setattr(DataService, 'reset_failing_symbol', resets.append)
+    client = app.test_client()
+    login(app, client)
+
+    assert client.get('/admin/providers').status_code == 403
+    assert client.post('/admin/providers/reset', data={'ticker': 'EQNR.OL'}).status_code == 403
+    assert resets == []
+
+    app.config['ADMIN_USERS'] = ['diagnostics']
+    assert client.get('/admin/providers').status_code == 200
+    assert client.post('/admin/providers/reset', data={'ticker': 'EQNR.OL'}).status_code == 302
+    assert resets == ['EQNR.OL']
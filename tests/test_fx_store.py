@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from app.services.fx_store import FakeFXRateSource, FXStore, instrument_currency
+from app.services.ticker_registry import static_meta
+
+
+class RecordingSource(FakeFXRateSource):
+    def __init__(self, missing=()):
+        super().__init__()
+        self.missing = set(missing)
+        self.requests = []
+
+    def daily_rates(self, start, end, currencies):
+        self.requests.append((start, end))
+        rates = super().daily_rates(start, end, currencies)
+        return {day: row for day, row in rates.items() if day not in self.missing}
+
+
+def make_store(tmp_path, source=None, **kwargs):
+    return FXStore(str(tmp_path / 'fx.sqlite'), source or RecordingSource(), ['NOK', 'EUR'], **kwargs)
+
+
+def test_share_class_suffix_is_not_a_currency():
+    assert instrument_currency('BRK-B') == 'USD'
+    assert static_meta('BRK-B', 'global').currency == 'USD'
+
+
+def test_currency_from_exchange_or_pair():
+    assert instrument_currency('EQNR.OL') == 'NOK'
+    assert instrument_currency('VOLV-B.ST') == 'SEK'
+    assert instrument_currency('BTC-EUR') == 'EUR'
+    assert instrument_currency('DOGE-USDT', asset_class='crypto') == 'USDT'
+    assert instrument_currency('AAPL') == 'USD'
+
+
+def test_sync_fetches_from_the_last_stored_day(tmp_path):
+    store = make_store(tmp_path, backfill_days=5)
+
+    assert store.sync(today=date(2024, 3, 10), force=True) == 6
+    assert store.sync(today=date(2024, 3, 12), force=True) == 3
+
+    assert store.source.requests == [(date(2024, 3, 5), date(2024, 3, 10)),
+                                     (date(2024, 3, 10), date(2024, 3, 12))]
+    assert store.last_date() == date(2024, 3, 12)
+    assert store.stats()['days'] == 8
+
+
+def test_sync_waits_for_the_refresh_interval(tmp_path):
+    store = make_store(tmp_path, refresh_interval=3600)
+
+    assert store.sync(today=date(2024, 3, 10)) > 0
+    assert store.sync(today=date(2024, 3, 11)) == 0
+    assert store.source.calls == 1
+
+    store.refresh_interval = 0
+    assert store.sync(today=date(2024, 3, 11)) == 2
+    assert store.source.calls == 2
+
+
+def test_cross_rates_come_from_the_usd_vector(tmp_path):
+    store = make_store(tmp_path)
+    store.sync(today=date(2024, 3, 10), force=True)
+    vector = store.vector('2024-03-10')
+
+    assert store.cross('EUR', 'NOK') == pytest.approx(vector['NOK'] / vector['EUR'])
+    assert store.cross('NOK', 'USD') == pytest.approx(1 / vector['NOK'])
+    assert store.convert(100, 'EUR', 'NOK') == pytest.approx(100 * vector['NOK'] / vector['EUR'])
+    assert store.cross('EUR', 'GBP') is None
+
+
+def test_overview_change_is_against_the_prior_stored_day(tmp_path):
+    # Helg uten kurser: dagen før mandag 11. mars er fredag 8. mars
+    source = RecordingSource(missing={'2024-03-09', '2024-03-10'})
+    store = make_store(tmp_path, source, backfill_days=3)
+    store.sync(today=date(2024, 3, 11), force=True)
+
+    row = store.overview(['EUR/NOK'])['EUR/NOK']
+
+    latest, prior = store.vector('2024-03-11'), store.vector('2024-03-08')
+    price, prev = latest['NOK'] / latest['EUR'], prior['NOK'] / prior['EUR']
+    assert row['date'] == '2024-03-11'
+    assert row['prior_date'] == '2024-03-08'
+    assert row['last_price'] == pytest.approx(price)
+    assert row['change'] == pytest.approx(price - prev)
+    assert row['change_percent'] == pytest.approx((price - prev) / prev * 100)
+    assert row['signal'] == ('BUY' if price > prev else 'SELL')
@@ -0,0 +1,96 @@
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.services.history_store import HistoryStore, parse_period
+from app.services.price_provider import FakePriceProvider
+
+
+class RecordingProvider(FakePriceProvider):
+    """FakePriceProvider that remembers the start date of every fetch"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.starts = []
+
+    def history(self, ticker, period='1y', start=None):
+        self.starts.append((ticker, start))
+        return super().history(ticker, period=period, start=start)
+
+    def history_batch(self, tickers, period='1y', start=None):
+        self.starts.extend((ticker, start) for ticker in tickers)
+        return super().history_batch(tickers, period=period, start=start)
+
+
+@pytest.fixture
+def store_for(tmp_path):
+    def build(provider, **options):
+        return HistoryStore(os.path.join(tmp_path, 'history.sqlite'), provider, **options)
+    return build
+
+
+def test_first_request_backfills_and_later_ones_read_the_store(store_for):
+    provider = RecordingProvider()
+    store = store_for(provider, backfill_period='2y')
+
+    df = store.get('EQNR.OL', period='3mo')
+    assert provider.starts == [('EQNR.OL', parse_period('2y')[0])]
+    assert not df.empty and df.index[0].date() >= parse_period('3mo')[0]
+
+    # Innenfor refresh_interval og dekket av backfill: ingen nye kall
+    assert len(store.get('EQNR.OL', period='1y')) > len(df)
+    assert len(provider.starts) == 1
+
+
+def test_refresh_fetches_from_the_last_stored_day(store_for):
+    provider = RecordingProvider()
+    store = store_for(provider, refresh_interval=0, backfill_period='1y')
+
+    first = store.get('EQNR.OL', period='1y')
+    again = store.get('EQNR.OL', period='1y')
+
+    assert provider.starts[1] == ('EQNR.OL', first.index[-1].date())
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_longer_period_than_covered_backfills_again(store_for):
+    provider = RecordingProvider()
+    store = store_for(provider, backfill_period='1y')
+
+    store.get('EQNR.OL', period='1y')
+    df = store.get('EQNR.OL', period='5y')
+
+    assert provider.starts[-1] == ('EQNR.OL', parse_period('5y')[0])
+    assert df.index[0].date() < parse_period('2y')[0]
+
+
+def test_day_periods_match_the_provider(store_for):
+    provider = RecordingProvider()
+    store = store_for(provider)
+
+    df = store.get('EQNR.OL', period='5d')
+
+    expected = FakePriceProvider().history('EQNR.OL', period='5d')
+    assert list(df.index) == list(expected.index)
+    assert df['Close'].tolist() == pytest.approx(expected['Close'].tolist())
+
+
+def test_stale_ticker_does_not_return_old_bars_as_recent(store_for):
+    provider = RecordingProvider(end=date.today() - timedelta(days=300))
+    store = store_for(provider)
+
+    assert store.get('DELISTED.OL', period='5d').empty
+    assert not store.get('DELISTED.OL', period='2y').empty
+
+
+def test_many_tickers_are_fetched_in_one_batch(store_for):
+    provider = RecordingProvider(failing=['JUNK'])
+    store = store_for(provider)
+
+    frames, failures = store.get_many(['EQNR.OL', 'DNB.OL', 'JUNK'], period='1mo')
+
+    assert provider.calls['history_batch'] == 1
+    assert set(frames) == {'EQNR.OL', 'DNB.OL'}
+    assert set(failures) == {'JUNK'}
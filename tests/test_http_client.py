@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from app.services.http_client import ProviderHTTPClient, ProviderHTTPError
+from benchmarks.stub_http import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def make_client(stub, **kwargs):
+    options = dict(timeout=(1, 1), retries=2, backoff=0.0, max_backoff=1.0)
+    options.update(kwargs)
+    return ProviderHTTPClient('stub', stub.url, **options)
+
+
+def test_requests_reuse_one_pooled_connection(stub):
+    client = make_client(stub)
+
+    for _ in range(5):
+        assert 'rates' in client.get_json('timeseries', params={'symbols': 'NOK'})
+
+    assert stub.requests == 5
+    assert stub.connections == 1
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retry_waits_for_retry_after(stub, status):
+    client = make_client(stub)
+    stub.respond(status, {'Retry-After': '0.2'})
+
+    start = time.perf_counter()
+    response = client.get('simple/price')
+
+    assert response.status_code == 200
+    assert time.perf_counter() - start >= 0.2
+    stats = client.stats()
+    assert stats['retries'] == 1
+    assert stats['statuses'] == {status: 1, 200: 1}
+    assert stats['errors'] == 0
+
+
+def test_not_found_is_not_retried(stub):
+    client = make_client(stub)
+
+    with pytest.raises(ProviderHTTPError) as error:
+        client.get('missing')
+
+    assert error.value.status == 404
+    assert stub.requests == 1
+    assert client.stats()['retries'] == 0
+    assert client.stats()['errors'] == 1
+
+
+def test_timeout_is_retried_and_then_reported(stub):
+    client = make_client(stub, timeout=(1, 0.1), retries=1)
+    stub.respond(200, delay=0.5)
+
+    assert client.get('simple/price').status_code == 200
+    assert client.stats()['retries'] == 1
+
+    stub.respond(200, delay=0.5)
+    stub.respond(200, delay=0.5)
+    with pytest.raises(ProviderHTTPError) as error:
+        client.get('simple/price')
+
+    assert error.value.status is None
+    assert 'Timeout' in str(error.value)
+    assert client.stats()['errors'] == 1
@@ -0,0 +1,96 @@
+import json
+from types import MappingProxyType
+
+import pandas as pd
+import pytest
+
+from app.services.analysis_service import AnalysisService
+from app.services.indicator_state import IndicatorState, IndicatorStateStore
+from app.services.market_snapshot import MarketSnapshot
+from app.services.price_provider import FakePriceProvider
+
+
+def wilder_rsi(close, period=14):
+    """Batch Wilder RSI: simple mean of the first changes, then Wilder smoothing"""
+    delta = close.diff()
+    averages = []
+    for changes in (delta.clip(lower=0), (-delta).clip(lower=0)):
+        seeded = changes.iloc[period:].copy()
+        seeded.iloc[0] = changes.iloc[1:period + 1].mean()
+        averages.append(seeded.ewm(alpha=1 / period, adjust=False).mean())
+    return 100 - 100 / (1 + averages[0] / averages[1])
+
+
+@pytest.fixture
+def data():
+    return FakePriceProvider().history('EQNR.OL', period='2y')
+
+
+def test_incremental_updates_match_batch_indicators(data):
+    seed, new_bars = data.iloc[:300], data.iloc[300:]
+    state = IndicatorState.from_history('EQNR.OL', seed)
+    for day, bar in new_bars.iterrows():
+        values = state.update(bar['Close'], bar['Volume'], date=day)
+
+    macd = AnalysisService.calculate_macd(data).iloc[-1]
+    averages = AnalysisService.calculate_moving_averages(data).iloc[-1]
+    assert values['rsi'] == pytest.approx(wilder_rsi(data['Close']).iloc[-1])
+    assert values['macd'] == pytest.approx(macd['MACD'])
+    assert values['macd_signal'] == pytest.approx(macd['MACD_signal'])
+    assert values['macd_histogram'] == pytest.approx(macd['MACD_histogram'])
+    for period in (20, 50, 200):
+        assert values[f'ma_{period}'] == pytest.approx(averages[f'MA_{period}'])
+    assert values['avg_volume'] == pytest.approx(data['Volume'].rolling(21).mean().iloc[-1])
+    assert state.last_date == str(data.index[-1])[:10]
+
+
+def test_peek_does_not_commit(data):
+    state = IndicatorState.from_history('EQNR.OL', data.iloc[:-1])
+    peeked = state.peek(data['Close'].iloc[-1], data['Volume'].iloc[-1])
+    before = state.to_dict()
+
+    assert state.update(data['Close'].iloc[-1], data['Volume'].iloc[-1]) == pytest.approx(peeked)
+    assert before != state.to_dict()
+
+
+def test_state_survives_the_json_round_trip(data):
+    state = IndicatorState.from_history('EQNR.OL', data.iloc[:-5])
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+
+    for _, bar in data.iloc[-5:].iterrows():
+        expected = state.update(bar['Close'], bar['Volume'])
+        assert restored.update(bar['Close'], bar['Volume']) == pytest.approx(expected)
+
+
+def snapshot_with(prices):
+    rows = {ticker: MappingProxyType({'last_price': price}) for ticker, price in prices.items()}
+    return MarketSnapshot(1, 0.0, MappingProxyType({'oslo_stocks': MappingProxyType(rows)}))
+
+
+def test_store_seeds_once_and_peeks_each_snapshot(tmp_path, data):
+    calls = []
+
+    def history(tickers, period):
+        calls.append((tuple(tickers), period))
+        return {ticker: data for ticker in tickers}
+
+    today = data.index[-1].date()
+    path = str(tmp_path / 'states.json')
+    store = IndicatorStateStore(path, history)
+
+    first = store.update_from_snapshot(snapshot_with({'EQNR.OL': 100.0}), today=today)
+    second = store.update_from_snapshot(snapshot_with({'EQNR.OL': 101.0}), today=today)
+
+    assert calls == [(('EQNR.OL',), '1y')]
+    # Dagens ufullstendige bar er ikke med i tilstanden; kursen fra snapshotet er dagens bar
+    expected = IndicatorState.from_history('EQNR.OL', data.iloc[:-1]).peek(101.0)
+    assert second == {'EQNR.OL': pytest.approx(expected)}
+    assert first['EQNR.OL']['close'] == 100.0
+    assert store.live('EQNR.OL') == second['EQNR.OL']
+
+    # Etter en omstart leses tilstanden fra disk, og bare nye dager hentes
+    restarted = IndicatorStateStore(path, history)
+    next_day = today + pd.Timedelta(days=1)
+    restarted.update_from_snapshot(snapshot_with({'EQNR.OL': 101.0}), today=next_day)
+    assert calls[-1] == (('EQNR.OL',), '1mo')
+    assert restarted._states['EQNR.OL'].last_date == str(data.index[-1])[:10]
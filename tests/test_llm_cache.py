@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.analysis_service import AnalysisService
+from app.services.data_service import DataService
+from app.services.llm_cache import LLMResponseCache, cache_key
+from app.services.llm_client import FakeLLMClient
+from app.services.price_provider import FakePriceProvider
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'llm_cache.sqlite')
+
+
+def test_entries_expire_after_the_ttl(path):
+    cache = LLMResponseCache(path, ttl=0.05)
+    cache.put('key', 'analysis', 'answer')
+    assert cache.get('key') == 'answer'
+
+    time.sleep(0.1)
+    assert cache.get('key') is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(path):
+    cache = LLMResponseCache(path, max_entries=2)
+    cache.put('a', 'analysis', 'A')
+    time.sleep(0.01)
+    cache.put('b', 'analysis', 'B')
+    time.sleep(0.01)
+    assert cache.get('a') == 'A'
+    time.sleep(0.01)
+    cache.put('c', 'analysis', 'C')
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('A', 'C')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_responses_survive_a_new_instance(path):
+    calls = []
+    LLMResponseCache(path).get_or_call('analysis', {'ticker': 'EQNR.OL'}, {'model': 'm'},
+                                       lambda: calls.append(1) or 'answer')
+    again = LLMResponseCache(path).get_or_call('analysis', {'ticker': 'EQNR.OL'}, {'model': 'm'},
+                                               lambda: calls.append(1) or 'other')
+    assert again == 'answer'
+    assert len(calls) == 1
+
+
+def test_key_ignores_dict_order_and_float_noise():
+    assert cache_key('k', {'a': 1.00000001, 'b': 'x  y'}, {}) == cache_key('k', {'b': 'x y', 'a': 1.0}, {})
+    assert cache_key('k', {'a': 1.0}, {'model': 'm'}) != cache_key('k', {'a': 1.0}, {'model': 'n'})
+
+
+def test_small_indicator_moves_reuse_the_analysis(path, monkeypatch):
+    DataService.set_price_provider(FakePriceProvider())
+    client = FakeLLMClient()
+    monkeypatch.setattr(AIService, 'llm_client', client)
+    monkeypatch.setattr(AIService, 'llm_cache', LLMResponseCache(path))
+    monkeypatch.setattr(AIService, 'get_ml_tip', staticmethod(lambda ticker: 'HOLD'))
+    monkeypatch.setattr(AnalysisService, 'predict_next_day_price',
+                        staticmethod(lambda ticker: {'support': 280.123456, 'resistance': 310.987654,
+                                                     'volatility': 0.234567}))
+    for rsi, macd in ((48.214, 1.2341), (48.239, 1.2338)):
+        monkeypatch.setattr(AnalysisService, 'get_technical_analysis',
+                            staticmethod(lambda ticker, rsi=rsi, macd=macd: {'rsi': rsi, 'macd': macd}))
+        result = AIService.get_ai_analysis('EQNR.OL')
+        assert 'error' not in result
+
+    assert client.calls['chat'] == 1
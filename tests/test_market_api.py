@@ -0,0 +1,36 @@
+import pytest
+
+from app import create_app
+from app.routes import api
+from app.services.data_service import DataService
+from app.services.market_snapshot import MarketSnapshotRefresher
+from app.services.price_provider import FakePriceProvider
+
+
+@pytest.fixture
+def client(monkeypatch):
+    refresher = MarketSnapshotRefresher(
+        {'oslo_stocks': lambda: {'EQNR.OL': {'name': 'Equinor', 'last_price': 300.0}}}, interval=3600)
+    monkeypatch.setattr(DataService, 'market_snapshots', refresher)
+    yield create_app().test_client()
+    refresher.stop()
+
+
+def test_snapshot_etags_are_unique_per_process(client, monkeypatch):
+    response = client.get('/api/market')
+    etag = response.headers['ETag'].strip('"')
+    assert etag.startswith('market-') and etag != 'market-v1'
+    assert client.get('/api/market', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    # En annen arbeider (eller en ny oppstart) med samme versjon må ikke gi 304
+    monkeypatch.setattr(api, '_ETAG_EPOCH', 'other')
+    assert client.get('/api/market', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+
+def test_quote_for_unknown_ticker_does_not_reach_the_provider(client):
+    provider = FakePriceProvider()
+    DataService.set_price_provider(provider)
+
+    assert client.get('/api/quote/EQNR.OL').json['quote']['last_price'] == 300.0
+    assert client.get('/api/quote/JUNK123').status_code == 404
+    assert provider.calls == {'history': 0, 'history_batch': 0, 'info': 0}
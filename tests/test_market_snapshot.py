@@ -0,0 +1,66 @@
+import threading
+
+import pandas as pd
+
+from app.services.data_service import DataService
+from app.services.market_snapshot import MarketSnapshotRefresher
+from app.services.price_provider import FakePriceProvider
+
+
+def test_global_overview_refreshes_twice_without_history_frames():
+    DataService.set_price_provider(FakePriceProvider())
+    refresher = MarketSnapshotRefresher({'global_stocks': DataService._fetch_global_stocks_overview})
+
+    refresher.refresh()
+    snapshot = refresher.refresh()
+
+    rows = snapshot.sections['global_stocks']
+    assert rows
+    assert all('data' not in row for row in rows.values())
+
+
+def test_refresh_compares_rows_holding_frames():
+    def build():
+        return {'X': {'last_price': 2.0, 'data': pd.DataFrame({'Close': [1.0, 2.0]})}}
+
+    refresher = MarketSnapshotRefresher({'section': build})
+
+    refresher.refresh()
+    refresher.refresh()
+
+
+def test_refresher_thread_survives_a_failed_refresh():
+    refresher = MarketSnapshotRefresher({}, interval=0.01)
+    calls = []
+    done = threading.Event()
+
+    def refresh():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError('boom')
+        done.set()
+
+    refresher.refresh = refresh
+    refresher.start()
+    try:
+        assert done.wait(2)
+        assert refresher.running
+    finally:
+        refresher.stop()
+
+
+def test_first_reader_gets_a_built_snapshot():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {'EQNR.OL': {'last_price': 300.0}}
+
+    refresher = MarketSnapshotRefresher({'oslo_stocks': build})
+    assert refresher.latest().version == 0
+
+    snapshot = refresher.ensure_published()
+    assert snapshot.version == 1
+    assert snapshot.sections['oslo_stocks']['EQNR.OL']['last_price'] == 300.0
+    assert refresher.ensure_published() is snapshot
+    assert len(calls) == 1
@@ -0,0 +1,20 @@
+from app.services import memo
+from app.services.concurrency import fan_out
+
+
+def test_fan_out_workers_share_the_scope_safely():
+    computed = []
+
+    @memo.memoized
+    def square(n):
+        computed.append(n)
+        return n * n
+
+    with memo.memo_scope('test') as scope:
+        outcomes = fan_out(lambda i: square(i % 10), range(2000), max_workers=16)
+        counts = scope.stats()
+
+    assert [result for result, _ in outcomes] == [(i % 10) ** 2 for i in range(2000)]
+    assert counts['calls'] == 2000
+    assert counts['deduplicated'] == 2000 - len(computed)
+    assert len(scope.values) == 10
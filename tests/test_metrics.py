@@ -0,0 +1,56 @@
+import pytest
+
+from app import create_app, db, init_db
+from app.models.user import User
+from config import Config
+
+REMOTE = {'REMOTE_ADDR': '10.0.0.1'}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(Config, 'SERVER_TIMING_ENABLED', True)
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', None)
+    app = create_app()
+    init_db(app)
+    return app
+
+
+def test_metrics_need_a_token_outside_debug(app):
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+
+
+def test_metrics_from_localhost_in_debug_without_token(app):
+    app.debug = True
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+
+
+def test_metrics_with_bearer_token(app):
+    app.config['METRICS_TOKEN'] = 'secret'
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', environ_base=REMOTE, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', environ_base=REMOTE, headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert b'aksjeradar_request_duration_seconds' in response.data
+
+
+def test_server_timing_only_for_logged_in_users(app):
+    client = app.test_client()
+    assert 'Server-Timing' not in client.get('/register').headers
+
+    with app.app_context():
+        user = User.query.filter_by(username='timing').first()
+        if user is None:
+            user = User(username='timing', email='timing@example.com')
+            user.set_password('timing')
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    assert 'total;dur=' in client.get('/register').headers['Server-Timing']
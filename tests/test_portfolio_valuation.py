@@ -0,0 +1,82 @@
+import pytest
+
+from app import create_app, db, init_db
+from app.models.portfolio import Portfolio, PortfolioStock
+from app.models.user import User
+from app.services.data_service import DataService
+from app.services.fx_store import FakeFXRateSource, FXStore
+from app.services.portfolio_valuation import PortfolioValuationService
+from app.services.price_provider import FakePriceProvider
+
+HOLDINGS = [('AAPL', 10, 150.0), ('EQNR.OL', 100, 250.0), ('JUNK.OL', 5, 20.0)]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    provider = FakePriceProvider(failing=['JUNK.OL'])
+    DataService.set_price_provider(provider)
+    fx_store = FXStore(str(tmp_path / 'fx.sqlite'), FakeFXRateSource(), ['NOK', 'EUR'])
+    fx_store.sync(force=True)
+    monkeypatch.setattr(DataService, 'fx_store', fx_store)
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        user = User(username=f'valuation-{tmp_path.name}', email=f'{tmp_path.name}@example.com')
+        user.set_password('valuation')
+        db.session.add(user)
+        db.session.flush()
+        holdings = Portfolio(name='Holdings', user_id=user.id)
+        empty = Portfolio(name='Empty', user_id=user.id)
+        db.session.add_all([holdings, empty])
+        db.session.flush()
+        for ticker, shares, average_price in HOLDINGS:
+            db.session.add(PortfolioStock(portfolio_id=holdings.id, ticker=ticker, shares=shares,
+                                          average_price=average_price))
+        db.session.commit()
+        app.user_id = user.id
+        yield app
+
+
+def last_close(ticker):
+    return float(FakePriceProvider().history(ticker, period='5d')['Close'].iloc[-1])
+
+
+def test_values_and_totals_match_a_per_holding_loop(app):
+    holdings, empty = PortfolioValuationService.value_portfolios(user_id=app.user_id)
+
+    assert holdings['tickers'] == ['AAPL', 'EQNR.OL', 'JUNK.OL']
+    # Beholdningen uten kurs er utelatt, både fra listen og fra totalene
+    assert [s['ticker'] for s in holdings['stocks']] == ['AAPL', 'EQNR.OL']
+    value = sum(last_close(t) * shares for t, shares, _ in HOLDINGS[:2])
+    investment = sum(shares * price for _, shares, price in HOLDINGS[:2])
+    assert holdings['total_value'] == pytest.approx(value)
+    assert holdings['total_investment'] == pytest.approx(investment)
+    assert holdings['total_gain_loss'] == pytest.approx(value - investment)
+    assert holdings['total_gain_loss_percent'] == pytest.approx((value / investment - 1) * 100)
+    aapl = holdings['stocks'][0]
+    assert aapl['gain_loss_percent'] == pytest.approx((last_close('AAPL') / 150.0 - 1) * 100)
+
+    assert empty['stocks'] == [] and empty['tickers'] == []
+    assert (empty['total_value'], empty['total_gain_loss_percent']) == (0.0, 0)
+
+
+def test_values_are_converted_with_the_stored_fx_rates(app):
+    holdings, _ = PortfolioValuationService.value_portfolios(user_id=app.user_id, currency='NOK')
+
+    usd_nok = DataService.fx_store.cross('USD', 'NOK')
+    aapl, eqnr = holdings['stocks']
+    assert aapl['current_price'] == pytest.approx(last_close('AAPL') * usd_nok)
+    assert aapl['average_price'] == pytest.approx(150.0 * usd_nok)
+    assert eqnr['current_price'] == pytest.approx(last_close('EQNR.OL'))
+    assert eqnr['average_price'] == pytest.approx(250.0)
+    assert holdings['total_value'] == pytest.approx(aapl['value'] + eqnr['value'])
+    assert holdings['currency'] == 'NOK'
+
+
+def test_single_portfolio(app):
+    with app.app_context():
+        portfolio_id = Portfolio.query.filter_by(user_id=app.user_id, name='Holdings').one().id
+    valued = PortfolioValuationService.value_portfolio(portfolio_id)
+    assert valued['portfolio'].id == portfolio_id
+    assert PortfolioValuationService.value_portfolio(10 ** 9) is None
@@ -0,0 +1,38 @@
+import threading
+
+from app.services.quote_cache import QuoteCache
+
+
+def test_invalidate_during_load_is_not_undone():
+    cache = QuoteCache({'oslo': 60})
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(2)
+        return {'price': 'old provider'}
+
+    thread = threading.Thread(target=cache.get, args=('EQNR.OL', slow_loader, 'oslo'))
+    thread.start()
+    assert started.wait(2)
+    cache.invalidate()
+    release.set()
+    thread.join(2)
+
+    assert cache.stats()['entry_age_seconds'] == {}
+    assert cache.get('EQNR.OL', lambda: {'price': 'new provider'}, 'oslo') == {'price': 'new provider'}
+
+
+def test_stats_lists_keys_being_refreshed():
+    cache = QuoteCache({'oslo': 0}, max_stale=60)
+    release = threading.Event()
+    cache.get('EQNR.OL', lambda: {'price': 1}, 'oslo')
+
+    def slow_loader():
+        release.wait(2)
+        return {'price': 2}
+
+    assert cache.get('EQNR.OL', slow_loader, 'oslo') == {'price': 1}
+    assert cache.stats()['refreshing'] == ['EQNR.OL']
+    release.set()
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+from app.services.market_snapshot import MarketSnapshot
+from app.services.quote_stream import QuotePublisher, format_sse
+
+
+def test_nan_is_published_as_null_and_only_once():
+    publisher = QuotePublisher()
+    first = publisher.publish({'EQNR.OL': {'last_price': 300.0, 'change_percent': float('nan')}})
+    second = publisher.publish({'EQNR.OL': {'last_price': 300.0, 'change_percent': np.float64('nan')}})
+
+    assert first == {'EQNR.OL': {'last_price': 300.0}}
+    assert second == {}
+
+
+def test_nan_after_a_value_is_sent_as_null():
+    publisher = QuotePublisher()
+    publisher.publish({'EQNR.OL': {'change': 1.5}})
+    delta = publisher.publish({'EQNR.OL': {'change': float('nan')}})
+
+    message = format_sse(delta, event='delta')
+    payload = json.loads(message.split('data: ', 1)[1], parse_constant=_reject_constant)
+    assert payload == {'EQNR.OL': {'change': None}}
+
+
+def test_subscription_is_registered_when_its_stream_starts():
+    publisher = QuotePublisher()
+    subscription = publisher.subscribe(['EQNR.OL'])
+    assert publisher.stats()['subscribers'] == 0
+
+    events = subscription.events(heartbeat=0.01)
+    next(events)
+    assert publisher.stats()['subscribers'] == 1
+    assert publisher.stats()['connections'] == 1
+
+    events.close()
+    assert publisher.stats()['subscribers'] == 0
+
+
+def test_crypto_rows_are_published_under_the_registry_ticker():
+    publisher = QuotePublisher()
+    snapshot = MarketSnapshot(1, 0.0, {'crypto': {'BTC': {'last_price': 60000.0}}})
+
+    deltas = publisher.publish_snapshot(snapshot)
+
+    assert deltas['BTC'] == {'last_price': 60000.0}
+    assert deltas['BTC-USD'] == {'last_price': 60000.0}
+
+
+def _reject_constant(name):
+    # JSON.parse i nettleseren godtar ikke NaN/Infinity
+    raise AssertionError(f"{name} in SSE payload")
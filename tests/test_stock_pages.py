@@ -0,0 +1,42 @@
+import pytest
+
+from app import create_app, db, init_db
+from app.models.stock import Watchlist, WatchlistStock
+from app.models.user import User
+from app.services.data_service import DataService
+from app.services.price_provider import FakePriceProvider
+from tests.test_diagnostics import login
+
+
+@pytest.fixture
+def app():
+    DataService.set_price_provider(FakePriceProvider(failing=['ZZNONE']))
+    app = create_app()
+    init_db(app)
+    return app
+
+
+def test_stock_detail_page(app):
+    client = app.test_client()
+
+    response = client.get('/stocks/EQNR.OL')
+    assert response.status_code == 200
+    assert b'EQNR.OL' in response.data
+    assert client.get('/stocks/ZZNONE').status_code == 404
+
+
+def test_watchlist_links_to_the_detail_page(app):
+    client = app.test_client()
+    login(app, client)
+    with app.app_context():
+        user = User.query.filter_by(username='diagnostics').first()
+        watchlist = Watchlist(name='Test', user_id=user.id)
+        db.session.add(watchlist)
+        db.session.commit()
+        db.session.add(WatchlistStock(watchlist_id=watchlist.id, ticker='AAPL'))
+        db.session.commit()
+
+    response = client.get('/watchlist')
+
+    assert response.status_code == 200
+    assert b'href="/stocks/AAPL"' in response.data
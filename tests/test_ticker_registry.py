@@ -0,0 +1,46 @@
+import time
+
+from app.services.data_service import DataService
+from app.services.price_provider import FakePriceProvider
+from config import Config
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_unknown_ticker_gets_its_name_in_the_background():
+    DataService.set_price_provider(FakePriceProvider())
+
+    assert DataService.get_ticker_name('ZZTEST') == 'ZZTEST'
+    assert wait_for(lambda: DataService.ticker_registry.name('ZZTEST') == 'ZZTEST Fake Corp')
+    assert DataService.get_ticker_sector('ZZTEST') == 'Technology'
+
+
+def test_missing_names_are_not_requested_again_right_away():
+    DataService.set_price_provider(FakePriceProvider(failing=['ZZFAIL']))
+
+    DataService.request_ticker_metadata(['ZZFAIL'])
+    assert wait_for(lambda: DataService._metadata_thread is None)
+    attempted = DataService._metadata_attempted['ZZFAIL']
+    DataService.request_ticker_metadata(['ZZFAIL'])
+    assert DataService._metadata_attempted['ZZFAIL'] == attempted
+    assert 'ZZFAIL' not in DataService._metadata_pending
+
+
+def test_old_metadata_attempts_are_forgotten(monkeypatch):
+    DataService.set_price_provider(FakePriceProvider(failing=['ZZOLD', 'ZZNEW']))
+    monkeypatch.setattr(DataService, '_metadata_attempted', {})
+    monkeypatch.setattr(Config, 'TICKER_METADATA_RETRY', 3600)
+
+    DataService.request_ticker_metadata(['ZZOLD'])
+    DataService._metadata_attempted['ZZOLD'] -= 3601
+    DataService.request_ticker_metadata(['ZZNEW'])
+    assert wait_for(lambda: DataService._metadata_thread is None)
+
+    assert list(DataService._metadata_attempted) == ['ZZNEW']
@@ -0,0 +1,33 @@
+import threading
+
+from app.services.data_service import DataService
+
+
+def test_readers_never_see_a_half_published_index():
+    DataService.rebuild_ticker_index()
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                DataService.get_ticker_index()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for _ in range(20):
+        DataService.rebuild_ticker_index()
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+
+
+def test_short_queries_match_inside_symbols():
+    results = DataService.search_ticker('QN')
+    assert 'EQNR.OL' in results
+    assert all('QN' in symbol or 'qn' in DataService.ticker_registry.name(symbol).lower() for symbol in results)